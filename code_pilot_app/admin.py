@@ -16,9 +16,10 @@ from django.contrib import admin
 
 # """
 
-from .models import Course, Instructor, Cart, Checkout
+from .models import Course, Instructor, Cart, Checkout, Order
 
 admin.site.register(Course)
 admin.site.register(Instructor)
 admin.site.register(Cart)
 admin.site.register(Checkout)
+admin.site.register(Order)
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+# Re-create the course search index after every migrate
+# (SQLite drops its triggers whenever a migration rebuilds the course table)
+def ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from .search import install_search_index
+    install_search_index(connections[using])
 
 
 class CodePilotAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'code_pilot_app'
+
+    def ready(self):
+        # Register the model signal receivers (cache / index invalidation)
+        from . import signals  # noqa: F401
+        post_migrate.connect(ensure_search_index, sender=self)
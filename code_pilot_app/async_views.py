@@ -0,0 +1,122 @@
+# code_pilot_app/async_views.py
+
+# async versions of the AJAX endpoints, used when the project is served through
+# code_pilot_project/asgi.py (settings.ASYNC_AJAX_VIEWS, see urls.py)
+
+# add_to_cart, remove_from_cart, toggle_favorite, remove_from_favorites, load_cart_snippet and
+# search_suggestions are small JSON endpoints that spend most of their time waiting for the
+# database. As sync views each of them holds a whole worker until the database answers; here
+# they await the async ORM (aget_or_create, adelete, async iteration) and the async cache API,
+# so one process keeps serving other requests meanwhile.
+# Same URLs, same responses, same cache invalidation as the sync views in views.py.
+
+# What cannot be awaited runs in a worker thread through sync_to_async: template rendering
+# (the context processors read the cache and the database) and the search index (raw SQL on
+# the FTS5 / pg_trgm tables, see search.py).
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, redirect
+from django.template.loader import render_to_string
+
+from .cart import aget_cart_summary, get_cart_items
+from .conditional import cart_snippet_etag, catalog_etag, catalog_last_modified, conditional_response
+from .models import Cart, Course, Favorite
+from .search import cached_suggestions
+
+
+# Async login_required_redirect (views.py): warning message + redirect home when logged out
+# The user is loaded with request.auser(); it is also put back on request.user so sync code
+# running later for this request (templates, context processors) does not load it again.
+def login_required_redirect(view_func):
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        request.user = user
+        if not user.is_authenticated:
+            messages.warning(request, "Please login or register to access this page.")
+            return redirect('index')
+        return await view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def _is_ajax(request):
+    return request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+
+# Add a course to the user's cart
+@login_required_redirect
+async def add_to_cart(request, course_id):
+    course = await aget_object_or_404(Course, id=course_id)
+    # A new row drops the cached cart summary (signals.py)
+    cart_item, created = await Cart.objects.aget_or_create(user=request.user, course=course)
+
+    if _is_ajax(request):
+        count = (await aget_cart_summary(request.user)).count
+        return JsonResponse({'status': 'success', 'added': created, 'count': count})
+    return redirect('course_detail', course_id=course.id)
+
+
+# Remove a specific item from the cart (AJAX POST only)
+@login_required_redirect
+async def remove_from_cart(request, item_id):
+    if request.method == "POST" and _is_ajax(request):
+        item = await aget_object_or_404(Cart, id=item_id, user=request.user)
+        await item.adelete()
+        summary = await aget_cart_summary(request.user)
+        return JsonResponse({'status': 'success', 'count': summary.count, 'total': summary.total})
+
+    return redirect(request.META.get('HTTP_REFERER', 'view_cart'))
+
+
+# Add or remove a course from user's favorites
+@login_required_redirect
+async def toggle_favorite(request, course_id):
+    if _is_ajax(request):
+        course = await aget_object_or_404(Course, id=course_id)
+        fav, created = await Favorite.objects.aget_or_create(user=request.user, course=course)
+        # (the cached favorite ids are dropped either way, see signals.py)
+        if not created:
+            await fav.adelete()
+            return JsonResponse({'status': 'removed'})
+        return JsonResponse({'status': 'added'})
+
+
+# Remove a course from favorites
+@login_required_redirect
+async def remove_from_favorites(request, course_id):
+    if _is_ajax(request):
+        # The post_delete signal forgets the cached favorite ids (signals.py)
+        deleted, _ = await Favorite.objects.filter(user=request.user, course_id=course_id).adelete()
+        if deleted:
+            return JsonResponse({'status': 'success'})
+        return JsonResponse({'status': 'not_found'})
+    return redirect('view_favorites')
+
+
+# Header cart dropdown
+@login_required_redirect
+@conditional_response(cart_snippet_etag)
+async def load_cart_snippet(request):
+    # Summary and rows are loaded here with the async ORM; the context processors then find the
+    # summary in the cache and the rows in the context (cart_snippet_items) instead of querying
+    summary = await aget_cart_summary(request.user)
+    items = []
+    if summary.count:
+        items = [item async for item in get_cart_items(request.user)]
+    html = await sync_to_async(render_to_string)(
+        "partials/cart_snippet.html", {'cart_snippet_items': items}, request=request,
+    )
+    return JsonResponse({'html': html})
+
+
+# Suggest course names while user types in search bar
+@conditional_response(catalog_etag, catalog_last_modified, private=False)
+async def search_suggestions(request):
+    query = request.GET.get('q', '')
+    results, cache_status = await sync_to_async(cached_suggestions)(query)
+    data = [{'id': course_id, 'name': name} for course_id, name in results]
+    response = JsonResponse(data, safe=False)
+    response['X-Cache'] = cache_status
+    return response
@@ -0,0 +1,164 @@
+# code_pilot_app/autocomplete.py
+
+# in-process autocomplete index for the search box
+
+# Each worker keeps every course name in two sorted arrays and answers a prefix with bisect:
+#   - full names   → "pyt" matches "Python Full Stack ..."
+#   - word suffixes → "full st" matches "... Full Stack Web Development Course"
+# A lookup is O(log n + k) on memory only, so suggestions stay in microseconds whatever the
+# database is doing. post_save/post_delete on Course update the local arrays in place and bump
+# the 'autocomplete' version in the shared cache, which tells the other workers to reload.
+
+import bisect
+import re
+import threading
+import time
+
+from .db_router import read_from_primary
+from .models import Course
+from .versions import bump_atomic_version, get_atomic_version
+
+
+# Name of the version stamp in the shared cache
+VERSION_NAME = 'autocomplete'
+# How often (seconds) a worker looks at the shared version (keeps cache round-trips off the hot path)
+VERSION_CHECK_INTERVAL = 1.0
+
+# Words of a name/query (letters and digits only)
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# Split text into lower-case words (shared with search.py so both agree on what a word is)
+def query_words(text):
+    return WORD_RE.findall(text.lower())
+
+
+# Sorted prefix index over course names
+class AutocompleteIndex:
+    def __init__(self, courses=()):
+        # course id → display name
+        self._names = {}
+        # sorted (normalized full name, course id)
+        self._full = []
+        # sorted (normalized name starting at its 2nd, 3rd, ... word, course id)
+        self._suffixes = []
+        for course_id, name in courses:
+            self._names[course_id] = name
+            full, suffixes = self._keys(name)
+            self._full.append((full, course_id))
+            self._suffixes.extend((suffix, course_id) for suffix in suffixes)
+        self._full.sort()
+        self._suffixes.sort()
+
+    def __len__(self):
+        return len(self._names)
+
+    # Normalized full name plus every "starts at a later word" suffix of it
+    @staticmethod
+    def _keys(name):
+        words = query_words(name)
+        return ' '.join(words), [' '.join(words[i:]) for i in range(1, len(words))]
+
+    # Add or replace one course
+    def add(self, course_id, name):
+        self.remove(course_id)
+        self._names[course_id] = name
+        full, suffixes = self._keys(name)
+        bisect.insort(self._full, (full, course_id))
+        for suffix in suffixes:
+            bisect.insort(self._suffixes, (suffix, course_id))
+
+    # Remove one course (no-op if it is not indexed)
+    def remove(self, course_id):
+        name = self._names.pop(course_id, None)
+        if name is None:
+            return
+        full, suffixes = self._keys(name)
+        for array, key in [(self._full, full)] + [(self._suffixes, s) for s in suffixes]:
+            position = bisect.bisect_left(array, (key, course_id))
+            if position < len(array) and array[position] == (key, course_id):
+                del array[position]
+
+    # Course ids whose key starts with prefix, in key order
+    @staticmethod
+    def _scan(array, prefix):
+        position = bisect.bisect_left(array, (prefix,))
+        while position < len(array) and array[position][0].startswith(prefix):
+            yield array[position][1]
+            position += 1
+
+    # Top matches for a query → list of (course id, name); full-name matches rank first
+    def suggest(self, query, limit):
+        prefix = ' '.join(query_words(query))
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        for array in (self._full, self._suffixes):
+            for course_id in self._scan(array, prefix):
+                if course_id not in seen:
+                    seen.add(course_id)
+                    results.append((course_id, self._names[course_id]))
+                    if len(results) >= limit:
+                        return results
+        return results
+
+
+# Per-worker state: the index, the shared version it was built from and when we last checked
+_index = None
+_index_version = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+# Build a fresh index from the database (one query over id + name only)
+# (from the primary, see db_router.py, since it is kept until the next catalog change)
+def _build_index():
+    with read_from_primary():
+        return AutocompleteIndex(Course.objects.values_list('id', 'course_name').iterator())
+
+
+# The current index of this worker, reloaded when another worker changed the catalog
+def get_index():
+    global _index, _index_version, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _index
+
+    with _lock:
+        version = get_atomic_version(VERSION_NAME)
+        _checked_at = now
+        if _index is None or version != _index_version:
+            _index = _build_index()
+            _index_version = version
+        return _index
+
+
+# Top suggestions for a query, answered from memory
+def suggest(query, limit):
+    return get_index().suggest(query, limit)
+
+
+# Apply a change made by this worker to its own index, and tell the other workers
+# The bump is atomic (versions.bump_atomic_version), so "one past the version our index was built
+# from" means nobody else changed the catalog in between; otherwise drop our index and rebuild
+# on next use
+def _apply_local_change(change):
+    global _index, _index_version
+    version = bump_atomic_version(VERSION_NAME)
+    with _lock:
+        if _index is not None and _index_version == version - 1:
+            change(_index)
+            _index_version = version
+        else:
+            _index = None
+
+
+# Called (after commit) when a course was created or renamed
+def course_saved(course_id, name):
+    _apply_local_change(lambda index: index.add(course_id, name))
+
+
+# Called (after commit) when a course was deleted
+def course_deleted(course_id):
+    _apply_local_change(lambda index: index.remove(course_id))
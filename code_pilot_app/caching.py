@@ -0,0 +1,72 @@
+# code_pilot_app/caching.py
+
+# small per-process LRU cache with a time-to-live
+
+# Used in front of hot, read-mostly lookups (e.g. search suggestions). It is bounded
+# (the least recently used entry is evicted when full), entries expire after `ttl` seconds,
+# it is thread safe, and it counts hits / misses so the hit rate can be measured.
+
+import threading
+import time
+from collections import OrderedDict
+
+
+# Sentinel so a cached None / [] is still a hit
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=60.0):
+        # Maximum number of entries kept
+        self.maxsize = maxsize
+        # Seconds an entry stays valid
+        self.ttl = ttl
+        # key → (expires at, value), oldest first
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Counters for hit-rate measurement
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    # Cached value for key, or default when missing / expired
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    # Mark as most recently used
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                # Expired → forget it
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    # Store a value, evicting the least recently used entries when full
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    # Drop everything
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # Hit / miss counters and current size
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,105 @@
+# code_pilot_app/cart.py
+
+# cart summary service: item count, total price and course ids of a user's cart
+
+# The header of every page shows the cart count and total, so this runs on every render for
+# logged-in users. It used to cost one query for the cart plus one Course query per item.
+# Now it is one query (course id + price of each cart row, joined in SQL), cached per user in
+# the cache shared by all workers (versions.shared_cache()).
+# The key carries the 'catalog' version, so a course price change never leaves an old total in
+# the header, and the user's cart version ('cart:<user id>', see versions.py), which moves on
+# after every change: every saved or deleted Cart row, including the rows deleted along with a
+# Course or a User, calls invalidate_cart_summary() after commit (signals.py; checkout empties
+# the cart with one DELETE and calls it once, see orders.py). The next read rebuilds the
+# summary under the new key. A request that loaded the rows just before the change can only
+# store its stale summary under the old key, which nobody reads again. The cart version is also
+# used in the ETags of pages showing the cart (conditional.py).
+# aget_cart_summary() does the same with the async ORM and cache API for the async AJAX views
+# (async_views.py).
+
+from collections import namedtuple
+from decimal import Decimal
+
+from .models import Cart
+from .versions import aget_version, bump_version, get_local_version, get_version, shared_cache
+
+
+# count → number of items, total → sum of course prices, course_ids → frozenset of course ids
+CartSummary = namedtuple('CartSummary', ['count', 'total', 'course_ids'])
+
+# Summary of an empty cart (anonymous users)
+EMPTY_CART = CartSummary(0, Decimal('0'), frozenset())
+
+# Seconds a summary stays cached (it is also dropped on every cart change)
+CART_SUMMARY_TIMEOUT = 60 * 60
+
+
+def _version_name(user_id):
+    return f'cart:{user_id}'
+
+
+# Cache key of a summary for the given cart version
+def _summary_key(user_id, cart_version):
+    return f'cart:summary:{user_id}:{cart_version}:{get_local_version("catalog")}'
+
+
+def _cart_rows(user_id):
+    return Cart.objects.filter(user_id=user_id).values_list('course_id', 'course__price')
+
+
+# (course id, price) rows → summary
+def _summary_from_rows(rows):
+    return CartSummary(
+        count=len(rows),
+        total=sum((price for _, price in rows), Decimal('0')),
+        course_ids=frozenset(course_id for course_id, _ in rows),
+    )
+
+
+# Build the summary with a single query
+def _load_cart_summary(user_id):
+    return _summary_from_rows(list(_cart_rows(user_id)))
+
+
+# Cart summary of a user (from the per-user cache when possible)
+def get_cart_summary(user):
+    if not user.is_authenticated:
+        return EMPTY_CART
+    cache = shared_cache()
+    # Read the cart version first: rows loaded after it are at least that recent
+    key = _summary_key(user.id, get_cart_version(user.id))
+    summary = cache.get(key)
+    if summary is None:
+        summary = _load_cart_summary(user.id)
+        cache.set(key, summary, CART_SUMMARY_TIMEOUT)
+    return summary
+
+
+# The cart of this user changed (signals.py, orders.py) → move its version on
+# (summaries stored under older cart or catalog versions are never read again and simply expire)
+def invalidate_cart_summary(user_id):
+    bump_version(_version_name(user_id))
+
+
+# ---- async (async_views.py) ----
+
+async def aget_cart_summary(user):
+    if not user.is_authenticated:
+        return EMPTY_CART
+    cache = shared_cache()
+    key = _summary_key(user.id, await aget_version(_version_name(user.id)))
+    summary = await cache.aget(key)
+    if summary is None:
+        summary = _summary_from_rows([row async for row in _cart_rows(user.id)])
+        await cache.aset(key, summary, CART_SUMMARY_TIMEOUT)
+    return summary
+
+
+# Version of a user's cart: changes whenever an item is added or removed (one cache read)
+def get_cart_version(user_id):
+    return get_version(_version_name(user_id))
+
+
+# Cart rows with their course loaded in the same query (for pages listing the cart)
+def get_cart_items(user):
+    return Cart.objects.filter(user=user).select_related('course').order_by('added_at', 'id')
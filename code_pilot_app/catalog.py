@@ -0,0 +1,311 @@
+# code_pilot_app/catalog.py
+
+# immutable per-worker snapshot of the course catalog
+
+# Courses and instructors change a few times a day but are read on every request. Each worker
+# loads them once into compact __slots__ records (no ORM model instances), indexed by id,
+# category and instructor. When the shared 'catalog' version moves on (signals.py bumps it on
+# every Course / Instructor save or delete, in whichever process) the worker builds a new
+# snapshot and swaps it in with a single assignment, so a request always sees one complete,
+# consistent snapshot. Changes that send no signal (queryset.update(), raw SQL, another
+# application writing the database) are picked up when the snapshot is older than
+# CATALOG_SNAPSHOT_MAX_AGE seconds.
+
+# Listings filtered by subcategory / level / language are not served from the snapshot: the
+# composite indexes on Course answer them without scanning the whole catalog.
+
+# Views do not talk to the snapshot directly: they call the functions at the bottom of this
+# file, which use the snapshot when CATALOG_SNAPSHOT_ENABLED is on and the ORM otherwise.
+
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .db_router import read_from_primary
+from .models import Course, Instructor
+from .pagination import KeysetPage, decode_cursor, encode_cursor, keyset_paginate
+from .versions import get_local_version
+
+
+logger = logging.getLogger(__name__)
+
+
+# Model fields copied into the records (everything the catalog templates read)
+INSTRUCTOR_FIELDS = (
+    'id', 'name', 'profession', 'about', 'email', 'phone_no', 'rating', 'updated_at', 'profile_image_variants',
+)
+COURSE_FIELDS = (
+    'id', 'course_name', 'short_description', 'long_description', 'category', 'subcategory',
+    'learning_outcomes', 'price', 'instructor_id', 'duration', 'students_enrolled', 'language',
+    'certification', 'rating', 'technologies_covered', 'old_price', 'discount_percent', 'badge',
+    'level', 'lessons_count', 'updated_at',
+)
+# Seconds a snapshot is used while the version stays the same (settings.CATALOG_SNAPSHOT_MAX_AGE)
+SNAPSHOT_MAX_AGE = 300
+
+# Position of instructor_id in a course row
+INSTRUCTOR_ID_POSITION = COURSE_FIELDS.index('instructor_id')
+
+# category value → label, for get_category_display()
+CATEGORY_LABELS = dict(Course.CATEGORY_CHOICES)
+
+# Aggregates shown on an instructor page (average_rating is None without courses)
+InstructorStats = namedtuple('InstructorStats', ['course_count', 'students_enrolled', 'average_rating'])
+NO_COURSES = InstructorStats(0, 0, None)
+
+
+# Aggregates of an iterable of courses (records or model instances)
+def compute_instructor_stats(courses):
+    courses = list(courses)
+    if not courses:
+        return NO_COURSES
+    return InstructorStats(
+        course_count=len(courses),
+        students_enrolled=sum(c.students_enrolled for c in courses),
+        average_rating=sum(c.rating for c in courses) / len(courses),
+    )
+
+
+# Uploaded file reference with the same template API as a FieldFile ({{ x.url }}, {% if x %})
+class MediaFile:
+    __slots__ = ('name', 'url')
+
+    def __init__(self, name):
+        self.name = name or ''
+        # Resolve the url once at load time instead of on every render
+        self.url = default_storage.url(self.name) if self.name else ''
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __str__(self):
+        return self.name
+
+
+# Read-only instructor record
+class InstructorRecord:
+    __slots__ = INSTRUCTOR_FIELDS + ('profile_image',)
+
+    def __init__(self, row, profile_image):
+        for field, value in zip(INSTRUCTOR_FIELDS, row):
+            setattr(self, field, value)
+        self.profile_image = MediaFile(profile_image)
+
+    def __str__(self):
+        return self.name
+
+
+# Read-only course record
+class CourseRecord:
+    __slots__ = COURSE_FIELDS + ('promo_video', 'instructor')
+
+    def __init__(self, row, promo_video, instructor):
+        for field, value in zip(COURSE_FIELDS, row):
+            setattr(self, field, value)
+        self.promo_video = MediaFile(promo_video)
+        self.instructor = instructor
+
+    # Same as Course.get_category_display() (used by course_detail.html)
+    def get_category_display(self):
+        return CATEGORY_LABELS.get(self.category, self.category)
+
+    def __str__(self):
+        return f"{self.course_name} ({self.get_category_display()})"
+
+
+# Rough deep size (bytes) of the records, counting every shared object once
+def _deep_size(roots):
+    seen = set()
+    total = 0
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if hasattr(obj, '__slots__'):
+            stack.extend(getattr(obj, name) for name in obj.__slots__)
+        elif isinstance(obj, (tuple, list)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+    return total
+
+
+# One immutable load of the catalog
+class CatalogSnapshot:
+    def __init__(self, version):
+        started = time.perf_counter()
+        # 'catalog' version this snapshot was built from, and when
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        # Instructors: one query, tuples only (no model instantiation)
+        instructors = tuple(
+            InstructorRecord(row[:-1], row[-1])
+            for row in Instructor.objects.order_by('id').values_list(*INSTRUCTOR_FIELDS, 'profile_image')
+        )
+        self.instructors = instructors
+        self.instructors_by_id = {i.id: i for i in instructors}
+
+        # Courses: one query, ordered by id like the catalog pages
+        courses = tuple(
+            CourseRecord(row[:-1], row[-1], self.instructors_by_id.get(row[INSTRUCTOR_ID_POSITION]))
+            for row in Course.objects.order_by('id').values_list(*COURSE_FIELDS, 'promo_video')
+        )
+        self.courses = courses
+        self.courses_by_id = {c.id: c for c in courses}
+
+        # Secondary indexes: each list keeps id order, so keyset pages work on any of them
+        by_category = {}
+        by_instructor = {}
+        for course in courses:
+            by_category.setdefault(course.category, []).append(course)
+            by_instructor.setdefault(course.instructor_id, []).append(course)
+        self.by_category = {key: tuple(value) for key, value in by_category.items()}
+        self.by_instructor = {key: tuple(value) for key, value in by_instructor.items()}
+        # Instructor page aggregates, computed once per snapshot
+        self.instructor_stats = {key: compute_instructor_stats(value) for key, value in self.by_instructor.items()}
+        # Latest change of any course or instructor (Last-Modified of the catalog pages)
+        self.last_modified = max((record.updated_at for record in courses + instructors), default=None)
+
+        # Load statistics (logged and shown by "manage.py catalog_snapshot")
+        self.load_seconds = time.perf_counter() - started
+        self.memory_bytes = _deep_size([
+            self.courses, self.instructors, self.courses_by_id, self.instructors_by_id,
+            self.by_category, self.by_instructor, self.instructor_stats,
+        ])
+
+    # Courses of a category (all courses for None), id order
+    def category_courses(self, category=None):
+        if category is None:
+            return self.courses
+        return self.by_category.get(category, ())
+
+    # True while this snapshot may still be served for the given version
+    def is_current(self, version):
+        max_age = getattr(settings, 'CATALOG_SNAPSHOT_MAX_AGE', SNAPSHOT_MAX_AGE)
+        return self.version == version and time.monotonic() - self.loaded_at < max_age
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'version': self.version,
+            'courses': len(self.courses),
+            'instructors': len(self.instructors),
+            'memory_bytes': self.memory_bytes,
+            'load_ms': round(self.load_seconds * 1000, 2),
+        }
+
+
+# The snapshot of this worker (replaced, never modified)
+_snapshot = None
+_build_lock = threading.Lock()
+
+
+# True when catalog pages should render from the in-memory snapshot
+def snapshot_enabled():
+    return getattr(settings, 'CATALOG_SNAPSHOT_ENABLED', False)
+
+
+# Current snapshot of this worker, rebuilt when the shared catalog version changed or it got too old
+def get_snapshot():
+    global _snapshot
+    version = get_local_version('catalog')
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.is_current(version):
+        return snapshot
+
+    # Only one thread builds; the others keep serving the previous snapshot meanwhile
+    if snapshot is not None and not _build_lock.acquire(blocking=False):
+        return snapshot
+    if snapshot is None:
+        _build_lock.acquire()
+    try:
+        if _snapshot is None or not _snapshot.is_current(version):
+            # From the primary: a replica lagging behind must not be kept under the new version
+            with read_from_primary():
+                new_snapshot = CatalogSnapshot(version)
+            # Atomic swap: requests already running keep the old object
+            _snapshot = new_snapshot
+            stats = new_snapshot.stats()
+            logger.info(
+                "catalog snapshot v%s loaded in worker %s: %s courses, %s instructors, %.1f KiB in %s ms",
+                stats['version'], stats['pid'], stats['courses'], stats['instructors'],
+                stats['memory_bytes'] / 1024, stats['load_ms'],
+            )
+        return _snapshot
+    finally:
+        _build_lock.release()
+
+
+# One keyset page (by id) of an id-ordered tuple of records
+def _snapshot_page(records, cursor, page_size):
+    values = decode_cursor(cursor, 1)
+    start = 0
+    if values is not None:
+        try:
+            after_id = int(values[0])
+        except (TypeError, ValueError):
+            after_id = None
+        if after_id is not None:
+            # First record with id > cursor (records are in id order)
+            start = bisect.bisect_right(records, after_id, key=lambda record: record.id)
+    rows = records[start:start + page_size + 1]
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([rows[-1].id])
+    return KeysetPage(list(rows), next_cursor)
+
+
+# ---- functions used by the views ----
+
+# One page of the courses page (filters = exact field values)
+# All courses or one category come from the snapshot; other filters use the composite indexes
+def course_page(filters, cursor, page_size):
+    if snapshot_enabled() and set(filters) <= {'category'}:
+        return _snapshot_page(get_snapshot().category_courses(filters.get('category')), cursor, page_size)
+    queryset = Course.objects.filter(**filters).defer('long_description', 'learning_outcomes')
+    return keyset_paginate(queryset, ('id',), cursor=cursor, page_size=page_size)
+
+
+# One page of the courses of an instructor, in id order
+# Cost depends on the instructor's own courses only (by_instructor in the snapshot,
+# the (instructor, id) index in the database), never on the size of the catalog
+def instructor_course_page(instructor_id, cursor, page_size):
+    if snapshot_enabled():
+        return _snapshot_page(get_snapshot().by_instructor.get(instructor_id, ()), cursor, page_size)
+    queryset = Course.objects.filter(instructor_id=instructor_id).defer('long_description', 'learning_outcomes')
+    return keyset_paginate(queryset, ('id',), cursor=cursor, page_size=page_size)
+
+
+# A single course (record or model instance) or 404
+def get_course_or_404(course_id):
+    if snapshot_enabled():
+        course = get_snapshot().courses_by_id.get(course_id)
+        if course is None:
+            raise Http404("No course matches the given query.")
+        return course
+    return get_object_or_404(Course.objects.select_related('instructor'), id=course_id)
+
+
+# A single instructor (record or model instance) or 404
+def get_instructor_or_404(instructor_id):
+    if snapshot_enabled():
+        instructor = get_snapshot().instructors_by_id.get(instructor_id)
+        if instructor is None:
+            raise Http404("No instructor matches the given query.")
+        return instructor
+    return get_object_or_404(Instructor, id=instructor_id)
@@ -0,0 +1,102 @@
+# code_pilot_app/catalog_cache.py
+
+# versioned cache of the catalog lists every page shows (featured courses, instructors, nav)
+
+# Keys carry the 'catalog' version (see versions.py). Saving or deleting a Course or an
+# Instructor bumps that version (signals.py), so the next read misses and rebuilds the list
+# once; until then every page is served from the cache with zero queries, whatever the
+# size of the catalog.
+
+# With CATALOG_SNAPSHOT_ENABLED the lists are slices of the per-worker snapshot (catalog.py)
+# instead, which needs no cache round-trip at all.
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Sum
+
+from . import catalog
+from .db_router import read_from_primary
+from .models import Course, Instructor
+from .versions import get_local_version
+
+
+# Seconds a list stays cached even without catalog changes
+CATALOG_CACHE_TIMEOUT = 60 * 60
+# Number of courses / instructors shown in the "featured" sections
+FEATURED_COUNT = 4
+
+# Sentinel so a cached None (last_modified() of an empty catalog) is still a hit
+_MISSING = object()
+
+
+# Catalog version the rendered catalog data belongs to (key of the course card fragments,
+# see templates/partials/course_card.html): the snapshot's own version when it is enabled, so a
+# request still served from the previous snapshot never stores old markup under the new version
+def catalog_version():
+    if catalog.snapshot_enabled():
+        return catalog.get_snapshot().version
+    return get_local_version('catalog')
+
+
+# Value cached under the current catalog version (built with builder() on a miss)
+def _cached(name, builder):
+    key = f'catalog:{get_local_version("catalog")}:{name}'
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        # Built from the primary (see db_router.py): it is kept under this version for an hour
+        with read_from_primary():
+            value = builder()
+        cache.set(key, value, CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+# First courses of the catalog (home page, "related courses" on course pages)
+def featured_courses():
+    if catalog.snapshot_enabled():
+        return catalog.get_snapshot().courses[:FEATURED_COUNT]
+    return _cached('featured_courses', lambda: list(Course.objects.order_by('id')[:FEATURED_COUNT]))
+
+
+# First instructors (home page, about us)
+def featured_instructors():
+    if catalog.snapshot_enabled():
+        return catalog.get_snapshot().instructors[:FEATURED_COUNT]
+    return _cached('featured_instructors', lambda: list(Instructor.objects.order_by('id')[:FEATURED_COUNT]))
+
+
+# Every course (navigation menus)
+def all_courses():
+    if catalog.snapshot_enabled():
+        return catalog.get_snapshot().courses
+    return _cached('all_courses', lambda: list(Course.objects.order_by('id')))
+
+
+# Course count, students enrolled and average course rating of one instructor
+def instructor_stats(instructor_id):
+    if catalog.snapshot_enabled():
+        return catalog.get_snapshot().instructor_stats.get(instructor_id, catalog.NO_COURSES)
+
+    def build():
+        # One aggregate query over the instructor's rows of the (instructor, id) index
+        row = Course.objects.filter(instructor_id=instructor_id).aggregate(
+            course_count=Count('id'), students_enrolled=Sum('students_enrolled'), average_rating=Avg('rating'),
+        )
+        return catalog.InstructorStats(row['course_count'], row['students_enrolled'] or 0, row['average_rating'])
+
+    return _cached(f'instructor_stats:{instructor_id}', build)
+
+
+# Latest updated_at of any course or instructor (None for an empty catalog)
+# Every catalog page lists the whole catalog in its navigation, so this is their Last-Modified
+def last_modified():
+    if catalog.snapshot_enabled():
+        return catalog.get_snapshot().last_modified
+
+    def build():
+        # MAX() over the updated_at indexes: one index lookup per table, whatever the catalog size
+        latest = [
+            Course.objects.aggregate(latest=Max('updated_at'))['latest'],
+            Instructor.objects.aggregate(latest=Max('updated_at'))['latest'],
+        ]
+        return max((value for value in latest if value is not None), default=None)
+
+    return _cached('last_modified', build)
@@ -0,0 +1,136 @@
+# code_pilot_app/conditional.py
+
+# conditional GET: ETag / Last-Modified validators and 304 Not Modified answers
+
+# course_detail and instructor_detail are revisited a lot, load_cart_snippet and
+# search_suggestions are polled by the header scripts, and their output only changes when the
+# catalog, or the visitor's own cart / favorites / account, changes. @conditional_response
+# computes the validators before the view runs, from version stamps and per-user cached values
+# (no query for an anonymous visitor, only the user lookup for a logged-in one), and
+# answers 304 with an empty body when the browser already holds the current response.
+
+# ETag = hash of everything the response depends on:
+#   catalog → the 'catalog' version (moves on every Course / Instructor save or delete)
+#   user    → id, name and admin flags shown in the header, cart version (cart.py), favorite ids
+#   csrf    → the CSRF cookie, since the pages embed a token derived from it
+# Last-Modified = latest Course / Instructor updated_at, only sent when the response depends on
+# the catalog alone (anonymous visitors, search suggestions). Browsers send If-None-Match too,
+# and it wins over If-Modified-Since (RFC 9110), so deleting a course still changes the answer.
+
+# Pages with flash messages or a modal to reopen get no validators and always render.
+
+# Async views (async_views.py) are supported too: their validators are computed in a worker
+# thread (they may read the session, the catalog snapshot or the database) before condition()
+# decides between 304 and running the view.
+
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import catalog_cache
+from .cart import get_cart_version
+from .favorites import get_favorite_course_ids
+from .page_cache import has_pending_notices
+
+
+def _hash(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+# What the header of a page shows about the visitor
+def _visitor_state(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return (
+        user.id, user.username, user.is_superuser, request.session.get('admin_verified'),
+        get_cart_version(user.id), sorted(get_favorite_course_ids(user)),
+    )
+
+
+# ---- validators (same signature as the views they guard) ----
+
+# Catalog pages (course_detail, instructor_detail): catalog + visitor + CSRF cookie
+def catalog_page_etag(request, *args, **kwargs):
+    if has_pending_notices(request):
+        return None
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    return _hash('page', catalog_cache.catalog_version(), _visitor_state(request), csrf_cookie)
+
+
+def catalog_page_last_modified(request, *args, **kwargs):
+    if request.user.is_authenticated or has_pending_notices(request):
+        return None
+    return catalog_cache.last_modified()
+
+
+# Header cart dropdown: the user's cart version + catalog (course names and prices)
+def cart_snippet_etag(request, *args, **kwargs):
+    user = request.user
+    return _hash('cart', catalog_cache.catalog_version(), user.id, get_cart_version(user.id))
+
+
+# Search suggestions: catalog only (the query string is part of the URL)
+def catalog_etag(request, *args, **kwargs):
+    return _hash('catalog', catalog_cache.catalog_version())
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return catalog_cache.last_modified()
+
+
+# Cache-Control of responses carrying validators
+def _patch_cache_control(response, private):
+    if response.has_header('ETag') or response.has_header('Last-Modified'):
+        if private:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+
+
+# condition() for an async view: the validators are computed by the wrapper (in a thread) and
+# condition() only reads them back from the request
+def _async_conditional_response(view, etag_func, last_modified_func, private):
+    def validators(request, *args, **kwargs):
+        etag = etag_func(request, *args, **kwargs)
+        last_modified = last_modified_func(request, *args, **kwargs) if last_modified_func else None
+        return etag, last_modified
+
+    conditional_view = condition(
+        etag_func=lambda request, *args, **kwargs: request._conditional_validators[0],
+        last_modified_func=lambda request, *args, **kwargs: request._conditional_validators[1],
+    )(view)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request._conditional_validators = await sync_to_async(validators)(request, *args, **kwargs)
+        response = await conditional_view(request, *args, **kwargs)
+        _patch_cache_control(response, private)
+        return response
+
+    return wrapper
+
+
+# Adds ETag / Last-Modified to the view's GET responses and answers 304 when they still match.
+# Cache-Control: no-cache makes browsers revalidate on every use instead of guessing a lifetime
+# from Last-Modified; private keeps personal responses out of shared caches.
+def conditional_response(etag_func, last_modified_func=None, private=True):
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_conditional_response(view, etag_func, last_modified_func, private)
+
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            _patch_cache_control(response, private)
+            return response
+
+        return wrapper
+
+    return decorator
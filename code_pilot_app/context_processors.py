@@ -7,20 +7,56 @@
 
 # we define here over globally uses data
 
-from .models import Cart,Course, Instructor
+from django.utils.functional import SimpleLazyObject
+
+from . import catalog_cache
+from .cart import get_cart_items, get_cart_summary
+from .favorites import get_favorite_course_ids
+from .ui_state import take_modal
+
+# cart_total / cart_count come from the cached cart summary (one query at most, see cart.py)
+# cart_snippet_items (the header cart dropdown) is lazy and loads the courses in the same query
 
 def cart_total_processor(request):
     if request.user.is_authenticated:
-        cart_items = Cart.objects.filter(user=request.user)
-        total = sum(item.course.price for item in cart_items)
-        return {'cart_total': total}
-    return {'cart_total': 0}
+        summary = get_cart_summary(request.user)
+        return {
+            'cart_total': summary.total,
+            'cart_count': summary.count,
+            'cart_snippet_items': SimpleLazyObject(
+                lambda: list(get_cart_items(request.user)) if summary.count else []
+            ),
+        }
+    return {'cart_total': 0, 'cart_count': 0, 'cart_snippet_items': []}
 
 # define globally all the courses and instruvtors details
 
+# every value is lazy: nothing is fetched unless the template actually reads it (JSON endpoints
+# using render_to_string and pages that never show these lists cost nothing), and when it is
+# read it comes from the versioned catalog cache (catalog_cache.py) instead of the database
+
 def global_data(request):
     return {
-        'courses': Course.objects.all()[:4],
-        'instructors': Instructor.objects.all()[:4],
-        'allcourses': Course.objects.all(),
+        'courses': SimpleLazyObject(catalog_cache.featured_courses),
+        'instructors': SimpleLazyObject(catalog_cache.featured_instructors),
+        'allcourses': SimpleLazyObject(catalog_cache.all_courses),
+        # part of the course card fragment cache keys ({% cache ... course.id catalog_version %})
+        'catalog_version': SimpleLazyObject(catalog_cache.catalog_version),
     }
+
+# favorite course ids of the user, for the heart icon of every course card
+# {% if course.id in favorite_course_ids %} → O(1) per card; loaded lazily, once per request,
+# from the per-user cache (see favorites.py); favorite_count is the header wishlist badge
+
+def favorites_processor(request):
+    favorite_ids = SimpleLazyObject(lambda: get_favorite_course_ids(request.user))
+    return {
+        'favorite_course_ids': favorite_ids,
+        'favorite_count': SimpleLazyObject(lambda: len(favorite_ids)),
+    }
+
+# login / register modal the page reopens ('login', 'register' or None), from the signed cookie
+# of ui_state.py; showing it once removes the cookie from this response
+
+def open_modal_processor(request):
+    return {'open_modal': take_modal(request)}
@@ -0,0 +1,226 @@
+# code_pilot_app/db_router.py
+
+# read replica routing with read-your-writes stickiness
+
+# With a replica configured (settings.DATABASE_REPLICA['ALIAS'] present in DATABASES), reads
+# that can tolerate a little replication lag go to it and everything else stays on the
+# primary ('default'):
+#   writes                              → primary (and the rest of the request reads from it)
+#   reads of a POST / PUT / DELETE      → primary (forms re-read what they are about to change)
+#   visitor pinned (cookie, see below)  → primary
+#   Course / Instructor reads           → replica ('catalog')
+#   requests without a session cookie   → replica ('anonymous': nothing of theirs can be stale)
+#   other reads (session, user, cart)   → primary
+# Reads outside a request (management commands, shell) use the primary.
+
+# Read-your-writes: a request that writes a Cart, Checkout or Favorite row sets a cookie that
+# pins the visitor to the primary for STICKY_SECONDS, longer than the replica takes to catch
+# up, so the next page shows the change.
+
+# Caches keyed by the 'catalog' version (catalog snapshot, catalog_cache lists, autocomplete
+# index) are rebuilt inside read_from_primary(): a replica that has not caught up yet must not
+# be stored under the new version for an hour.
+
+# ReplicaRoutingMiddleware keeps the routing state of the request in a context variable (seen
+# by the ORM in sync views, async views and their sync_to_async threads) and on
+# request.db_routing; querycount.py adds the decisions to its query reports and, with HEADER
+# on, they are sent as an X-DB-Routing response header.
+
+# Locally the replica is a second SQLite file, copied from the primary by
+# "manage.py sync_replica" (see DATABASES in settings.py).
+
+import contextvars
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Defaults, overridden by settings.DATABASE_REPLICA
+REPLICA_DEFAULTS = {
+    # alias of the replica in DATABASES (routing is off while it is not configured)
+    'ALIAS': 'replica',
+    # models read from the replica by every visitor
+    'CATALOG_MODELS': ['code_pilot_app.course', 'code_pilot_app.instructor'],
+    # writes to these models pin the visitor to the primary ...
+    'STICKY_MODELS': ['code_pilot_app.cart', 'code_pilot_app.checkout', 'code_pilot_app.favorite'],
+    # ... for this many seconds, through this cookie
+    'STICKY_SECONDS': 10,
+    'STICKY_COOKIE': 'db_primary_until',
+    # send the routing decisions of each request as an X-DB-Routing header
+    'HEADER': False,
+}
+
+UNSAFE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+def replica_settings():
+    return {**REPLICA_DEFAULTS, **getattr(settings, 'DATABASE_REPLICA', {})}
+
+
+# Alias of the replica, None when it is not configured
+def replica_alias():
+    alias = replica_settings()['ALIAS']
+    return alias if alias in settings.DATABASES else None
+
+
+# Routing state of one request
+class RoutingState:
+    def __init__(self, unsafe=False, anonymous=False, pinned=False):
+        self.unsafe = unsafe
+        self.anonymous = anonymous
+        # pinned by the cookie of an earlier write
+        self.pinned = pinned
+        # this request wrote something / wrote a STICKY_MODELS row
+        self.wrote = False
+        self.sticky_write = False
+        # (alias, reason) → number of routing decisions
+        self.decisions = Counter()
+
+    def by_alias(self):
+        result = {}
+        for (alias, reason), count in sorted(self.decisions.items()):
+            result.setdefault(alias, {})[reason] = count
+        return result
+
+    # "replica: anonymous=1 catalog=2; default: session=2 write=1"
+    def __str__(self):
+        return '; '.join(
+            f"{alias}: " + ' '.join(f"{reason}={count}" for reason, count in reasons.items())
+            for alias, reasons in self.by_alias().items()
+        )
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+_force_primary = contextvars.ContextVar('db_routing_force_primary', default=False)
+
+
+# Reads inside the with block go to the primary (rebuilds of version-keyed caches)
+@contextmanager
+def read_from_primary():
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        state = _state.get()
+        if alias is None or state is None:
+            return None
+        options = replica_settings()
+        if _force_primary.get():
+            decision = (DEFAULT_DB_ALIAS, 'rebuild')
+        elif state.unsafe:
+            decision = (DEFAULT_DB_ALIAS, 'unsafe-method')
+        elif state.pinned or state.wrote:
+            decision = (DEFAULT_DB_ALIAS, 'pinned')
+        elif model._meta.label_lower in options['CATALOG_MODELS']:
+            decision = (alias, 'catalog')
+        elif state.anonymous:
+            decision = (alias, 'anonymous')
+        else:
+            decision = (DEFAULT_DB_ALIAS, 'session')
+        state.decisions[decision] += 1
+        return decision[0]
+
+    def db_for_write(self, model, **hints):
+        if replica_alias() is None:
+            return None
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            if model._meta.label_lower in replica_settings()['STICKY_MODELS']:
+                state.sticky_write = True
+            state.decisions[(DEFAULT_DB_ALIAS, 'write')] += 1
+        # Always explicit: otherwise Django would save an object read from the replica back to it
+        return DEFAULT_DB_ALIAS
+
+    # Replica rows hold the same data as the primary: relations between them are fine
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = replica_alias()
+        if alias is not None and {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+    # The replica gets its schema from the primary (sync_replica), never from migrate
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            return False
+        return None
+
+
+# Benchmarks and scripts running on a test database: point the replica at it too
+def use_primary_as_replica():
+    alias = replica_alias()
+    if alias is not None:
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(connections[DEFAULT_DB_ALIAS].settings_dict)
+
+
+# ---- middleware ----
+
+# Put it before SessionMiddleware so session and user reads are routed too
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if replica_alias() is None:
+            return self.get_response(request)
+        token = _state.set(self._start(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response)
+
+    async def __acall__(self, request):
+        if replica_alias() is None:
+            return await self.get_response(request)
+        token = _state.set(self._start(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response)
+
+    def _start(self, request):
+        options = replica_settings()
+        try:
+            pinned = float(request.COOKIES.get(options['STICKY_COOKIE'], 0)) > time.time()
+        except ValueError:
+            pinned = False
+        state = RoutingState(
+            unsafe=request.method in UNSAFE_METHODS,
+            anonymous=settings.SESSION_COOKIE_NAME not in request.COOKIES,
+            pinned=pinned,
+        )
+        request.db_routing = state
+        return state
+
+    def _finish(self, request, response):
+        options = replica_settings()
+        state = request.db_routing
+        if state.sticky_write:
+            seconds = options['STICKY_SECONDS']
+            response.set_cookie(
+                options['STICKY_COOKIE'], str(int(time.time() + seconds)), max_age=seconds,
+                httponly=True, samesite='Lax',
+            )
+        if options['HEADER']:
+            response['X-DB-Routing'] = str(state)
+        return response
@@ -0,0 +1,220 @@
+# code_pilot_app/faststart.py
+
+# MP4 "faststart": move the moov box (the index of the video) in front of the media data
+
+# A player cannot start an MP4 before it has read the moov box. Most encoders write it at the
+# end of the file, so the browser requests the start of the file, learns where moov is, requests
+# the end and only then the frames: an extra round trip for every promo video on a page.
+# make_faststart() rewrites such a file as
+#   [boxes before the media data] moov [media data and the rest, in their original order]
+# and moves every chunk offset of the stco / co64 tables by the size of moov (offsets past the old
+# moov by how much it grew), so they still point at the same bytes (stco tables that would
+# overflow 32 bits are widened to co64).
+
+# Memory stays bounded: only moov is read into memory (it is an index, kilobytes to a few MB);
+# the media data is copied in COPY_BLOCK_SIZE blocks. The new file is written next to the old
+# one and swapped in with os.replace(), so nobody ever reads a half-written video.
+
+# Runs for every uploaded Course.promo_video (signals.py) and, for files already on disk,
+# through "manage.py faststart_videos".
+
+import logging
+import os
+import shutil
+import struct
+import tempfile
+
+from django.core.files.storage import default_storage
+
+
+logger = logging.getLogger(__name__)
+
+
+# Bytes copied per read/write when moving the media data
+COPY_BLOCK_SIZE = 1024 * 1024
+# Boxes on the way from moov down to the chunk offset tables (their payload is more boxes)
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+# Extensions "manage.py faststart_videos" looks at
+MP4_EXTENSIONS = ('.mp4', '.m4v', '.mov')
+
+# make_faststart() results
+ALREADY_FASTSTART = 'already faststart'
+REWRITTEN = 'rewritten'
+
+
+# Not an MP4 we can rewrite (no moov / mdat, broken box sizes, compressed moov)
+class FaststartError(ValueError):
+    pass
+
+
+# A 32-bit stco offset would overflow → retry with co64 tables
+class _OffsetOverflow(Exception):
+    pass
+
+
+# (size, header length) of the box starting at data[position:] / a file position
+def _box_size(size, largesize_bytes, available):
+    if size == 1:
+        if len(largesize_bytes) < 8:
+            raise FaststartError("truncated 64-bit box size")
+        return struct.unpack('>Q', largesize_bytes[:8])[0], 16
+    if size == 0:
+        # "extends to the end of the file / parent"
+        return available, 8
+    return size, 8
+
+
+# Top-level boxes of the file: [(type, start, size)], without reading their payload
+def _top_level_boxes(f, file_size):
+    boxes = []
+    position = 0
+    while position < file_size:
+        f.seek(position)
+        header = f.read(16)
+        if len(header) < 8:
+            raise FaststartError(f"truncated box header at byte {position}")
+        size, box_type = struct.unpack('>I4s', header[:8])
+        size, header_length = _box_size(size, header[8:], file_size - position)
+        if size < header_length or position + size > file_size:
+            raise FaststartError(f"invalid size of box {box_type!r} at byte {position}")
+        boxes.append((box_type, position, size))
+        position += size
+    return boxes
+
+
+def _box(box_type, payload):
+    size = 8 + len(payload)
+    if size > 0xFFFFFFFF:
+        return struct.pack('>I4sQ', 1, box_type, size + 8) + payload
+    return struct.pack('>I4s', size, box_type) + payload
+
+
+# stco / co64 box with adjust() applied to every offset
+def _chunk_offsets(box_type, payload, adjust, widen):
+    if len(payload) < 8:
+        raise FaststartError(f"truncated {box_type.decode()} box")
+    version_flags, count = struct.unpack_from('>4sI', payload)
+    width = 8 if box_type == b'co64' else 4
+    if len(payload) < 8 + count * width:
+        raise FaststartError(f"truncated {box_type.decode()} table")
+    offsets = [adjust(offset) for offset in struct.unpack_from(f'>{count}{"Q" if width == 8 else "I"}', payload, 8)]
+    if width == 4 and (widen or max(offsets, default=0) > 0xFFFFFFFF):
+        if not widen:
+            raise _OffsetOverflow
+        box_type, width = b'co64', 8
+    table = struct.pack(f'>{count}{"Q" if width == 8 else "I"}', *offsets)
+    return _box(box_type, version_flags + struct.pack('>I', count) + table)
+
+
+# The boxes in data, re-encoded with their chunk offsets moved
+def _patch_boxes(data, adjust, widen):
+    out = bytearray()
+    position = 0
+    while position < len(data):
+        if len(data) - position < 8:
+            raise FaststartError("truncated box inside moov")
+        size, box_type = struct.unpack_from('>I4s', data, position)
+        size, header_length = _box_size(size, data[position + 8:position + 16], len(data) - position)
+        if size < header_length or position + size > len(data):
+            raise FaststartError(f"invalid size of box {box_type!r} inside moov")
+        payload = data[position + header_length:position + size]
+        if box_type == b'cmov':
+            raise FaststartError("compressed moov boxes are not supported")
+        if box_type in CONTAINER_BOXES:
+            out += _box(box_type, _patch_boxes(payload, adjust, widen))
+        elif box_type in (b'stco', b'co64'):
+            out += _chunk_offsets(box_type, payload, adjust, widen)
+        else:
+            out += data[position:position + size]
+        position += size
+    return bytes(out)
+
+
+def _copy_range(src, dst, start, length):
+    src.seek(start)
+    while length:
+        block = src.read(min(COPY_BLOCK_SIZE, length))
+        if not block:
+            raise FaststartError("unexpected end of file")
+        dst.write(block)
+        length -= len(block)
+
+
+# (moov box, first mdat box) of a file, as (type, start, size)
+def _moov_and_mdat(f, file_size):
+    boxes = _top_level_boxes(f, file_size)
+    moov = next((box for box in boxes if box[0] == b'moov'), None)
+    mdat = next((box for box in boxes if box[0] == b'mdat'), None)
+    if moov is None or mdat is None:
+        raise FaststartError("not an MP4 file (no moov or mdat box)")
+    return boxes, moov, mdat
+
+
+# True when moov comes after the media data
+def needs_faststart(path):
+    with open(path, 'rb') as f:
+        _, moov, mdat = _moov_and_mdat(f, os.path.getsize(path))
+    return moov[1] > mdat[1]
+
+
+# Rewrite path in place with moov in front of the media data → ALREADY_FASTSTART or REWRITTEN
+def make_faststart(path):
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as src:
+        boxes, moov, mdat = _moov_and_mdat(src, file_size)
+        moov_start = moov[1]
+        insert_at = mdat[1]
+        if moov_start < insert_at:
+            return ALREADY_FASTSTART
+        src.seek(moov_start)
+        moov_data = src.read(moov[2])
+
+        moov_end = moov_start + moov[2]
+
+        # Everything between insert_at and the old moov moves forward by the size of the new moov;
+        # boxes after the old moov only move by how much moov grew (stco widened to co64)
+        def patched(shift, widen):
+            def adjust(offset):
+                if insert_at <= offset < moov_start:
+                    return offset + shift
+                if offset >= moov_end:
+                    return offset + shift - moov[2]
+                return offset
+            return _patch_boxes(moov_data, adjust, widen)
+
+        try:
+            new_moov = patched(len(patched(0, False)), False)
+        except _OffsetOverflow:
+            new_moov = patched(len(patched(0, True)), True)
+
+        fd, temp_path = tempfile.mkstemp(prefix='.faststart-', suffix=os.path.splitext(path)[1], dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as dst:
+                _copy_range(src, dst, 0, insert_at)
+                dst.write(new_moov)
+                for box_type, start, size in boxes:
+                    if start >= insert_at and start != moov_start:
+                        _copy_range(src, dst, start, size)
+            shutil.copymode(path, temp_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    os.replace(temp_path, path)
+    return REWRITTEN
+
+
+# Faststart a file just saved to the default storage (local file systems only)
+def faststart_stored_file(name):
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        # Remote storage: nothing to rewrite in place
+        return None
+    try:
+        result = make_faststart(path)
+    except (OSError, FaststartError) as e:
+        logger.warning("faststart skipped for %s: %s", name, e)
+        return None
+    if result == REWRITTEN:
+        logger.info("faststart: moved moov to the front of %s", name)
+    return result
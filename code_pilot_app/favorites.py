@@ -0,0 +1,40 @@
+# code_pilot_app/favorites.py
+
+# favorite ids service: the set of course ids a user has marked with the heart icon
+
+# Course cards on the home, courses, course and instructor pages show a filled heart when the
+# course is a favorite. Each card used to need its own membership check; now the page loads
+# the user's favorite course ids once (one values_list query, cached per user) as a frozenset,
+# so every card is an O(1) "course.id in favorite_course_ids" lookup.
+# The ids live in the cache shared by all workers (versions.shared_cache()), and every saved or
+# deleted Favorite row, including the rows deleted along with a Course or a User, calls
+# invalidate_favorite_ids() after commit (signals.py), so no worker shows an old heart icon.
+
+from .models import Favorite
+from .versions import shared_cache
+
+
+# Seconds the ids stay cached (they are also dropped on every favorite change)
+FAVORITE_IDS_TIMEOUT = 60 * 60
+
+
+def _favorite_ids_key(user_id):
+    return f'favorites:ids:{user_id}'
+
+
+# frozenset of the course ids this user has favorited (from the per-user cache when possible)
+def get_favorite_course_ids(user):
+    if not user.is_authenticated:
+        return frozenset()
+    cache = shared_cache()
+    key = _favorite_ids_key(user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Favorite.objects.filter(user_id=user.id).values_list('course_id', flat=True))
+        cache.set(key, ids, FAVORITE_IDS_TIMEOUT)
+    return ids
+
+
+# Forget the cached ids after the favorites of this user changed (signals.py)
+def invalidate_favorite_ids(user_id):
+    shared_cache().delete(_favorite_ids_key(user_id))
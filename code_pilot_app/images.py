@@ -0,0 +1,151 @@
+# code_pilot_app/images.py
+
+# responsive derivatives of the instructor profile images
+
+# Profile images are uploaded at whatever size the admin has, but the pages show them as cards
+# a few hundred pixels wide. build_variants() makes resized copies at VARIANT_WIDTHS (never wider
+# than the original) in WebP and JPEG, and templatetags/responsive_images.py turns them into a
+# <picture> with srcset / sizes and explicit dimensions, so every browser downloads the smallest
+# file that is sharp enough and the layout does not jump while images load.
+
+# File names are keyed by the content hash of the original
+#   instructors/variants/<sha256[:16]>-<width>.webp / .jpg
+# so a file never changes once written (safe to cache forever) and identical uploads share their
+# variants. Instructor.profile_image_variants keeps what was built:
+#   {'hash': ..., 'width': ..., 'height': ..., 'widths': [...]}
+
+# Built after every upload (signals.py) and, for files already on disk, by
+# "manage.py build_image_variants". build_variants() only needs Pillow and file paths (no
+# database, no storage API), so the backfill can run it in a process pool.
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import Instructor
+from .versions import bump_version
+
+
+logger = logging.getLogger(__name__)
+
+
+# Widths (px) of the derivatives; 2x screens pick the next one up through srcset
+VARIANT_WIDTHS = (160, 320, 480, 640, 960)
+# Folder of the derivatives, relative to MEDIA_ROOT
+VARIANTS_DIR = 'instructors/variants'
+# (extension, Pillow format, save options)
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+# Length of the content hash in the file names
+HASH_LENGTH = 16
+# What build_variants() raises for a file it cannot turn into variants: unreadable / not an
+# image Pillow can open (OSError), or too many pixels to decode safely (DecompressionBombError
+# is not an OSError)
+IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+
+# Media name (relative to MEDIA_ROOT) of one derivative
+def variant_name(content_hash, width, extension):
+    return f'{VARIANTS_DIR}/{content_hash}-{width}.{extension}'
+
+
+# Derivative widths for an original this wide (the last one is the original width when smaller)
+def variant_widths(original_width):
+    widths = [width for width in VARIANT_WIDTHS if width < original_width]
+    if original_width <= VARIANT_WIDTHS[-1]:
+        widths.append(original_width)
+    return widths
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+# JPEG has no transparency: flatten onto white
+def _without_alpha(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+# Write data to path atomically (readers never see a partial file)
+def _write_file(path, data):
+    fd, temp_path = tempfile.mkstemp(prefix='.variant-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+# Make the derivatives of the image at source_path under media_root → variants dict
+def build_variants(source_path, media_root):
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    digest = content_hash(data)
+    os.makedirs(os.path.join(media_root, VARIANTS_DIR), exist_ok=True)
+
+    with Image.open(io.BytesIO(data)) as original:
+        # Apply the camera rotation so width / height are the displayed ones
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+        widths = variant_widths(width)
+        for variant_width in widths:
+            paths = {ext: os.path.join(media_root, variant_name(digest, variant_width, ext)) for ext, _, _ in VARIANT_FORMATS}
+            # Same content → same names: already built (by an identical upload or an earlier run)
+            if all(os.path.exists(path) for path in paths.values()):
+                continue
+            variant_height = max(1, round(height * variant_width / width))
+            resized = image if variant_width == width else image.resize((variant_width, variant_height), Image.LANCZOS)
+            for extension, image_format, options in VARIANT_FORMATS:
+                converted = _without_alpha(resized) if image_format == 'JPEG' else resized
+                buffer = io.BytesIO()
+                converted.save(buffer, image_format, **options)
+                _write_file(paths[extension], buffer.getvalue())
+
+    return {'hash': digest, 'width': width, 'height': height, 'widths': widths}
+
+
+# Store the variants on every instructor using this image file → number of rows changed
+def save_instructor_variants(profile_image_name, variants):
+    # update(): no save signals; the image name guards against a newer upload in between,
+    # and rows that already have these variants are left alone (re-runs change nothing)
+    return Instructor.objects.filter(profile_image=profile_image_name).exclude(
+        profile_image_variants=variants,
+    ).update(profile_image_variants=variants, updated_at=timezone.now())
+
+
+# Build the variants of a freshly uploaded profile image (local file systems only)
+def build_stored_image_variants(profile_image_name):
+    try:
+        source_path = default_storage.path(profile_image_name)
+        media_root = default_storage.path('')
+    except NotImplementedError:
+        # Remote storage: nothing to read or write locally
+        return None
+    try:
+        variants = build_variants(source_path, media_root)
+    except IMAGE_ERRORS as e:
+        # Unreadable, not an image Pillow can open, or a decompression bomb: the pages keep
+        # showing the original
+        logger.warning("image variants skipped for %s: %s", profile_image_name, e)
+        return None
+    if save_instructor_variants(profile_image_name, variants):
+        bump_version('catalog')
+    return variants
@@ -0,0 +1,100 @@
+# python manage.py benchmark_checkout --items 20 --rounds 50
+# Compares the old checkout loop (one Checkout.objects.create + lazy course fetch per item)
+# with orders.checkout_cart() (locked rows, one bulk_create, one DELETE).
+# Everything runs inside a transaction that is rolled back, so the database is left untouched,
+# with in-memory caches (isolated_caches) so the live site's caches are left untouched too.
+
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from code_pilot_app.models import Cart, Checkout, Course, Order
+from code_pilot_app.orders import checkout_cart, new_idempotency_key
+from code_pilot_app.querycount import isolated_caches
+
+
+# The checkout loop as it was before orders.checkout_cart()
+# (plus the Order header every Checkout row needs now)
+def legacy_checkout(user, payment_method):
+    cart_items = Cart.objects.filter(user=user)
+    order = Order.objects.create(user=user, payment_method=payment_method, total=0, item_count=0)
+    for item in cart_items:
+        Checkout.objects.create(
+            order=order,
+            user=user,
+            course=item.course,
+            price=item.course.price,
+            payment_method=payment_method
+        )
+    cart_items.delete()
+
+
+# Raised to roll the benchmark transaction back
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the bulk checkout against the old per-item checkout loop (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=20, help="Courses in the cart (default 20).")
+        parser.add_argument('--rounds', type=int, default=50, help="Checkouts per strategy (default 50).")
+
+    def handle(self, *args, **options):
+        items, rounds = options['items'], options['rounds']
+        if items < 1 or rounds < 1:
+            raise CommandError("--items and --rounds must be at least 1.")
+
+        try:
+            with isolated_caches('benchmark'), transaction.atomic():
+                results = self._run(items, rounds)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"Cart of {items} courses, {rounds} checkouts each:")
+        for name, (timings, queries) in results.items():
+            self.stdout.write(
+                f"  {name:8} queries/checkout={queries:3}  "
+                f"median={statistics.median(timings) * 1000:.2f} ms  "
+                f"mean={statistics.mean(timings) * 1000:.2f} ms  "
+                f"checkouts/s={1 / statistics.mean(timings):.0f}"
+            )
+        legacy, bulk = (statistics.mean(results[name][0]) for name in ('loop', 'bulk'))
+        self.stdout.write(f"  speed-up: {legacy / bulk:.1f}x")
+
+    def _run(self, items, rounds):
+        user = User.objects.create(username='__benchmark_checkout__')
+        courses = list(Course.objects.order_by('id')[:items])
+        # Not enough courses in this database → add throwaway ones (rolled back with the rest)
+        for number in range(len(courses), items):
+            courses.append(Course.objects.create(
+                course_name=f'Benchmark course {number}', short_description='', long_description='',
+                category='full_stack', learning_outcomes='', price=Decimal('999.00'), duration='4 weeks',
+                students_enrolled=0, language='English', certification='', rating=0,
+                technologies_covered='', old_price=Decimal('1999.00'), discount_percent=50,
+            ))
+
+        strategies = {
+            'loop': lambda: legacy_checkout(user, 'upi'),
+            'bulk': lambda: checkout_cart(user, 'upi', new_idempotency_key()),
+        }
+        results = {}
+        for name, run in strategies.items():
+            timings = []
+            queries = 0
+            for _ in range(rounds):
+                Cart.objects.bulk_create([Cart(user=user, course=course) for course in courses])
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as captured:
+                    run()
+                timings.append(time.perf_counter() - started)
+                queries = len(captured)
+            results[name] = (timings, queries)
+        return results
@@ -0,0 +1,376 @@
+# python manage.py benchmark_concurrency --clients 1,10,50,100 --db-latency 2
+# How many concurrent AJAX clients one process sustains, WSGI (sync views) against ASGI (the
+# async views of code_pilot_app/async_views.py), on a freshly created and seeded test database
+# (the real database is never touched).
+
+# Every client is a different logged-in user sending the AJAX requests of a visit back to back:
+#   add_to_cart, load_cart_snippet, remove_from_cart, toggle_favorite, remove_from_favorites,
+#   search_suggestions
+# WSGI: the requests are handed to Django's WSGIHandler by --wsgi-threads worker slots (1 = one
+# gunicorn sync worker; more = a gthread worker), the other clients wait for a free slot.
+# ASGI: every client is a coroutine calling Django's ASGIHandler on one event loop, as under
+# uvicorn. Latency is measured from the moment a client sends its request, so it includes the
+# time spent queued behind other clients.
+
+# --db-latency adds a sleep to every SQL statement, to stand in for the network round trip of a
+# database server (the test database is a local SQLite file, answering in microseconds).
+# Reported per level: requests/s, p50 / p95 / p99 latency and errors; then, per server, the
+# largest number of clients whose p95 stays within --p95-target.
+
+import asyncio
+import importlib
+import io
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import clear_url_caches, reverse
+from django.utils.crypto import get_random_string
+
+from code_pilot_app.db_router import use_primary_as_replica
+from code_pilot_app.models import Cart, Course, Favorite
+from code_pilot_app.querycount import isolated_caches
+from code_pilot_app.seeding import scaled_counts, seed_dataset
+
+
+# One cycle of AJAX requests per client, in this order
+CYCLE = ['add_to_cart', 'load_cart_snippet', 'remove_from_cart', 'toggle_favorite', 'remove_from_favorites',
+         'search_suggestions']
+# Search box input of the search_suggestions requests (prefix matches and a miss)
+SUGGESTION_QUERIES = ['py', 'java', 'data', 'web', 'react', 'zzqx']
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# One benchmark client: a logged-in user, its cookies and the requests it sends
+class BenchmarkClient:
+    def __init__(self, user, session_key):
+        self.user = user
+        self.csrf_token = get_random_string(32)
+        self.cookie = (f'{settings.SESSION_COOKIE_NAME}={session_key}; '
+                       f'{settings.CSRF_COOKIE_NAME}={self.csrf_token}')
+        self.requests = []
+
+    # Put the user's cart / favorites in a known state and build the requests of this level
+    def prepare(self, requests, add_courses, pool_courses):
+        Cart.objects.filter(user=self.user).delete()
+        Favorite.objects.filter(user=self.user).delete()
+        cycles = -(-requests // len(CYCLE))
+        # Rows for remove_from_cart (add_to_cart uses other courses, so their ids never clash)
+        pool = Cart.objects.bulk_create(
+            Cart(user=self.user, course_id=pool_courses[number % len(pool_courses)]) for number in range(cycles)
+        )
+        self.requests = []
+        for number in range(cycles):
+            course_id = add_courses[number % len(add_courses)]
+            urls = {
+                'add_to_cart': ('GET', reverse('add_to_cart', args=[course_id]), ''),
+                'load_cart_snippet': ('GET', reverse('load_cart_snippet'), ''),
+                'remove_from_cart': ('POST', reverse('remove_from_cart', args=[pool[number].id]), ''),
+                'toggle_favorite': ('GET', reverse('toggle_favorite', args=[course_id]), ''),
+                'remove_from_favorites': ('GET', reverse('remove_from_favorites', args=[course_id]), ''),
+                'search_suggestions': ('GET', reverse('search_suggestions'),
+                                       f'q={SUGGESTION_QUERIES[number % len(SUGGESTION_QUERIES)]}'),
+            }
+            self.requests += [urls[name] for name in CYCLE]
+        self.requests = self.requests[:requests]
+
+    def headers(self):
+        return {
+            'Cookie': self.cookie,
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': self.csrf_token,
+        }
+
+
+# ---- WSGI ----
+
+def _wsgi_environ(client, method, path, query):
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': '0',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(b''),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in client.headers().items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+# → (latencies, error count, seconds)
+def run_wsgi(clients, worker_threads):
+    handler = WSGIHandler()
+    slots = threading.Semaphore(worker_threads)
+    latencies = []
+    errors = []
+
+    def client_loop(client):
+        for method, path, query in client.requests:
+            started = time.perf_counter()
+            statuses = []
+            with slots:
+                body = handler(_wsgi_environ(client, method, path, query),
+                               lambda status, headers, exc_info=None: statuses.append(status))
+                b''.join(body)
+                body.close()
+            latencies.append(time.perf_counter() - started)
+            if int(statuses[0].split()[0]) != 200:
+                errors.append(statuses[0])
+
+    threads = [threading.Thread(target=client_loop, args=(client,)) for client in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors), time.perf_counter() - started
+
+
+# ---- ASGI ----
+
+async def _asgi_request(application, client, method, path, query):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode()) for name, value in client.headers().items()
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Nobody disconnects: wait until Django cancels this once the response is sent
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+# → (latencies, error count, seconds)
+def run_asgi(clients):
+    application = ASGIHandler()
+    latencies = []
+    errors = []
+
+    async def client_loop(client):
+        for method, path, query in client.requests:
+            started = time.perf_counter()
+            status = await _asgi_request(application, client, method, path, query)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for client in clients))
+        return time.perf_counter() - started
+
+    seconds = asyncio.run(main())
+    return latencies, len(errors), seconds
+
+
+# Route the AJAX URLs to the sync (views.py) or async (async_views.py) views, as
+# settings.ASYNC_AJAX_VIEWS does for a whole process
+def _use_async_views(enabled):
+    from code_pilot_app import urls
+    settings.ASYNC_AJAX_VIEWS = enabled
+    importlib.reload(urls)
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = "Concurrent AJAX clients one process sustains: WSGI with sync views against ASGI with async views."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', default='1,10,50,100',
+                            help="Comma-separated numbers of concurrent clients (default 1,10,50,100).")
+        parser.add_argument('--requests', type=int, default=30, help="Requests per client per level (default 30).")
+        parser.add_argument('--wsgi-threads', type=int, default=1,
+                            help="Requests the WSGI process handles at once (default 1, a sync worker).")
+        parser.add_argument('--db-latency', type=float, default=0.0,
+                            help="Milliseconds added to every SQL statement (default 0).")
+        parser.add_argument('--p95-target', type=float, default=100.0,
+                            help="p95 latency (ms) a level must stay within to count as sustained (default 100).")
+        parser.add_argument('--scale', type=float, default=0.1,
+                            help="Dataset scale, see seed_catalog (default 0.1).")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed of the dataset (default 42).")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        try:
+            levels = sorted({int(value) for value in options['clients'].split(',')})
+        except ValueError:
+            raise CommandError("--clients must be comma-separated integers.")
+        if not levels or levels[0] < 1 or options['requests'] < 1 or options['wsgi_threads'] < 1:
+            raise CommandError("--clients, --requests and --wsgi-threads must be at least 1.")
+
+        # Throwaway database in a file (an in-memory SQLite database does not take concurrent
+        # connections from many threads well); created, migrated and seeded here, destroyed at the end
+        # Its caches are in-memory too (isolated_caches), the live site's are never written
+        caches_override = isolated_caches('benchmark')
+        caches_override.enable()
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict['NAME']
+        temp_dir = None
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+            temp_dir = tempfile.mkdtemp(prefix='benchmark-concurrency-')
+            connection.settings_dict['TEST']['NAME'] = os.path.join(temp_dir, 'db.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        use_primary_as_replica()
+        latency = options['db_latency'] / 1000
+
+        def sleep_then_execute(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        # Once per connection object (WSGI threads reconnect the same object on every request)
+        def slow_database(sender, connection, **kwargs):
+            if sleep_then_execute not in connection.execute_wrappers:
+                connection.execute_wrappers.append(sleep_then_execute)
+
+        # Errors are counted in the report instead of logged one by one
+        request_logger = logging.getLogger('django.request')
+        log_level = request_logger.level
+        try:
+            cache.clear()
+            counts = seed_dataset(scaled_counts(options['scale']), seed=options['seed'])
+            self.stdout.write(f"Seeded {counts}")
+            clients = self._clients(max(levels))
+            course_ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+            if len(course_ids) < 2:
+                raise CommandError("The dataset needs at least 2 courses.")
+            request_logger.setLevel(logging.CRITICAL)
+            if latency:
+                connection_created.connect(slow_database)
+            with override_settings(QUERY_BUDGET={'MODE': 'off'}):
+                results = self._run(levels, clients, course_ids, options)
+        finally:
+            connection_created.disconnect(slow_database)
+            request_logger.setLevel(log_level)
+            _use_async_views(False)
+            connection.close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if temp_dir:
+                connection.settings_dict['TEST']['NAME'] = None
+                os.rmdir(temp_dir)
+            teardown_test_environment()
+            caches_override.disable()
+
+        self._print(results, options['p95_target'])
+        if options['output']:
+            report = {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'requests_per_client': options['requests'],
+                'wsgi_threads': options['wsgi_threads'],
+                'db_latency_ms': options['db_latency'],
+                'scale': options['scale'],
+                'results': results,
+            }
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    # Logged-in benchmark clients (seeded users)
+    def _clients(self, count):
+        users = list(User.objects.filter(username__startswith='seed_user_').order_by('id')[:count])
+        for number in range(len(users), count):
+            users.append(User.objects.create_user(f'__benchmark_concurrency_{number}__'))
+        clients = []
+        for user in users:
+            login = Client()
+            login.force_login(user)
+            clients.append(BenchmarkClient(user, login.cookies[settings.SESSION_COOKIE_NAME].value))
+        return clients
+
+    def _run(self, levels, clients, course_ids, options):
+        add_courses, pool_courses = course_ids[0::2], course_ids[1::2]
+        results = {'wsgi': {}, 'asgi': {}}
+        for server in ('wsgi', 'asgi'):
+            _use_async_views(server == 'asgi')
+            for level in levels:
+                active = clients[:level]
+                for client in active:
+                    client.prepare(options['requests'], add_courses, pool_courses)
+                # Connections are opened by the threads serving the requests
+                connection.close()
+                if server == 'wsgi':
+                    latencies, errors, seconds = run_wsgi(active, options['wsgi_threads'])
+                else:
+                    latencies, errors, seconds = run_asgi(active)
+                latencies.sort()
+                results[server][level] = {
+                    'requests_per_s': round(len(latencies) / seconds, 1),
+                    'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2),
+                    'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+                    'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+                    'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+                    'errors': errors,
+                }
+                r = results[server][level]
+                self.stdout.write(
+                    f"  {server} {level:>4} clients: {r['requests_per_s']:>8.1f} req/s  "
+                    f"p95 {r['p95_ms']:.1f} ms  errors {errors}"
+                )
+        return results
+
+    def _print(self, results, target):
+        self.stdout.write(
+            f"{'server':6} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+        )
+        for server, levels in results.items():
+            for level, r in levels.items():
+                self.stdout.write(
+                    f"{server:6} {level:>7} {r['requests_per_s']:>9.1f} {r['p50_ms']:>8.2f} "
+                    f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>6}"
+                )
+        for server, levels in results.items():
+            sustained = [level for level, r in levels.items() if r['p95_ms'] <= target and not r['errors']]
+            best = max(sustained, default=0)
+            self.stdout.write(self.style.SUCCESS(
+                f"{server.upper()}: {best} concurrent clients sustained (p95 within {target:.0f} ms, no errors)"
+            ))
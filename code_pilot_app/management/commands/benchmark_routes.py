@@ -0,0 +1,297 @@
+# python manage.py benchmark_routes --iterations 50 --output bench.json
+# python manage.py benchmark_routes --compare bench.json --threshold 0.25
+# Drives every named route of code_pilot_app/urls.py through the Django test client, anonymous
+# and logged in, on a freshly created and seeded test database (the real database is never
+# touched), and reports per route:
+#   p50 / p95 / p99 latency, SQL queries per request (and how many went to the read replica,
+#   see db_router.py), session table writes per request, bytes rendered, peak Python memory
+# --output saves the results as JSON; --compare loads an earlier run and fails (exit code 1)
+# when a route got slower than --threshold, runs more queries or writes the session more often
+# than before.
+
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from code_pilot_app.db_router import replica_alias, use_primary_as_replica
+from code_pilot_app.models import Cart, Course, Favorite, Instructor
+from code_pilot_app.orders import new_idempotency_key
+from code_pilot_app.querycount import QueryRecorder, count_session_writes, isolated_caches
+from code_pilot_app.seeding import scaled_counts, seed_dataset
+
+
+# One benchmarked request
+#   name     → URL name from urls.py
+#   auth     → send it as the logged-in benchmark user
+#   method   → 'get' or 'post'
+#   ajax     → add the X-Requested-With header the AJAX views expect
+#   args     → fn(state) returning the URL args (ids of seeded rows)
+#   query    → query string
+#   data     → fn(state) returning the POST data
+#   setup    → fn(state) run before every request, not timed (puts the data back in place)
+class Route:
+    def __init__(self, name, auth=False, method='get', ajax=False, args=None, query='', data=None,
+                 setup=None, label=None):
+        self.name = name
+        self.auth = auth
+        self.method = method
+        self.ajax = ajax
+        self.args = args
+        self.query = query
+        self.data = data
+        self.setup = setup
+        self.label = label or name
+
+    @property
+    def key(self):
+        return f"{'user' if self.auth else 'anon'}:{self.label}"
+
+
+# ---- per-request setup of the state-changing routes ----
+
+def _empty_cart(state):
+    Cart.objects.filter(user=state['user'], course=state['course']).delete()
+
+
+def _one_cart_item(state):
+    state['cart_item'] = Cart.objects.get_or_create(user=state['user'], course=state['course'])[0]
+
+
+def _fill_cart(state):
+    for course in state['cart_courses']:
+        Cart.objects.get_or_create(user=state['user'], course=course)
+
+
+def _one_favorite(state):
+    Favorite.objects.get_or_create(user=state['user'], course=state['course'])
+
+
+PUBLIC_PAGES = [
+    Route('index'),
+    Route('courses'),
+    Route('courses', query='category=full_stack', label='courses?category'),
+    Route('course_detail', args=lambda s: [s['course'].id]),
+    Route('instructor_detail', args=lambda s: [s['instructor'].id]),
+    Route('instructors'),
+    Route('about_us'),
+    Route('contact_us'),
+    Route('search_suggestions', query='q=py'),
+    Route('search_course_redirect', query='q=python'),
+]
+
+ROUTES = PUBLIC_PAGES + [Route(r.name, auth=True, args=r.args, query=r.query, label=r.label) for r in PUBLIC_PAGES] + [
+    Route('view_cart', auth=True),
+    Route('load_cart_snippet', auth=True, ajax=True),
+    Route('add_to_cart', auth=True, ajax=True, args=lambda s: [s['course'].id], setup=_empty_cart),
+    Route('remove_from_cart', auth=True, ajax=True, method='post',
+          args=lambda s: [s['cart_item'].id], setup=_one_cart_item),
+    Route('view_favorites', auth=True),
+    Route('toggle_favorite', auth=True, ajax=True, args=lambda s: [s['course'].id]),
+    Route('remove_from_favorites', auth=True, ajax=True,
+          args=lambda s: [s['course'].id], setup=_one_favorite),
+    Route('checkout', auth=True, setup=_fill_cart, label='checkout (page)'),
+    Route('checkout', auth=True, method='post', setup=_fill_cart, label='checkout (submit)',
+          data=lambda s: {'payment_method': 'upi', 'idempotency_key': new_idempotency_key()}),
+    Route('checkout_history', auth=True),
+    # failed form posts of anonymous visitors (flash message + modal to reopen); last, because
+    # they leave those cookies on the anonymous client
+    Route('login', method='post', label='login (failed)',
+          data=lambda s: {'identifier': '__nobody__', 'password': 'wrong'}),
+    Route('register', method='post', label='register (invalid)',
+          data=lambda s: {'username': '__nobody__', 'email': 'nobody@example.com',
+                          'password': 'a', 'confirm_password': 'b'}),
+]
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = "Benchmark every route on a seeded test database (latency percentiles, queries, bytes, memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help="Timed requests per route (default 30).")
+        parser.add_argument('--warmup', type=int, default=3, help="Untimed requests per route first (default 3).")
+        parser.add_argument('--routes', default='', help="Comma-separated labels to run (default: all).")
+        parser.add_argument('--scale', type=float, default=0.5,
+                            help="Dataset scale, see seed_catalog (default 0.5 = 500 courses, 5000 users).")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed of the dataset (default 42).")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="JSON file of an earlier run to compare with.")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Allowed p95 slowdown in --compare, as a fraction (default 0.25).")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        routes = ROUTES
+        if options['routes']:
+            wanted = set(options['routes'].split(','))
+            routes = [route for route in ROUTES if route.label in wanted or route.name in wanted]
+            if not routes:
+                raise CommandError(f"No route matches {options['routes']!r}.")
+
+        # Throwaway database: created, migrated and seeded here, destroyed at the end
+        # Its caches are in-memory too (isolated_caches), the live site's are never written
+        caches_override = isolated_caches('benchmark')
+        caches_override.enable()
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        use_primary_as_replica()
+        try:
+            cache.clear()
+            counts = seed_dataset(scaled_counts(options['scale']), seed=options['seed'])
+            self.stdout.write(f"Seeded {counts}")
+            results = self._run(routes, options['iterations'], options['warmup'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            caches_override.disable()
+
+        self._print(results)
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'iterations': options['iterations'],
+            'scale': options['scale'],
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['compare']:
+            self._compare(results, options['compare'], options['threshold'])
+
+    def _run(self, routes, iterations, warmup):
+        # A seeded user, so the cart, favorites and purchase history pages have realistic content
+        user = (
+            User.objects.filter(username__startswith='seed_user_', orders__isnull=False).order_by('id').first()
+            or User.objects.create_user('__benchmark_routes__')
+        )
+        state = {
+            'user': user,
+            'course': Course.objects.order_by('id').first(),
+            'instructor': Instructor.objects.order_by('id').first(),
+            'cart_courses': list(Course.objects.order_by('-id')[:3]),
+        }
+        anonymous = Client()
+        logged_in = Client()
+        logged_in.force_login(user)
+
+        results = {}
+        for route in routes:
+            client = logged_in if route.auth else anonymous
+            timings = []
+            queries = []
+            replica_queries = []
+            session_writes = []
+            size = 0
+            status = None
+            for number in range(warmup + iterations):
+                elapsed, query_count, replica_count, writes, size, status = self._request(client, route, state)
+                if number >= warmup:
+                    timings.append(elapsed)
+                    queries.append(query_count)
+                    replica_queries.append(replica_count)
+                    session_writes.append(writes)
+
+            # Peak Python memory of one more request (tracemalloc slows requests down,
+            # so it is measured separately from the timings)
+            tracemalloc.start()
+            try:
+                self._request(client, route, state)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            timings.sort()
+            results[route.key] = {
+                'status': status,
+                'p50_ms': round(_percentile(timings, 0.50) * 1000, 3),
+                'p95_ms': round(_percentile(timings, 0.95) * 1000, 3),
+                'p99_ms': round(_percentile(timings, 0.99) * 1000, 3),
+                'mean_ms': round(statistics.mean(timings) * 1000, 3),
+                'queries': max(queries),
+                'replica_queries': max(replica_queries),
+                'session_writes': round(statistics.mean(session_writes), 2),
+                'bytes': size,
+                'peak_memory_kb': round(peak / 1024, 1),
+            }
+        return results
+
+    # One request → (seconds, queries, of which on the replica, session table writes, response bytes,
+    # status code)
+    def _request(self, client, route, state):
+        if route.setup:
+            route.setup(state)
+        url = reverse(route.name, args=route.args(state) if route.args else None)
+        if route.query:
+            url = f'{url}?{route.query}'
+        headers = {'X-Requested-With': 'XMLHttpRequest'} if route.ajax else {}
+        data = route.data(state) if route.data else None
+        send = client.post if route.method == 'post' else client.get
+
+        # Every database alias (the replica too)
+        with QueryRecorder() as recorder:
+            started = time.perf_counter()
+            response = send(url, data, headers=headers)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            elapsed = time.perf_counter() - started
+        replica_count = sum(1 for alias, _, _ in recorder.queries if alias == replica_alias())
+        session_writes = count_session_writes(recorder.queries)
+        return elapsed, len(recorder.queries), replica_count, session_writes, len(content), response.status_code
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'route':34} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>7} {'replica':>7} {'session w':>9} {'bytes':>8} {'peak KiB':>9}"
+        )
+        for key, r in results.items():
+            self.stdout.write(
+                f"{key:34} {r['status']:>6} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                f"{r['queries']:>7} {r['replica_queries']:>7} {r['session_writes']:>9.2f} {r['bytes']:>8} "
+                f"{r['peak_memory_kb']:>9.1f}"
+            )
+        # Browsing = the GET routes (page views, cart snippet, suggestions, cart / favorite clicks)
+        browsing_keys = {route.key for route in ROUTES if route.method == 'get'}
+        browsing = [r['session_writes'] for key, r in results.items() if key in browsing_keys]
+        if browsing:
+            self.stdout.write(f"Session writes per browsing request: {statistics.mean(browsing):.2f}")
+
+    def _compare(self, results, path, threshold):
+        try:
+            with open(path) as f:
+                baseline = json.load(f)['routes']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read baseline {path}: {e}")
+
+        failures = []
+        for key, r in results.items():
+            before = baseline.get(key)
+            if before is None:
+                continue
+            if r['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                failures.append(f"{key}: p95 {before['p95_ms']:.2f} → {r['p95_ms']:.2f} ms")
+            if r['queries'] > before['queries']:
+                failures.append(f"{key}: queries {before['queries']} → {r['queries']}")
+            # Runs saved before session writes were measured have no such column
+            if r['session_writes'] > before.get('session_writes', r['session_writes']):
+                failures.append(f"{key}: session writes {before['session_writes']} → {r['session_writes']}")
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(f"  REGRESSION {failure}")
+            raise CommandError(f"{len(failures)} regression(s) against {path}.")
+        self.stdout.write(self.style.SUCCESS(f"No regression against {path} (threshold {threshold:.0%})."))
@@ -0,0 +1,182 @@
+# python manage.py benchmark_sqlite_writes --processes 8 --readers 2 --seconds 5
+# Write contention on SQLite, the way several gunicorn workers produce it: --processes worker
+# processes run the add_to_cart and checkout transactions of the site (Cart get_or_create,
+# orders.checkout_cart) as fast as they can while --readers processes read carts, first with
+# Django's SQLite defaults, then with the tuned OPTIONS of settings.DATABASES['default']
+# (WAL, synchronous=NORMAL, mmap, cache_size, busy_timeout, BEGIN IMMEDIATE).
+# Reported per mode: visits/s (2 add_to_cart + 1 checkout each), reads/s, "database is locked"
+# errors and their rate, p50 / p95 visit latency. Runs on a throwaway copy of the schema with a
+# small seeded dataset (the real database is never touched).
+
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from code_pilot_app.models import Cart, Course
+from code_pilot_app.orders import checkout_cart
+from code_pilot_app.querycount import isolated_caches
+from code_pilot_app.seeding import scaled_counts, seed_dataset
+
+
+# Courses added to the cart before each checkout
+COURSES_PER_CHECKOUT = 2
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _is_lock_error(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+# One benchmark process (forked: Django is already set up) → (role, done, lock errors, latencies)
+def _worker(role, seed, seconds, user_ids, course_ids):
+    rng = random.Random(seed)
+    done = locked = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        user = User(id=rng.choice(user_ids))
+        started = time.perf_counter()
+        try:
+            if role == 'write':
+                # A visit: add_to_cart a few times, then check out
+                for _ in range(COURSES_PER_CHECKOUT):
+                    Cart.objects.get_or_create(user=user, course_id=rng.choice(course_ids))
+                checkout_cart(user, 'upi')
+            else:
+                # The cart summary query of every page header (cart.py)
+                list(Cart.objects.filter(user=user).values_list('course_id', 'course__price'))
+        except OperationalError as e:
+            if not _is_lock_error(e):
+                raise
+            locked += 1
+            continue
+        finally:
+            # Never leave a failed transaction behind for the next iteration
+            if connection.in_atomic_block:
+                connection.rollback()
+        done += 1
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    return role, done, locked, latencies
+
+
+class Command(BaseCommand):
+    help = "SQLite write contention from several processes: Django's defaults against the tuned settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help="Writer processes (default 8).")
+        parser.add_argument('--readers', type=int, default=2, help="Reader processes (default 2).")
+        parser.add_argument('--seconds', type=float, default=5.0, help="Duration of each mode (default 5).")
+        parser.add_argument('--scale', type=float, default=0.02,
+                            help="Dataset scale, see seed_catalog (default 0.02).")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark is for SQLite databases.")
+        if options['processes'] < 1 or options['readers'] < 0 or options['seconds'] <= 0:
+            raise CommandError("--processes must be at least 1, --readers at least 0, --seconds positive.")
+
+        tuned = dict(connection.settings_dict.get('OPTIONS', {}))
+        modes = [
+            # Django's defaults: rollback journal, synchronous=FULL, deferred BEGIN, 5 s timeout
+            ('default', {}, 'DELETE'),
+            ('tuned', tuned, None),
+        ]
+
+        # Throwaway database file (processes cannot share an in-memory one)
+        # Caches: in-memory ones per process (isolated_caches, inherited by the forked workers),
+        # the live site's are never written
+        caches_override = isolated_caches('benchmark')
+        caches_override.enable()
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        old_test_name = connection.settings_dict['TEST']['NAME']
+        temp_dir = tempfile.mkdtemp(prefix='benchmark-sqlite-writes-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(temp_dir, 'db.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            cache.clear()
+            counts = seed_dataset(scaled_counts(options['scale']))
+            self.stdout.write(f"Seeded {counts}")
+            user_ids = list(User.objects.values_list('id', flat=True))
+            course_ids = list(Course.objects.values_list('id', flat=True))
+            results = {}
+            for name, database_options, journal_mode in modes:
+                results[name] = self._run(name, database_options, journal_mode, user_ids, course_ids, options)
+        finally:
+            connection.close()
+            connection.settings_dict['OPTIONS'] = tuned
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict['TEST']['NAME'] = old_test_name
+            for file_name in os.listdir(temp_dir):
+                os.unlink(os.path.join(temp_dir, file_name))
+            os.rmdir(temp_dir)
+            teardown_test_environment()
+            caches_override.disable()
+
+        self.stdout.write(
+            f"{'mode':8} {'visits/s':>9} {'reads/s':>9} {'locked':>7} {'lock rate':>9} "
+            f"{'write p50':>10} {'write p95':>10}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:8} {r['visits_per_s']:>9.1f} {r['reads_per_s']:>9.1f} {r['lock_errors']:>7} "
+                f"{r['lock_error_rate']:>9.1%} {r['write_p50_ms']:>8.1f}ms {r['write_p95_ms']:>8.1f}ms"
+            )
+
+    def _run(self, name, database_options, journal_mode, user_ids, course_ids, options):
+        connection.close()
+        connection.settings_dict['OPTIONS'] = database_options
+        # The journal mode is stored in the file: put it back to the rollback journal for the defaults
+        if journal_mode:
+            with sqlite3.connect(connection.settings_dict['NAME']) as raw:
+                raw.execute(f'PRAGMA journal_mode={journal_mode}')
+            raw.close()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            current_journal = cursor.fetchone()[0]
+        # The children open their own connections
+        connection.close()
+
+        seconds = options['seconds']
+        jobs = [('write', number, seconds, user_ids, course_ids) for number in range(options['processes'])]
+        jobs += [('read', 1000 + number, seconds, user_ids, course_ids) for number in range(options['readers'])]
+        with multiprocessing.get_context('fork').Pool(len(jobs)) as pool:
+            outcomes = pool.starmap(_worker, jobs)
+
+        writes = sum(done for role, done, _, _ in outcomes if role == 'write')
+        reads = sum(done for role, done, _, _ in outcomes if role == 'read')
+        locked = sum(errors for _, _, errors, _ in outcomes)
+        write_latencies = sorted(l for role, _, _, latencies in outcomes if role == 'write' for l in latencies)
+        attempts = writes + reads + locked
+        result = {
+            'journal_mode': current_journal,
+            'visits_per_s': writes / seconds,
+            'reads_per_s': reads / seconds,
+            'lock_errors': locked,
+            'lock_error_rate': locked / attempts if attempts else 0.0,
+            'write_p50_ms': _percentile(write_latencies, 0.50) * 1000,
+            'write_p95_ms': _percentile(write_latencies, 0.95) * 1000,
+            'write_mean_ms': statistics.mean(write_latencies) * 1000 if write_latencies else 0.0,
+        }
+        self.stdout.write(
+            f"  {name} (journal_mode={current_journal}): {writes} visits, {reads} reads, {locked} lock errors"
+        )
+        return result
@@ -0,0 +1,79 @@
+# python manage.py build_image_variants --workers 4
+# Builds the responsive WebP / JPEG derivatives (code_pilot_app/images.py) of every profile image
+# already under MEDIA_ROOT/instructors/, in a process pool, and stores them on the instructors
+# using each file. Identical files are resized once (their variants share the content hash).
+# Safe to re-run: derivatives that exist are not rebuilt. New uploads are handled on save.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from code_pilot_app.images import IMAGE_ERRORS, VARIANTS_DIR, build_variants, content_hash, save_instructor_variants
+from code_pilot_app.models import Instructor
+from code_pilot_app.versions import bump_version
+
+
+# Files considered images
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
+class Command(BaseCommand):
+    help = "Build the resized WebP / JPEG variants of the existing instructor profile images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (default: one per CPU).")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+        started = time.perf_counter()
+        media_root = str(settings.MEDIA_ROOT)
+        upload_to = Instructor._meta.get_field('profile_image').upload_to
+        folder = os.path.join(media_root, upload_to)
+        if not os.path.isdir(folder):
+            raise CommandError(f"{folder} does not exist.")
+
+        # Media name → content hash; one build per distinct content
+        names_by_hash = {}
+        for file_name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, file_name)
+            if file_name.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    digest = content_hash(f.read())
+                names_by_hash.setdefault(digest, []).append(os.path.join(upload_to, file_name).replace(os.sep, '/'))
+        self.stdout.write(f"{sum(map(len, names_by_hash.values()))} image(s), {len(names_by_hash)} distinct.")
+
+        # Workers only touch files: close the database connections before forking
+        connections.close_all()
+        variants_by_name = {}
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {
+                pool.submit(build_variants, os.path.join(media_root, names[0]), media_root): names
+                for names in names_by_hash.values()
+            }
+            for future in as_completed(futures):
+                names = futures[future]
+                try:
+                    variants = future.result()
+                except IMAGE_ERRORS as e:
+                    self.stderr.write(f"  {names[0]}: skipped ({e})")
+                    continue
+                self.stdout.write(f"  {names[0]}: {variants['width']}x{variants['height']} → widths {variants['widths']}")
+                for name in names:
+                    variants_by_name[name] = variants
+
+        updated = 0
+        with transaction.atomic():
+            for name, variants in variants_by_name.items():
+                updated += save_instructor_variants(name, variants)
+        if updated:
+            bump_version('catalog')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.perf_counter() - started:.2f} s: variants in {VARIANTS_DIR}/, {updated} instructor(s) updated."
+        ))
@@ -0,0 +1,20 @@
+# python manage.py catalog_snapshot
+# Loads the per-worker catalog snapshot (code_pilot_app/catalog.py) and reports its size,
+# i.e. how much memory every gunicorn worker spends on it
+
+from django.core.management.base import BaseCommand
+
+from code_pilot_app.catalog import CatalogSnapshot
+from code_pilot_app.versions import get_version
+
+
+class Command(BaseCommand):
+    help = "Build the in-memory catalog snapshot and report its memory use and load time."
+
+    def handle(self, *args, **options):
+        snapshot = CatalogSnapshot(get_version('catalog'))
+        stats = snapshot.stats()
+        self.stdout.write(f"Courses:      {stats['courses']}")
+        self.stdout.write(f"Instructors:  {stats['instructors']}")
+        self.stdout.write(f"Memory:       {stats['memory_bytes'] / 1024:.1f} KiB per worker")
+        self.stdout.write(f"Load time:    {stats['load_ms']} ms")
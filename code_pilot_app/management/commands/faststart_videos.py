@@ -0,0 +1,55 @@
+# python manage.py faststart_videos [--dry-run] [file ...]
+# Moves the moov box in front of the media data (code_pilot_app/faststart.py) for the promo
+# videos already on disk, so browsers can start them without first fetching the end of the
+# file. Without file arguments every MP4 under MEDIA_ROOT/course_videos/ is processed. New
+# uploads are handled automatically when a course is saved.
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from code_pilot_app.faststart import MP4_EXTENSIONS, REWRITTEN, FaststartError, make_faststart, needs_faststart
+from code_pilot_app.models import Course
+
+
+class Command(BaseCommand):
+    help = "Rewrite existing promo videos with the moov box first (MP4 faststart)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help="Files to process (default: every video in course_videos/).")
+        parser.add_argument('--dry-run', action='store_true', help="Only report which files need rewriting.")
+
+    def handle(self, *args, **options):
+        paths = options['files'] or self._course_videos()
+        rewritten = skipped = 0
+        for path in paths:
+            name = path if options['files'] else os.path.relpath(path, settings.MEDIA_ROOT)
+            try:
+                if options['dry_run']:
+                    status = 'needs faststart' if needs_faststart(path) else 'already faststart'
+                else:
+                    status = make_faststart(path)
+            except (OSError, FaststartError) as e:
+                skipped += 1
+                self.stderr.write(f"  {name}: skipped ({e})")
+                continue
+            if status in (REWRITTEN, 'needs faststart'):
+                rewritten += 1
+            self.stdout.write(f"  {name}: {status}")
+
+        verb = "need rewriting" if options['dry_run'] else "rewritten"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(paths)} file(s): {rewritten} {verb}, {len(paths) - rewritten - skipped} already faststart, "
+            f"{skipped} skipped."
+        ))
+
+    # Every video file in the promo video upload folder
+    def _course_videos(self):
+        folder = os.path.join(settings.MEDIA_ROOT, Course._meta.get_field('promo_video').upload_to)
+        if not os.path.isdir(folder):
+            raise CommandError(f"{folder} does not exist.")
+        return [
+            os.path.join(folder, name) for name in sorted(os.listdir(folder))
+            if name.lower().endswith(MP4_EXTENSIONS) and not name.startswith('.')
+        ]
@@ -0,0 +1,40 @@
+# python manage.py seed_catalog --scale 10 --seed 42
+# Fills the database with synthetic instructors, courses, users, favorites, carts and orders
+# for load tests (code_pilot_app/seeding.py). Rows are streamed in large batched INSERTs,
+# so --scale 100 (a million users, millions of favorites / carts / purchases) takes minutes,
+# not hours. The same --seed always generates the same data.
+
+from django.core.management.base import BaseCommand, CommandError
+
+from code_pilot_app.seeding import BATCH_SIZE, SCALE_UNIT, scaled_counts, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Insert a synthetic dataset (scale 1 = " + ", ".join(
+        f"{count} {name}" for name, count in SCALE_UNIT.items()
+    ) + ")."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiplier of the scale-1 row counts.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed (same seed → same data).")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Rows per INSERT.")
+        for name in SCALE_UNIT:
+            parser.add_argument(f'--{name}', type=int, help=f"Exact number of {name} (overrides --scale).")
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0 or options['batch_size'] < 1:
+            raise CommandError("--scale and --batch-size must be positive.")
+        counts = scaled_counts(options['scale'])
+        for name in SCALE_UNIT:
+            if options[name] is not None:
+                counts[name] = options[name]
+
+        def progress(name, rows, seconds):
+            rate = rows / seconds if seconds else rows
+            self.stdout.write(f"  {name:12} {rows:>10} rows  {seconds:8.2f} s  {rate:>10.0f} rows/s")
+
+        self.stdout.write(f"Seeding with seed {options['seed']}:")
+        result = seed_dataset(counts, seed=options['seed'], batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {result['seconds']} s, {result['rows_per_second']} rows/s overall."
+        ))
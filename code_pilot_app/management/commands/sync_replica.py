@@ -0,0 +1,72 @@
+# python manage.py sync_replica [--interval 2]
+# Local read replica for code_pilot_app/db_router.py: copies the primary SQLite database
+# (DATABASES['default']) to the replica file (DATABASES[DATABASE_REPLICA['ALIAS']]) with
+# SQLite's online backup API, which reads a consistent snapshot even while the site writes.
+# The copy is written next to the replica and swapped in with os.replace(), so requests never
+# read a half-copied file: connections opened afterwards see the new data (the site opens one
+# per request unless CONN_MAX_AGE is set).
+# --interval repeats the copy every N seconds until interrupted, so the replica lags behind the
+# primary by up to N seconds, like a real one.
+
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from code_pilot_app.db_router import replica_alias
+
+
+# Copy the SQLite database at source to target atomically → seconds taken
+def copy_sqlite_database(source, target):
+    started = time.perf_counter()
+    fd, temp_path = tempfile.mkstemp(prefix='.replica-', suffix='.sqlite3', dir=os.path.dirname(target) or '.')
+    os.close(fd)
+    try:
+        with sqlite3.connect(source) as src, sqlite3.connect(temp_path) as dst:
+            src.backup(dst)
+            # A plain rollback journal file: readers of the replica never write, so no -wal file is needed
+            dst.execute('PRAGMA journal_mode=DELETE')
+        src.close()
+        dst.close()
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database to the local read replica (once, or every --interval seconds)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Repeat every N seconds until interrupted (default: copy once).")
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError(
+                "No replica configured: add DATABASE_REPLICA['ALIAS'] to DATABASES (locally: CODE_PILOT_REPLICA=1)."
+            )
+        primary, replica = settings.DATABASES[DEFAULT_DB_ALIAS], settings.DATABASES[alias]
+        if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+            raise CommandError("sync_replica only copies SQLite databases; use the server's replication otherwise.")
+        source, target = str(primary['NAME']), str(replica['NAME'])
+        if os.path.abspath(source) == os.path.abspath(target):
+            raise CommandError("The primary and the replica are the same file.")
+
+        while True:
+            seconds = copy_sqlite_database(source, target)
+            self.stdout.write(f"{time.strftime('%H:%M:%S')} {source} → {target} in {seconds * 1000:.1f} ms")
+            if options['interval'] <= 0:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
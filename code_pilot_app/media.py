@@ -0,0 +1,173 @@
+# code_pilot_app/media.py
+
+# production view for uploaded media (MEDIA_ROOT): course promo videos, instructor photos
+
+# django.conf.urls.static.static() only works with DEBUG on and ignores the Range header, so
+# every <video> on a page had to download its whole MP4 before it could seek. serve_media
+# answers "Range: bytes=..." with 206 Partial Content and only the requested bytes, so a
+# player fetches the metadata and then just the part being watched.
+
+# Modes (settings.MEDIA_SERVING['MODE']):
+#   'direct'           → Django streams the file itself with FileResponse; under gunicorn the
+#                        file goes through wsgi.file_wrapper → os.sendfile(), zero-copy, starting
+#                        at the range offset for Content-Length bytes
+#   'x-accel-redirect' → Django only checks the path and answers with an X-Accel-Redirect header;
+#                        the front proxy (nginx "internal" location at X_ACCEL_PREFIX, aliased to
+#                        MEDIA_ROOT) sends the file and handles ranges itself
+
+# Both modes send ETag / Last-Modified (304 on revalidation), Accept-Ranges and a public
+# Cache-Control: uploaded files get a new name when replaced, so they are safe to cache.
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+
+# Defaults, overridden by settings.MEDIA_SERVING
+MEDIA_SERVING_DEFAULTS = {
+    'MODE': 'direct',
+    # internal nginx location serving MEDIA_ROOT (x-accel-redirect mode)
+    'X_ACCEL_PREFIX': '/protected-media/',
+    # Cache-Control max-age in seconds
+    'MAX_AGE': 60 * 60 * 24,
+}
+
+# A single byte range; anything else (several ranges, other units) is ignored → full file
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def media_serving_settings():
+    return {**MEDIA_SERVING_DEFAULTS, **getattr(settings, 'MEDIA_SERVING', {})}
+
+
+# The requested range lies outside the file → 416
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+# Range header → (first byte, last byte) inclusive, or None to send the whole file
+def parse_range(header, size):
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # "bytes=-500" → the last 500 bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # Invalid range: the header must be ignored (RFC 9110 14.2)
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+# Part of an open file, read like a file (FileResponse fallback when there is no sendfile).
+# fileno() stays available so wsgi.file_wrapper can still sendfile() from the current offset.
+class FileRange:
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+# Absolute path of an existing file under MEDIA_ROOT, or 404 (no "../" escapes)
+def _media_file(path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found.")
+    return full_path
+
+
+# "If-Range" allows the range only while the file is still the version the client has
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    options = media_serving_settings()
+    full_path = _media_file(path)
+    stat = os.stat(full_path)
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{size:x}')
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': f"public, max-age={options['MAX_AGE']}",
+    }
+
+    # 304 Not Modified (or 412) for conditional requests that still match
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    if options['MODE'] == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        relative = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = options['X_ACCEL_PREFIX'].rstrip('/') + '/' + quote(relative)
+        return response
+
+    byte_range = None
+    if 'Range' in request.headers and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416, headers=headers)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    status = 200
+    start, length = 0, size
+    if byte_range is not None:
+        status = 206
+        start, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+        headers['Content-Range'] = f'bytes {byte_range[0]}-{byte_range[1]}/{size}'
+    headers['Content-Length'] = str(length)
+
+    # HEAD: same headers, no file opened
+    if request.method == 'HEAD':
+        return HttpResponse(status=status, content_type=content_type, headers=headers)
+    file_range = FileRange(open(full_path, 'rb'), start, length)
+    return FileResponse(file_range, status=status, content_type=content_type, headers=headers)
@@ -0,0 +1,82 @@
+# Full-text search index behind search_suggestions / search_course_redirect
+# (FTS5 table + triggers on SQLite, pg_trgm and tsvector GIN indexes on Postgres)
+
+# The DDL is a frozen copy of code_pilot_app.search.install_search_index as of this migration:
+# a migration must keep producing the same schema whatever later happens to the app code.
+# (install_search_index still runs after every migrate, see apps.py, to restore the SQLite
+# triggers when a later migration rebuilds the course table.)
+
+from django.db import migrations
+
+
+TABLE = 'code_pilot_app_course'
+FTS_TABLE = 'code_pilot_app_course_fts'
+COLUMNS = 'course_name, technologies_covered, short_description'
+NEW_VALUES = 'new.course_name, new.technologies_covered, new.short_description'
+OLD_VALUES = 'old.course_name, old.technologies_covered, old.short_description'
+
+SQLITE_INSTALL = [
+    # External-content FTS5 table: stores only the index, reads the text from the course table
+    # prefix='2 3 4' pre-builds short prefixes so "py*" lookups are index hits
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{COLUMNS}, content='{TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    # Keep the index in sync on insert / delete / update of a course
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES}); END",
+    # Index the courses that already exist
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Trigram index → fast fuzzy / infix matching on the course name
+    f"CREATE INDEX IF NOT EXISTS course_name_trgm_idx ON {TABLE} USING gin (course_name gin_trgm_ops)",
+    # Weighted full-text index over all searchable columns
+    f"CREATE INDEX IF NOT EXISTS course_search_tsv_idx ON {TABLE} USING gin (("
+    "setweight(to_tsvector('simple', coalesce(course_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(technologies_covered, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(short_description, '')), 'C')"
+    "))",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS course_search_tsv_idx",
+    "DROP INDEX IF EXISTS course_name_trgm_idx",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('code_pilot_app', '0015_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-17 22:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('code_pilot_app', '0016_course_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkout',
+            name='idempotency_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['user', 'idempotency_key'], name='checkout_user_idem_idx'),
+        ),
+    ]
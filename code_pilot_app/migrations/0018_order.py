@@ -0,0 +1,82 @@
+# Order header for purchase history: one checkout = one Order, Checkout rows become its items.
+# Existing Checkout rows are grouped into orders (same user and payment method, created within
+# a few seconds of each other = one run of the old checkout loop).
+# Making Checkout.order required happens in the next migration, so on Postgres the row updates
+# and the ALTER TABLE do not share a transaction.
+
+import datetime
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Rows of one old checkout were created one after the other, well within this gap
+ORDER_GROUPING_GAP = datetime.timedelta(seconds=5)
+
+
+def group_checkouts_into_orders(apps, schema_editor):
+    Checkout = apps.get_model('code_pilot_app', 'Checkout')
+    Order = apps.get_model('code_pilot_app', 'Order')
+
+    def save_group(group):
+        first = group[0]
+        order = Order.objects.create(
+            user_id=first.user_id,
+            payment_method=first.payment_method,
+            total=sum((row.price for row in group), Decimal('0')),
+            item_count=len(group),
+            idempotency_key=first.idempotency_key,
+        )
+        # created_at is auto_now_add → set the original time afterwards
+        Order.objects.filter(id=order.id).update(created_at=first.created_at)
+        Checkout.objects.filter(id__in=[row.id for row in group]).update(order=order)
+
+    group = []
+    rows = Checkout.objects.order_by('user_id', 'created_at', 'id').iterator()
+    for row in rows:
+        if group and (
+            row.user_id != group[-1].user_id
+            or row.payment_method != group[-1].payment_method
+            or row.idempotency_key != group[-1].idempotency_key
+            or row.created_at - group[-1].created_at > ORDER_GROUPING_GAP
+        ):
+            save_group(group)
+            group = []
+        group.append(row)
+    if group:
+        save_group(group)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('code_pilot_app', '0017_checkout_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_method', models.CharField(choices=[('upi', 'UPI'), ('paytm', 'Paytm'), ('phonepe', 'PhonePe'), ('card', 'Credit/Debit Card')], default='upi', max_length=10)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('item_count', models.PositiveIntegerField()),
+                ('idempotency_key', models.CharField(blank=True, default='', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('idempotency_key', ''), _negated=True), fields=('user', 'idempotency_key'), name='order_unique_idempotency_key')],
+            },
+        ),
+        migrations.AddField(
+            model_name='checkout',
+            name='order',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='code_pilot_app.order'),
+        ),
+        migrations.RunPython(group_checkouts_into_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Every Checkout row now belongs to an Order (0018); the idempotency key lives on Order.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('code_pilot_app', '0018_order'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='checkout',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='code_pilot_app.order'),
+        ),
+        migrations.RemoveIndex(
+            model_name='checkout',
+            name='checkout_user_idem_idx',
+        ),
+        migrations.RemoveField(
+            model_name='checkout',
+            name='idempotency_key',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('code_pilot_app', '0019_checkout_order_required'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['instructor', 'id'], name='course_instructor_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('code_pilot_app', '0021_course_instructor_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructor',
+            name='profile_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
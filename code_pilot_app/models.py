@@ -20,6 +20,10 @@ class Instructor(models.Model):
     rating = models.FloatField()
     # Profile image uploaded to 'instructors/' folder, optional
     profile_image = models.ImageField(upload_to='instructors/', null=True, blank=True)
+    # Resized WebP / JPEG copies of profile_image, filled in after upload (see images.py)
+    profile_image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Last change (set on every save) → Last-Modified / ETag of the catalog pages (conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     # String representation of instructor in admin panel or shell
     def __str__(self):
@@ -117,6 +121,21 @@ class Course(models.Model):
     level = models.CharField(max_length=50, blank=True, null=True)
     # Number of lessons in the course
     lessons_count = models.PositiveIntegerField(default=0)
+    # Last change (set on every save) → Last-Modified / ETag of the catalog pages (conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # Composite indexes for the filtered, keyset-paginated catalog (views.courses)
+        # Each filter column is followed by 'id' so "WHERE filter = x AND id > cursor ORDER BY id"
+        # is a single index range scan no matter how deep the page is
+        indexes = [
+            models.Index(fields=['category', 'id'], name='course_category_id_idx'),
+            models.Index(fields=['category', 'subcategory', 'id'], name='course_cat_subcat_id_idx'),
+            models.Index(fields=['level', 'id'], name='course_level_id_idx'),
+            models.Index(fields=['language', 'id'], name='course_language_id_idx'),
+            # Courses of one instructor in id order (instructor page, keyset-paginated)
+            models.Index(fields=['instructor', 'id'], name='course_instructor_id_idx'),
+        ]
 
     # String representation for admin panel
     def __str__(self):
@@ -137,7 +156,7 @@ class Cart(models.Model):
         return f"{self.user.username} - {self.course.course_name}"
 
 
-# Checkout model to store purchase details
+# Checkout model to store purchase details (one row per purchased course = a line of an Order)
 class Checkout(models.Model):
     # Payment method choices
     PAYMENT_CHOICES = (
@@ -147,6 +166,8 @@ class Checkout(models.Model):
         ('card', 'Credit/Debit Card'),
     )
 
+    # Order this purchase belongs to (one checkout = one order)
+    order = models.ForeignKey('Order', on_delete=models.CASCADE, related_name='items')
     # Link to User
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     # Link to Course
@@ -163,6 +184,40 @@ class Checkout(models.Model):
         return f"{self.user.username} - {self.course.course_name} - {self.payment_method}"
 
 
+# Order header: one checkout of one user, with its purchased courses as Checkout rows (order.items)
+class Order(models.Model):
+    # Link to User
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    # Payment method used
+    payment_method = models.CharField(max_length=10, choices=Checkout.PAYMENT_CHOICES, default='upi')
+    # Sum of the prices of all items
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    # Number of purchased courses
+    item_count = models.PositiveIntegerField()
+    # Key sent with the checkout form, so a resubmitted form does not buy the courses twice
+    idempotency_key = models.CharField(max_length=64, blank=True, default='')
+    # Timestamp when the order was placed
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Purchase history: WHERE user = x ORDER BY created_at DESC, id DESC (keyset pages)
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx'),
+        ]
+        constraints = [
+            # A non-empty key can be used only once per user (last line of defence against double submits)
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                condition=~models.Q(idempotency_key=''),
+                name='order_unique_idempotency_key',
+            ),
+        ]
+
+    # String representation for admin panel
+    def __str__(self):
+        return f"Order {self.id} - {self.item_count} course(s) - {self.payment_method}"
+
+
 # Favorite courses of a user
 class Favorite(models.Model):
     # Link to User
@@ -203,3 +258,15 @@ class Subscriber(models.Model):
     # String representation
     def __str__(self):
         return self.email
+
+
+# Version numbers that must move atomically across processes (see versions.bump_atomic_version)
+class VersionCounter(models.Model):
+    # Version name, e.g. 'autocomplete'
+    name = models.CharField(max_length=100, unique=True)
+    # Current version number
+    value = models.BigIntegerField()
+
+    # String representation
+    def __str__(self):
+        return f"{self.name}={self.value}"
@@ -0,0 +1,117 @@
+# code_pilot_app/orders.py
+
+# checkout service: turns the user's cart (or a single course) into an Order with its items,
+# and reads the purchase history back
+
+# Everything happens in one transaction:
+#   1. lock the user's cart rows (SELECT ... FOR UPDATE, so two submissions run one after the other)
+#   2. stop if this idempotency key was already used (a retried / double-submitted form)
+#   3. insert the Order, then every purchased course with a single bulk_create
+#   4. empty the cart with a single DELETE, without the per-row post_delete signals: the cached
+#      cart summary is refreshed once, after commit (cart.invalidate_cart_summary)
+# That is a fixed handful of queries whatever the cart size, instead of 2+ queries per course.
+
+import uuid
+from decimal import Decimal
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Prefetch
+
+from .cart import invalidate_cart_summary
+from .models import Cart, Checkout, Order
+from .pagination import keyset_paginate
+
+
+# Longest idempotency key we accept (matches Order.idempotency_key)
+IDEMPOTENCY_KEY_LENGTH = 64
+
+
+# New key for a checkout form (sent back as a hidden field)
+def new_idempotency_key():
+    return uuid.uuid4().hex
+
+
+# Clean a key received from a form (empty string = no idempotency protection)
+def clean_idempotency_key(value):
+    return (value or '').strip()[:IDEMPOTENCY_KEY_LENGTH]
+
+
+# Result of checkout_cart(): the new order (None if nothing was bought), and whether the key was already used
+class CheckoutResult:
+    def __init__(self, order=None, duplicate=False):
+        self.order = order
+        self.duplicate = duplicate
+
+
+# Amount charged for these courses (their current prices); the checkout page shows the same
+def order_total(courses):
+    return sum((course.price for course in courses), Decimal('0'))
+
+
+# Buy everything in the user's cart, or single_course when given and the cart is empty
+def checkout_cart(user, payment_method, idempotency_key='', single_course=None):
+    try:
+        with transaction.atomic():
+            # Lock this user's cart rows until commit (only the cart rows, not the joined courses)
+            items = list(
+                Cart.objects.select_for_update(of=('self',))
+                .filter(user=user).select_related('course').order_by('id')
+            )
+
+            # Same form submitted again → nothing to do
+            if idempotency_key and Order.objects.filter(user=user, idempotency_key=idempotency_key).exists():
+                return CheckoutResult(duplicate=True)
+
+            if items:
+                courses = [item.course for item in items]
+            elif single_course is not None:
+                courses = [single_course]
+            else:
+                return CheckoutResult()
+
+            # Order header, then all purchased courses in one INSERT
+            order = Order.objects.create(
+                user=user,
+                payment_method=payment_method,
+                total=order_total(courses),
+                item_count=len(courses),
+                idempotency_key=idempotency_key,
+            )
+            Checkout.objects.bulk_create([
+                Checkout(
+                    order=order,
+                    user=user,
+                    course=course,
+                    price=course.price,
+                    payment_method=payment_method,
+                )
+                for course in courses
+            ])
+
+            if items:
+                # Empty the cart: nothing references Cart rows, so a plain DELETE is enough
+                # (.delete() would first read the rows back to send one post_delete each)
+                Cart.objects.filter(id__in=[item.id for item in items])._raw_delete(router.db_for_write(Cart))
+                user_id = user.id
+                transaction.on_commit(lambda: invalidate_cart_summary(user_id))
+    except IntegrityError:
+        # A concurrent submission with the same key won the race (unique constraint on Order)
+        if idempotency_key:
+            return CheckoutResult(duplicate=True)
+        raise
+
+    return CheckoutResult(order=order)
+
+
+# Number of orders shown per page of the purchase history
+HISTORY_PAGE_SIZE = 10
+
+
+# One keyset page of a user's orders, newest first, with their items and courses
+# Three queries per page (orders, items + courses) whatever the number of past purchases
+def order_history_page(user, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    items = Checkout.objects.select_related('course').only(
+        'order_id', 'price', 'course__id', 'course__course_name',
+    ).order_by('id')
+    orders = Order.objects.filter(user=user).prefetch_related(Prefetch('items', queryset=items))
+    return keyset_paginate(orders, ('-created_at', '-id'), cursor=cursor, page_size=page_size)
@@ -0,0 +1,181 @@
+# code_pilot_app/page_cache.py
+
+# full-page cache for logged-out visitors of the catalog pages
+
+# index, courses, course_detail, instructor_detail, instructors and about_us render the same
+# HTML for every anonymous visitor, and most traffic is anonymous. @anonymous_page_cache stores
+# that HTML per path + query string and serves it without running the view.
+
+# Keys: only the query parameters the pages read (QUERY_PARAMS: the course filters and the
+# ?after= cursor) count, sorted, last value wins. The view is run with that same normalized
+# request.GET, so the stored page never depends on a parameter the key left out (links built
+# from request.GET drop utm_source & co). Arbitrary query strings therefore map to a handful of
+# entries instead of one each; a value longer than MAX_VALUE_LENGTH is not cached at all. The
+# entries live in their own cache alias (settings.CACHES['pages']) so the pages, however many,
+# only ever evict each other.
+
+# Not cached (the view runs as usual): logged-in users, pending flash messages, a login /
+# register modal to reopen (ui_state.py), non-GET requests and non-200 responses.
+
+# Freshness: each entry remembers the catalog version it was rendered from (signals.py bumps it
+# on every Course / Instructor change) and when. Entries older than TTL or from an older catalog
+# version are stale; a stale entry is still served (up to STALE_TTL) while exactly one request,
+# the one that wins the lock, renders the new page. So a catalog change or an expiry under load
+# costs one render, not one per concurrent visitor. When there is no entry at all, requests that
+# lose the lock wait up to LOCK_WAIT seconds for the winner's page before rendering themselves.
+
+# CSRF: the pages contain forms (login, register, newsletter). Their token is replaced by a
+# placeholder in the stored copy and by a fresh token for the current visitor when served.
+
+import functools
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse, QueryDict
+from django.middleware.csrf import get_token
+from django.utils.http import urlencode
+
+from .catalog_cache import catalog_version
+from .ui_state import pending_modal
+
+
+# Defaults, overridden by settings.ANONYMOUS_PAGE_CACHE
+PAGE_CACHE_DEFAULTS = {
+    'ENABLED': True,
+    # seconds an entry is fresh
+    'TTL': 60,
+    # seconds a stale entry may still be served while it is being re-rendered
+    'STALE_TTL': 600,
+    # seconds a re-render may hold the lock, and seconds a cold miss waits for it
+    'LOCK_TIMEOUT': 10,
+    'LOCK_WAIT': 2.0,
+    # alias from CACHES
+    'CACHE': 'default',
+    # query parameters that are part of the key (all others are dropped)
+    'QUERY_PARAMS': ('category', 'subcategory', 'level', 'language', 'after'),
+    # longer parameter values are not cached
+    'MAX_VALUE_LENGTH': 200,
+}
+
+CSRF_PLACEHOLDER = '__CSRF_TOKEN__'
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+# Interval of the cold-miss wait loop
+WAIT_STEP = 0.05
+
+
+def page_cache_settings():
+    return {**PAGE_CACHE_DEFAULTS, **getattr(settings, 'ANONYMOUS_PAGE_CACHE', {})}
+
+
+# request.GET reduced to QUERY_PARAMS, in sorted order (None when a value is too long to cache)
+def _normalized_query(request, options):
+    params = []
+    for name in sorted(options['QUERY_PARAMS']):
+        if name in request.GET:
+            # The last value, like request.GET.get() in the views
+            value = request.GET[name]
+            if len(value) > options['MAX_VALUE_LENGTH']:
+                return None
+            params.append((name, value))
+    return QueryDict(urlencode(params))
+
+
+def _page_key(request, query):
+    digest = hashlib.md5(f'{request.path}?{query.urlencode()}'.encode()).hexdigest()
+    return f'page:anon:{digest}'
+
+
+# True when the next page shows something only once (flash messages, a modal to reopen)
+# Also used by conditional.py: such a page must never be answered with 304
+def has_pending_notices(request):
+    # len() does not mark the messages as read
+    if len(messages.get_messages(request)):
+        return True
+    # Signed cookie: no session lookup
+    return pending_modal(request) is not None
+
+
+# True when this request must see its own, uncached page
+def _bypass(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return True
+    return has_pending_notices(request)
+
+
+# Response for the current visitor from a stored entry
+def _from_entry(request, entry, status):
+    content = entry['content']
+    if CSRF_PLACEHOLDER.encode() in content:
+        # get_token() also makes CsrfViewMiddleware send the matching cookie
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['X-Page-Cache'] = status
+    return response
+
+
+# Run the view and store its page if it can be shared
+def _render_and_store(view, request, args, kwargs, cache, key, version, options):
+    response = view(request, *args, **kwargs)
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return response
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    entry = {
+        'version': version,
+        'created': time.time(),
+        'content_type': response['Content-Type'],
+        'content': CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode()).encode(),
+    }
+    cache.set(key, entry, options['TTL'] + options['STALE_TTL'])
+    response['X-Page-Cache'] = 'MISS'
+    return response
+
+
+def anonymous_page_cache(view):
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        options = page_cache_settings()
+        if not options['ENABLED'] or _bypass(request):
+            return view(request, *args, **kwargs)
+        query = _normalized_query(request, options)
+        if query is None:
+            return view(request, *args, **kwargs)
+        # The view sees exactly the parameters the key is made of
+        request.GET = query
+
+        cache = caches[options['CACHE']]
+        key = _page_key(request, query)
+        lock_key = f'{key}:lock'
+        version = catalog_version()
+        entry = cache.get(key)
+
+        if entry is not None:
+            age = time.time() - entry['created']
+            if entry['version'] == version and age < options['TTL']:
+                return _from_entry(request, entry, 'HIT')
+
+        # Miss or stale: only the request that gets the lock renders the page
+        locked = cache.add(lock_key, 1, options['LOCK_TIMEOUT'])
+        if not locked:
+            if entry is not None and age < options['TTL'] + options['STALE_TTL']:
+                return _from_entry(request, entry, 'STALE')
+            if entry is None:
+                # Cold miss while another request renders this page: wait for its result
+                deadline = time.monotonic() + options['LOCK_WAIT']
+                while time.monotonic() < deadline:
+                    time.sleep(WAIT_STEP)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        return _from_entry(request, entry, 'HIT-WAIT')
+            return view(request, *args, **kwargs)
+
+        try:
+            return _render_and_store(view, request, args, kwargs, cache, key, version, options)
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
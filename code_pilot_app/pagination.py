@@ -0,0 +1,105 @@
+# code_pilot_app/pagination.py
+
+# keyset (cursor) pagination used by the course catalog and other long lists
+
+# OFFSET pagination makes the database read and throw away every row before the page,
+# so page 500 is 500 times slower than page 1. Keyset pagination remembers the sort key
+# of the last row we showed (the "cursor") and asks only for rows that come after it,
+# which a composite index answers directly → every page costs the same as page 1.
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+# Default number of rows shown on a page
+DEFAULT_PAGE_SIZE = 12
+# Upper bound so a client cannot ask for the whole table in one page
+MAX_PAGE_SIZE = 60
+
+
+# One page of results plus the cursor for the page after it
+class KeysetPage:
+    def __init__(self, object_list, next_cursor):
+        # Rows shown on this page
+        self.object_list = object_list
+        # Opaque cursor string for the next page (None on the last page)
+        self.next_cursor = next_cursor
+
+    # True when there is a page after this one
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    # Allow {% for course in page %} in templates
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+# Turn the sort key values of a row into a url-safe cursor string
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+# Turn a cursor string back into sort key values
+# Returns None for a missing or tampered cursor so the caller falls back to page 1
+def decode_cursor(cursor, length):
+    if not cursor:
+        return None
+    # Add back the '=' padding stripped by encode_cursor
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    # A cursor must carry exactly one value per ordering field
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+# Build the "rows after the cursor" condition for a multi-column ordering
+# e.g. ordering ('-created_at', '-id') and values (t, 7) becomes
+#   created_at < t OR (created_at = t AND id < 7)
+def _after_cursor_q(ordering, values):
+    condition = Q()
+    equal_so_far = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+        equal_so_far &= Q(**{name: value})
+    return condition
+
+
+# Fetch one keyset page of a queryset
+# ordering must end with a unique field (normally 'id' / '-id') so the order is total
+def keyset_paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    queryset = queryset.order_by(*ordering)
+
+    # Only rows after the cursor (a bad cursor simply means "first page")
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        try:
+            queryset = queryset.filter(_after_cursor_q(ordering, values))
+        except (TypeError, ValueError, ValidationError):
+            # Well-formed cursor with values the fields cannot take (e.g. ["abc"] for an id)
+            pass
+
+    # Ask for one extra row: if it exists there is a next page
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field.lstrip('-')) for field in ordering)
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,66 @@
+# code_pilot_app/query_budgets.py
+
+# maximum number of SQL queries each view may run, by URL name (see urls.py)
+
+# Checked by querycount.QueryBudgetMiddleware on every request: going over the budget (or
+# running the same statement shape N_PLUS_ONE_THRESHOLD times or more) fails the test suite
+# and is logged in production. The numbers are the worst case for a logged-in user with a
+# cold cache (session + user lookups included), so a new lazy foreign key in a loop shows up
+# immediately. When a change really needs more queries, raise the number here in the same commit.
+
+# Used for URL names missing from the table below
+DEFAULT_QUERY_BUDGET = 10
+
+# Same normalized statement this many times in one request → reported as an N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+QUERY_BUDGETS = {
+    # catalog pages: usually only session + user + cart + favorites, but the first request after a
+    # catalog change also rebuilds the snapshot (2 queries) or the cached catalog lists (up to 3)
+    'index': 9,
+    'courses': 9,
+    'course_detail': 9,
+    'instructor_detail': 9,
+    'instructors': 9,
+    'about_us': 9,
+    'contact_us': 9,
+    # cold: Last-Modified (2) + autocomplete version counter + index build + search index
+    'search_suggestions': 5,
+    'search_course_redirect': 4,
+
+    # Pages with the site header pay, on cold caches, for session + user + cart summary +
+    # favorites and the catalog snapshot rebuild (2) before their own queries (measured by
+    # QueryBudgetTests in tests.py)
+
+    # cart and favorites (get_or_create adds SAVEPOINT + RELEASE around its INSERT; deleting a
+    # Cart row runs in a transaction, BEGIN included, since signals.py listens to its post_delete)
+    'view_cart': 8,
+    'add_to_cart': 8,
+    'remove_from_cart': 6,
+    'load_cart_snippet': 6,
+    'toggle_favorite': 7,
+    'view_favorites': 8,
+    'remove_from_favorites': 5,
+
+    # checkout: lock cart, key check, order, bulk insert, cart delete (+ savepoint statements)
+    'checkout': 12,
+    'checkout_history': 9,
+    'payment_success': 7,
+    'payment_failed': 7,
+
+    # accounts
+    'register': 8,
+    'login': 8,
+    'logout': 4,
+    'profile': 7,
+    'verify-admin': 7,
+    'subscribe_email': 4,
+
+    # uploaded media (media.py): file system only, never the database
+    'serve_media': 0,
+}
+
+
+# Budget of a URL name (DEFAULT_QUERY_BUDGET when it is not listed)
+def get_query_budget(url_name):
+    return QUERY_BUDGETS.get(url_name, DEFAULT_QUERY_BUDGET)
@@ -0,0 +1,258 @@
+# code_pilot_app/querycount.py
+
+# per-request SQL recorder: N+1 detection and per-view query budgets
+
+# QueryBudgetMiddleware records every statement a request runs (on all database connections),
+# groups them by normalized shape (literals and IN lists replaced by "?") and compares the
+# request with its budget from query_budgets.py:
+#   - over budget         → the view got more expensive than it is allowed to be
+#   - same shape 3+ times → a lazy foreign key / query inside a loop (N+1)
+# What happens then depends on settings.QUERY_BUDGET['MODE']:
+#   'raise' → QueryBudgetExceeded (the test runner below switches to this mode)
+#   'log'   → a report of SAMPLE_RATE of the requests is logged (production)
+#   'off'   → nothing is recorded
+
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .query_budgets import N_PLUS_ONE_THRESHOLD, get_query_budget
+
+
+logger = logging.getLogger(__name__)
+
+
+# Defaults, overridden by settings.QUERY_BUDGET
+QUERY_BUDGET_DEFAULTS = {
+    'MODE': 'log',
+    'SAMPLE_RATE': 0.05,
+}
+
+
+def query_budget_settings():
+    return {**QUERY_BUDGET_DEFAULTS, **getattr(settings, 'QUERY_BUDGET', {})}
+
+
+# Raised in 'raise' mode when a request breaks its budget or runs an N+1
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# ---- SQL normalization ----
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s|\?')
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+SPACES_RE = re.compile(r'\s+')
+# INSERT / UPDATE / DELETE of a row of the session table
+SESSION_WRITE_RE = re.compile(r'^(?:INSERT INTO|UPDATE|DELETE FROM) "?django_session"?', re.IGNORECASE)
+
+
+# Statement shape: the same query with other parameters (or IN lists of another length) → same string
+def normalize_sql(sql):
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACES_RE.sub(' ', sql).strip()
+
+
+# Statements of queries ((alias, normalized sql, seconds) tuples) that wrote the session table
+def count_session_writes(queries):
+    return sum(1 for _, sql, _ in queries if SESSION_WRITE_RE.match(sql))
+
+
+# ---- recording ----
+
+# Execute wrapper collecting (connection alias, normalized sql, seconds) of every statement
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def wrapper(self, alias):
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append((alias, normalize_sql(sql), time.perf_counter() - started))
+        return record
+
+    # Install the recorder on every configured connection for the duration of the with block
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self.wrapper(connection.alias)))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+# What one request did, compared with its budget
+class QueryReport:
+    def __init__(self, view_name, queries, budget, routing=None):
+        self.view_name = view_name
+        self.queries = queries
+        self.budget = budget
+        self.count = len(queries)
+        self.seconds = sum(seconds for _, _, seconds in queries)
+        self.by_alias = Counter(alias for alias, _, _ in queries)
+        self.session_writes = count_session_writes(queries)
+        shapes = Counter(sql for _, sql, _ in queries)
+        # Shapes repeated often enough to be a query in a loop, most repeated first
+        self.repeated = [(sql, n) for sql, n in shapes.most_common() if n >= N_PLUS_ONE_THRESHOLD]
+        # Read replica routing decisions of the request (db_router.RoutingState), if any
+        self.routing = routing
+
+    @property
+    def over_budget(self):
+        return self.count > self.budget
+
+    @property
+    def ok(self):
+        return not self.over_budget and not self.repeated
+
+    def __str__(self):
+        lines = [
+            f"{self.view_name}: {self.count} queries (budget {self.budget}) in {self.seconds * 1000:.1f} ms"
+        ]
+        if self.session_writes:
+            lines.append(f"  session writes: {self.session_writes}")
+        if self.routing is not None and self.routing.decisions:
+            lines.append(f"  routing: {self.routing}")
+        for sql, n in self.repeated:
+            lines.append(f"  N+1 x{n}: {sql[:300]}")
+        return '\n'.join(lines)
+
+
+# ---- middleware ----
+
+# Records the queries of each request and checks them against query_budgets.py
+# Put it first in MIDDLEWARE so session / auth queries are counted too
+# Sync and async: under ASGI it must not force the async views (async_views.py) back into a
+# thread, and the queries of an async request run in its thread-sensitive worker thread, so
+# that is where the recorder is installed.
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._recorded():
+            return self.get_response(request)
+
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self._check(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not self._recorded():
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        await sync_to_async(recorder.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+        return self._check(request, response, recorder)
+
+    # False when this request is not recorded (mode 'off', or not sampled in 'log' mode)
+    def _recorded(self):
+        options = query_budget_settings()
+        mode = options['MODE']
+        return not (mode == 'off' or (mode == 'log' and random.random() >= options['SAMPLE_RATE']))
+
+    def _check(self, request, response, recorder):
+        mode = query_budget_settings()['MODE']
+        match = request.resolver_match
+        # Django admin has its own query patterns; only this app's views have budgets
+        if match is not None and match.namespace == 'admin':
+            return response
+        view_name = match.url_name if match is not None else request.path
+        report = QueryReport(
+            view_name, recorder.queries, get_query_budget(view_name), getattr(request, 'db_routing', None),
+        )
+        # Kept on the response for assert_query_budget() and the benchmark commands
+        response.query_report = report
+
+        if mode == 'raise':
+            if not report.ok:
+                raise QueryBudgetExceeded(str(report))
+        elif report.ok:
+            logger.info("query report %s", report)
+        else:
+            logger.warning("query budget exceeded %s", report)
+        return response
+
+
+# ---- tests ----
+
+# Every cache alias replaced by an in-memory cache of this process (an override_settings: use
+# it as a context manager, or enable() / disable()). For everything that runs against a
+# throwaway database (tests, the benchmark commands): the file-based 'shared' and 'sessions'
+# caches are read by the live site, and cart summaries, favorite ids, sessions and version
+# stamps of the throwaway users (whose ids overlap the real ones) must not end up there.
+def isolated_caches(prefix='test'):
+    return override_settings(CACHES=_in_memory_caches(prefix))
+
+
+def _in_memory_caches(prefix):
+    return {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'{prefix}-{alias}'}
+        for alias in settings.CACHES
+    }
+
+
+# Test runner that turns budget violations into errors (TEST_RUNNER in settings.py)
+# For the duration of the run (override_settings, restored afterwards):
+#   - QUERY_BUDGET['MODE'] is 'raise'
+#   - tests run with DEBUG off but without collectstatic, so {% static %} uses plain (unhashed) names
+#   - every cache alias is an in-memory cache (isolated_caches)
+class QueryBudgetTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(
+            QUERY_BUDGET={**query_budget_settings(), 'MODE': 'raise'},
+            STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+            CACHES=_in_memory_caches('test'),
+        )
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+# Test helper: fail unless the response was within its budget (and a budget can be tightened)
+#   response = self.client.get(reverse('courses'))
+#   assert_query_budget(response, budget=4)
+def assert_query_budget(response, budget=None):
+    report = getattr(response, 'query_report', None)
+    if report is None:
+        raise AssertionError("no query report on the response (is QueryBudgetMiddleware enabled?)")
+    if budget is not None and report.count > budget:
+        raise AssertionError(f"{report} — expected at most {budget}")
+    if not report.ok:
+        raise AssertionError(str(report))
+    return report
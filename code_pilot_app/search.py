@@ -0,0 +1,228 @@
+# code_pilot_app/search.py
+
+# course search engine shared by the search box suggestions and the search redirect
+
+# course_name__icontains turns into LIKE '%query%' which can never use an index and returns
+# every matching row. Instead we keep a real search index over course_name,
+# technologies_covered and short_description and ask it for the top few ranked matches:
+#   - SQLite   → an FTS5 virtual table kept in sync with triggers, ranked with bm25()
+#   - Postgres → pg_trgm + a weighted tsvector GIN index, ranked with ts_rank()/similarity()
+#   - others   → an indexed prefix match on course_name, then a bounded contains match
+
+# Course name prefixes come first, from the in-process autocomplete index (autocomplete.py);
+# the rest of the suggestions are filled from the database search index below, in its ranking
+# order, so technology / description matches still show up next to the name matches.
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, router
+
+from . import autocomplete
+from .autocomplete import query_words
+from .caching import LRUCache
+from .models import Course
+from .versions import get_local_version
+
+
+# Number of suggestions returned to the search box
+SUGGESTION_LIMIT = 8
+
+# Suggestion response cache settings (see SEARCH_SUGGESTION_CACHE in settings.py)
+SUGGESTION_CACHE_SETTINGS = {
+    'MAXSIZE': 2048,
+    'TTL': 60,
+    'SHARED_CACHE': None,
+    **getattr(settings, 'SEARCH_SUGGESTION_CACHE', {}),
+}
+# Per-process layer: popular prefixes ("py", "pyt", "pyth") are answered from here
+suggestion_cache = LRUCache(
+    maxsize=SUGGESTION_CACHE_SETTINGS['MAXSIZE'],
+    ttl=SUGGESTION_CACHE_SETTINGS['TTL'],
+)
+
+# Name of the SQLite FTS5 table mirroring the searchable Course columns
+FTS_TABLE = f'{Course._meta.db_table}_fts'
+# Searchable columns, in the order of their ranking weights
+SEARCH_COLUMNS = ('course_name', 'technologies_covered', 'short_description')
+# A match in the course name counts more than a technology, which counts more than the summary
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Weighted tsvector used by the Postgres expression index (and by queries, so they match it)
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(course_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(technologies_covered, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(short_description, '')), 'C')"
+)
+
+
+# Create the search index for the given connection (safe to run again: everything is IF NOT EXISTS)
+# Migration 0016 creates it with a frozen copy of these statements; this runs again after every
+# migrate (apps.py), because SQLite drops the triggers whenever a later migration has to rebuild
+# the course table. Keep the two in step when the index changes (with a new migration).
+def install_search_index(connection):
+    table = Course._meta.db_table
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # Remember whether the FTS table is new, so we only fill it the first time
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            created = cursor.fetchone() is None
+            # External-content FTS5 table: stores only the index, reads the text from the course table
+            # prefix='2 3 4' pre-builds short prefixes so "py*" lookups are index hits
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{columns}, content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+            )
+            # Keep the index in sync on insert / delete / update of a course
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+            # Index the courses that already exist
+            if created:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+        elif connection.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            # Trigram index → fast fuzzy / infix matching on the course name
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS course_name_trgm_idx ON {table} "
+                f"USING gin (course_name gin_trgm_ops)"
+            )
+            # Weighted full-text index over all searchable columns
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS course_search_tsv_idx ON {table} "
+                f"USING gin (({PG_SEARCH_VECTOR}))"
+            )
+
+
+# Remove the search index (used when the migration is reversed)
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS course_search_tsv_idx")
+            cursor.execute("DROP INDEX IF EXISTS course_name_trgm_idx")
+
+
+# SQLite: every word must match (the last one as a prefix, since the user is still typing)
+def _search_sqlite(connection, words, limit):
+    # "python" "full"* → both words, quoted so FTS5 treats them as plain text
+    match = ' '.join(f'"{w}"' for w in words[:-1]) + f' "{words[-1]}"*'
+    weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT c.id, c.course_name FROM {FTS_TABLE} "
+            f"JOIN {Course._meta.db_table} c ON c.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}), c.id LIMIT %s",
+            [match.strip(), limit],
+        )
+        return cursor.fetchall()
+
+
+# Postgres: full-text match on all words (last one as a prefix) or a fuzzy match on the name
+def _search_postgres(connection, words, limit):
+    tsquery = ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+    phrase = ' '.join(words)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, course_name FROM {Course._meta.db_table} "
+            f"WHERE ({PG_SEARCH_VECTOR}) @@ to_tsquery('simple', %s) OR course_name %% %s "
+            f"ORDER BY ts_rank({PG_SEARCH_VECTOR}, to_tsquery('simple', %s)) DESC, "
+            f"similarity(course_name, %s) DESC, id LIMIT %s",
+            [tsquery, phrase, tsquery, phrase, limit],
+        )
+        return cursor.fetchall()
+
+
+# Any other database: indexed name prefix first, then fill up with a bounded contains match
+def _search_fallback(query, limit):
+    results = list(Course.objects.filter(course_name__istartswith=query)
+                   .order_by('course_name', 'id').values_list('id', 'course_name')[:limit])
+    if len(results) < limit:
+        seen = [course_id for course_id, _ in results]
+        results += list(Course.objects.filter(course_name__icontains=query).exclude(id__in=seen)
+                        .order_by('course_name', 'id').values_list('id', 'course_name')[:limit - len(results)])
+    return results
+
+
+# Ranked top-k search → list of (course id, course name), best match first
+def search_courses(query, limit=SUGGESTION_LIMIT):
+    query = query.strip()
+    # Words only (letters/digits), so user input can never break the index syntax
+    words = query_words(query)
+    if not words:
+        return []
+
+    # Course name prefixes → answered from memory; enough of them and the database is not asked
+    results = autocomplete.suggest(query, limit)
+    if len(results) >= limit:
+        return results
+
+    # Fill up with the ranked matches of the database search index (skipping the ones we have)
+    connection = connections[router.db_for_read(Course)]
+    if connection.vendor == 'sqlite':
+        ranked = _search_sqlite(connection, words, limit)
+    elif connection.vendor == 'postgresql':
+        ranked = _search_postgres(connection, words, limit)
+    else:
+        ranked = _search_fallback(query, limit)
+    seen = {course_id for course_id, _ in results}
+    for course_id, name in ranked:
+        if course_id not in seen and len(results) < limit:
+            seen.add(course_id)
+            results.append((course_id, name))
+    return results
+
+
+# Suggestions for the search box, cached per normalized query
+# Returns (results, cache status) where status is 'HIT-LOCAL', 'HIT-SHARED' or 'MISS'
+# Keys include the 'catalog' version, so any Course change makes every cached entry stale
+def cached_suggestions(query):
+    normalized = ' '.join(query_words(query))
+    if not normalized:
+        return [], 'MISS'
+
+    version = get_local_version('catalog')
+    local_key = (version, normalized)
+    results = suggestion_cache.get(local_key)
+    if results is not None:
+        return results, 'HIT-LOCAL'
+
+    # Optional cross-worker layer in a Django cache (e.g. redis / memcached)
+    shared = None
+    shared_key = None
+    if SUGGESTION_CACHE_SETTINGS['SHARED_CACHE']:
+        shared = caches[SUGGESTION_CACHE_SETTINGS['SHARED_CACHE']]
+        # Hash the query so any text is a valid cache key
+        digest = hashlib.md5(normalized.encode()).hexdigest()
+        shared_key = f'search:suggest:{version}:{digest}'
+        results = shared.get(shared_key)
+        if results is not None:
+            suggestion_cache.set(local_key, results)
+            return results, 'HIT-SHARED'
+
+    results = [tuple(row) for row in search_courses(normalized)]
+    suggestion_cache.set(local_key, results)
+    if shared is not None:
+        shared.set(shared_key, results, timeout=SUGGESTION_CACHE_SETTINGS['TTL'])
+    return results, 'MISS'
@@ -0,0 +1,418 @@
+# code_pilot_app/seeding.py
+
+# synthetic catalog / user data for benchmarks and load tests
+
+# Rows are generated from a random.Random(seed), so the same seed always produces the same
+# dataset. They are streamed in large batches, one transaction per chunk, so memory stays flat
+# whatever the scale and nothing runs per row (no save(), no signals, no password hashing:
+# every user gets the same precomputed hash). Only the ids and prices needed to link the next
+# tables are kept in memory.
+
+# Target: at least 100k rows/s on SQLite ("manage.py seed_catalog" prints the rate per table).
+# What it takes, measured on a --scale 10 run:
+#   - rows are plain tuples already in database form (decimals as strings, timestamps
+#     pre-converted): building a model instance and letting bulk_create convert every field
+#     costs ~50 µs per row (~200 µs for a course), several times the INSERT itself
+#   - multi-row INSERT ... VALUES (...), (...) statements, as many rows as the bound-variable
+#     limit allows, on the raw DB-API cursor: ~4x the rows/s of executemany, which runs the
+#     statement once per row
+#   - bulk_load_mode(): no foreign key lookups per row (the generated ids are valid by
+#     construction) and no fsync per commit (synchronous=OFF, SQLite only, for the duration)
+#   - secondary indexes are rebuilt once after each table instead of being updated row by row
+#     (deferred_indexes), and only the new courses are added to the search index, in one pass
+# Result (--scale 1 and 10, fresh and already seeded databases): 160k-235k rows/s overall;
+# every table above 110k rows/s except instructors (~50k) and courses (~20-40k), whose long
+# text columns and full-text indexing cost more per row. They are ~1% of the rows.
+# The catalog version stamps are bumped at the end because nothing here sends post_save.
+
+import contextlib
+import itertools
+import random
+import sqlite3
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Cart, Checkout, Course, Favorite, Instructor, Order
+from .search import FTS_TABLE, SEARCH_COLUMNS, install_search_index, uninstall_search_index
+from .versions import bump_atomic_version, bump_version
+
+
+# Password of every generated user, and its hash computed once ahead of time
+# (make_password('seed-password', salt='seedsalt0123456789ab')): hashing takes ~0.5 s per call,
+# so even one make_password per run would show up in the timings
+SEED_PASSWORD = 'seed-password'
+SEED_PASSWORD_HASH = 'pbkdf2_sha256$1000000$seedsalt0123456789ab$KLFhdLcPku25YGB347Catk0wDovudMa6ADWd0yNGXC8='
+
+# Rows per model at scale 1; --scale multiplies them (scale 100 → millions of user rows)
+SCALE_UNIT = {
+    'instructors': 100,
+    'courses': 1000,
+    'users': 10000,
+    'favorites': 50000,
+    'carts': 20000,
+    'orders': 10000,
+}
+# Distinct long descriptions per run
+DESCRIPTION_POOL = 500
+# Courses per generated order: 1 to MAX_ORDER_ITEMS
+MAX_ORDER_ITEMS = 3
+
+# Rows per INSERT, and rows per transaction
+BATCH_SIZE = 2000
+CHUNK_SIZE = 50000
+
+CATEGORIES = [value for value, _ in Course.CATEGORY_CHOICES]
+SUBCATEGORIES = [value for value, _ in Course.SUBCATEGORY_CHOICES]
+PAYMENT_METHODS = [value for value, _ in Checkout.PAYMENT_CHOICES]
+LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+LANGUAGES = ['English', 'Hindi', 'Tamil', 'Telugu']
+BADGES = ['Bestseller', 'New', 'Popular', None]
+TOPICS = ['Python', 'Django', 'React', 'Node', 'Java', 'Spring', 'Flutter', 'Kotlin', 'SQL', 'Pandas',
+          'Selenium', 'Figma', 'SEO', 'Linux', 'Docker', 'AWS', 'Machine Learning', 'Power BI']
+
+
+# Rows per model for a scale factor
+def scaled_counts(scale):
+    return {name: max(1, int(count * scale)) for name, count in SCALE_UNIT.items()}
+
+
+# Names of the files already uploaded to a media folder (sorted, so the seed stays deterministic)
+# Generated rows point at them, so templates that read .url render like with real data
+def media_names(folder):
+    try:
+        files = default_storage.listdir(folder)[1]
+    except (FileNotFoundError, NotImplementedError):
+        return ['']
+    return sorted(f'{folder}/{name}' for name in files) or ['']
+
+
+# ---- row generators ----
+
+def generate_instructors(rng, start, count, images, now):
+    for number in range(start, start + count):
+        yield (
+            f'Instructor {number}',
+            rng.choice(['Software Engineer', 'Data Scientist', 'Designer', 'Security Analyst']),
+            ' '.join(rng.choices(TOPICS, k=12)),
+            f'instructor{number}@seed.example.com',
+            f'9{rng.randrange(10 ** 9):09d}',
+            round(rng.uniform(3.5, 5.0), 1),
+            rng.choice(images),
+            '{}',
+            now,
+        )
+
+
+def generate_courses(rng, start, count, instructor_ids, videos, now):
+    # 60-word descriptions are drawn from a pool: building one per row took most of the step
+    descriptions = [' '.join(rng.choices(TOPICS, k=60)) for _ in range(min(count, DESCRIPTION_POOL))]
+    for number in range(start, start + count):
+        topics = rng.sample(TOPICS, 3)
+        price = rng.randrange(999, 19999, 500)
+        discount = rng.choice([10, 20, 30, 40, 50])
+        yield (
+            f'{topics[0]} {topics[1]} Course {number}',
+            f'Learn {topics[0]}, {topics[1]} and {topics[2]} from scratch.',
+            rng.choice(descriptions),
+            rng.choice(CATEGORIES),
+            rng.choice(SUBCATEGORIES),
+            ', '.join(topics),
+            str(price),
+            rng.choice(instructor_ids),
+            f'{rng.randrange(2, 25)} weeks',
+            rng.randrange(0, 50000),
+            rng.choice(LANGUAGES),
+            'Certificate of completion',
+            round(rng.uniform(3.0, 5.0), 1),
+            ', '.join(topics),
+            str((Decimal(price) * 100 / (100 - discount)).quantize(Decimal('1'))),
+            discount,
+            rng.choice(BADGES),
+            rng.choice(LEVELS),
+            rng.randrange(10, 200),
+            rng.choice(videos),
+            now,
+        )
+
+
+# Rows below are tuples in the order of the *_FIELDS lists, already in database form
+INSTRUCTOR_FIELDS = ['name', 'profession', 'about', 'email', 'phone_no', 'rating', 'profile_image',
+                     'profile_image_variants', 'updated_at']
+COURSE_FIELDS = ['course_name', 'short_description', 'long_description', 'category', 'subcategory',
+                 'learning_outcomes', 'price', 'instructor', 'duration', 'students_enrolled', 'language',
+                 'certification', 'rating', 'technologies_covered', 'old_price', 'discount_percent', 'badge',
+                 'level', 'lessons_count', 'promo_video', 'updated_at']
+USER_FIELDS = ['username', 'email', 'password', 'first_name', 'last_name',
+               'is_superuser', 'is_staff', 'is_active', 'date_joined']
+FAVORITE_FIELDS = ['user_id', 'course_id']
+CART_FIELDS = ['user_id', 'course_id', 'added_at']
+ORDER_FIELDS = ['user_id', 'payment_method', 'total', 'item_count', 'idempotency_key', 'created_at']
+CHECKOUT_FIELDS = ['order_id', 'user_id', 'course_id', 'price', 'payment_method', 'created_at']
+
+
+def generate_users(start, count, password, now):
+    for number in range(start, start + count):
+        yield (f'seed_user_{number}', f'user{number}@seed.example.com', password, '', '',
+               False, False, True, now)
+
+
+# (user, course) pairs without duplicates, total rows spread evenly over the users
+# Each user gets a run of consecutive courses from a random starting point (wrapping around):
+# distinct by construction and one random number per user instead of one per row
+def _user_course_pairs(rng, user_ids, course_ids, total):
+    per_user, extra = divmod(total, len(user_ids))
+    doubled = course_ids + course_ids
+    for index, user_id in enumerate(user_ids):
+        wanted = min(per_user + (1 if index < extra else 0), len(course_ids))
+        start = rng.randrange(len(course_ids))
+        for course_id in doubled[start:start + wanted]:
+            yield user_id, course_id
+
+
+def generate_favorites(rng, user_ids, course_ids, count):
+    return _user_course_pairs(rng, user_ids, course_ids, count)
+
+
+def generate_carts(rng, user_ids, course_ids, count, now):
+    for user_id, course_id in _user_course_pairs(rng, user_ids, course_ids, count):
+        yield user_id, course_id, now
+
+
+# Orders are inserted first (their ids are needed), then their items: the order plan
+# (user, payment method, courses) is drawn once and shared by both inserts
+def plan_orders(rng, user_ids, course_ids, count):
+    for _ in range(count):
+        yield (
+            rng.choice(user_ids),
+            rng.choice(PAYMENT_METHODS),
+            rng.sample(course_ids, rng.randint(1, min(MAX_ORDER_ITEMS, len(course_ids)))),
+        )
+
+
+# ---- insertion ----
+
+# For the duration of a seed (SQLite): no foreign key checks, no fsync at commit
+# Must run outside a transaction (SQLite ignores PRAGMA foreign_keys inside one). A crash in
+# between can lose the last commits, which only matters for this throwaway data
+@contextlib.contextmanager
+def bulk_load_mode():
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        synchronous = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+    try:
+        with connection.constraint_checks_disabled():
+            yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
+
+
+# Non-unique indexes of a model's table are dropped while its rows are inserted and rebuilt in
+# one sorted pass afterwards (SQLite only: their CREATE statements are read back from
+# sqlite_master). Unique indexes stay, they guard the data.
+# The rebuild reads the whole table, so it only pays off when at least as many rows are added
+# as the table already has (roughly: its highest id); otherwise the indexes stay live.
+@contextlib.contextmanager
+def deferred_indexes(model, new_rows):
+    if connection.vendor != 'sqlite' or new_rows < _last_id(model):
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s "
+            "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%'",
+            [model._meta.db_table],
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+# The course search index (search.py) is not maintained row by row during the course insert
+# SQLite: the FTS triggers are dropped, and the new rows (ids >= first_new_id) are indexed with
+# one INSERT ... SELECT afterwards, so existing courses are not re-indexed on every run.
+# Postgres: the GIN indexes are dropped and rebuilt.
+@contextlib.contextmanager
+def deferred_search_index(first_new_id):
+    if connection.vendor != 'sqlite':
+        uninstall_search_index(connection)
+        try:
+            yield
+        finally:
+            install_search_index(connection)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        exists = cursor.fetchone() is not None
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+    try:
+        yield
+    finally:
+        if exists:
+            columns = ', '.join(SEARCH_COLUMNS)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}(rowid, {columns}) "
+                    f"SELECT id, {columns} FROM {Course._meta.db_table} WHERE id >= %s",
+                    [first_new_id],
+                )
+        # Triggers back (and a full build when the FTS table did not exist)
+        install_search_index(connection)
+
+
+# Most values one statement may bind (SQLITE_MAX_VARIABLE_NUMBER of the linked SQLite, which
+# Django's max_query_params understates as 999)
+def max_query_variables():
+    if connection.vendor == 'sqlite':
+        connection.ensure_connection()
+        return connection.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    return connection.features.max_query_params or 65535
+
+
+# Insert a stream of value tuples (in the order of fields) with multi-row INSERTs of up to
+# batch_size rows, one transaction per chunk, the table's non-unique indexes deferred when
+# expected (the number of rows in the stream) makes it worth it. Returns the number of rows
+def insert_rows(model, fields, rows, expected, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(model._meta.get_field(f).column) for f in fields)
+    # The raw DB-API cursor takes the driver's own placeholders
+    placeholder = '?' if connection.vendor == 'sqlite' else '%s'
+    row_sql = f"({', '.join([placeholder] * len(fields))})"
+    insert_sql = f"INSERT INTO {table} ({columns}) VALUES "
+    per_statement = max(1, min(batch_size, max_query_variables() // len(fields)))
+    full_sql = insert_sql + ', '.join([row_sql] * per_statement)
+
+    inserted = 0
+    rows = iter(rows)
+    with deferred_indexes(model, expected):
+        connection.ensure_connection()
+        # Raw cursor: Django's wrapper would log every statement with its thousands of parameters
+        cursor = connection.connection.cursor()
+        try:
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    for start in range(0, len(chunk), per_statement):
+                        batch = chunk[start:start + per_statement]
+                        sql = full_sql if len(batch) == per_statement else insert_sql + ', '.join([row_sql] * len(batch))
+                        cursor.execute(sql, list(itertools.chain.from_iterable(batch)))
+                inserted += len(chunk)
+        finally:
+            cursor.close()
+    return inserted
+
+
+# Highest primary key of a table (0 when empty); rows inserted afterwards have larger ids
+def _last_id(model):
+    return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+# Ids of the rows inserted after last_id, in insertion order
+def _ids_after(model, last_id):
+    return list(model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True))
+
+
+# Generate and insert a dataset. counts → rows per model (keys of SCALE_UNIT, missing = 0)
+# progress(name, rows, seconds) is called after each model
+# Returns {model: rows} plus 'seconds' and 'rows_per_second'
+def seed_dataset(counts, seed=42, batch_size=BATCH_SIZE, progress=None):
+    with bulk_load_mode():
+        return _seed_dataset(counts, seed, batch_size, progress)
+
+
+def _seed_dataset(counts, seed, batch_size, progress):
+    rng = random.Random(seed)
+    counts = {name: counts.get(name, 0) for name in SCALE_UNIT}
+    # Every generated timestamp is "now", converted to database form once
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    result = {}
+    started = time.perf_counter()
+
+    def step(name, insert):
+        step_started = time.perf_counter()
+        result[name] = insert()
+        if progress:
+            progress(name, result[name], time.perf_counter() - step_started)
+
+    # Generated rows are numbered from the highest existing id + 1 (unique usernames / emails):
+    # an earlier run's row number N always has an id >= N, so numbers never repeat across runs,
+    # which counting the rows did not guarantee once some had been deleted
+    images = media_names('instructors')
+    videos = media_names('course_videos')
+    last_instructor = _last_id(Instructor)
+    step('instructors', lambda: insert_rows(Instructor, INSTRUCTOR_FIELDS, generate_instructors(
+        rng, last_instructor + 1, counts['instructors'], images, now,
+    ), counts['instructors'], batch_size))
+    instructor_ids = (
+        _ids_after(Instructor, last_instructor) or list(Instructor.objects.values_list('id', flat=True))
+    )
+    # Updating the search index row by row (triggers) is slower than the inserts themselves
+    last_course = _last_id(Course)
+    with deferred_search_index(last_course + 1):
+        step('courses', lambda: insert_rows(Course, COURSE_FIELDS, generate_courses(
+            rng, last_course + 1, counts['courses'], instructor_ids, videos, now,
+        ), counts['courses'], batch_size))
+    course_ids = _ids_after(Course, last_course) or list(Course.objects.values_list('id', flat=True))
+    prices = dict(Course.objects.filter(id__in=course_ids).values_list('id', 'price'))
+    # Database form of each price, converted once instead of once per purchased item
+    price_values = {course_id: str(price) for course_id, price in prices.items()}
+
+    # Users share one precomputed password hash
+    password = SEED_PASSWORD_HASH
+    last_user = _last_id(User)
+    step('users', lambda: insert_rows(
+        User, USER_FIELDS, generate_users(last_user + 1, counts['users'], password, now), counts['users'], batch_size,
+    ))
+    user_ids = _ids_after(User, last_user)
+
+    if user_ids and course_ids:
+        step('favorites', lambda: insert_rows(
+            Favorite, FAVORITE_FIELDS, generate_favorites(rng, user_ids, course_ids, counts['favorites']),
+            counts['favorites'], batch_size,
+        ))
+        step('carts', lambda: insert_rows(
+            Cart, CART_FIELDS, generate_carts(rng, user_ids, course_ids, counts['carts'], now), counts['carts'],
+            batch_size,
+        ))
+
+        plan = list(plan_orders(rng, user_ids, course_ids, counts['orders']))
+        last_order = _last_id(Order)
+        step('orders', lambda: insert_rows(Order, ORDER_FIELDS, (
+            (user_id, payment_method, str(sum((prices[c] for c in courses), Decimal('0'))), len(courses), '', now)
+            for user_id, payment_method, courses in plan
+        ), len(plan), batch_size))
+        order_ids = _ids_after(Order, last_order)
+        step('checkouts', lambda: insert_rows(Checkout, CHECKOUT_FIELDS, (
+            (order_id, user_id, course_id, price_values[course_id], payment_method, now)
+            for order_id, (user_id, payment_method, courses) in zip(order_ids, plan)
+            for course_id in courses
+        ), sum(len(courses) for _, _, courses in plan), batch_size))
+
+    # Raw INSERTs send no signals → tell every worker the catalog changed
+    # (the version stamps live in the shared cache, so the bump made by this command reaches them)
+    bump_version('catalog')
+    bump_atomic_version('autocomplete')
+
+    seconds = time.perf_counter() - started
+    rows = sum(result.values())
+    result['seconds'] = round(seconds, 3)
+    result['rows_per_second'] = round(rows / seconds) if seconds else rows
+    return result
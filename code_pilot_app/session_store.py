@@ -0,0 +1,73 @@
+# code_pilot_app/session_store.py
+
+# session engine (settings.SESSION_ENGINE): cached_db that skips saves which change nothing
+
+# Sessions hold what authentication needs (the user id and hash, 'admin_verified'); transient UI
+# state lives in signed cookies (ui_state.py, flash messages). They are read from the cache
+# (settings.SESSION_CACHE_ALIAS, shared by the workers) and only fall back to the database when
+# the cache misses, so a logged-in page view costs no session query.
+
+# Any assignment marks a Django session as modified, and SessionMiddleware then rewrites the
+# row, even when the assigned value was already there (request.session['admin_verified'] = True
+# on every login / verification). This store remembers the serialized data it loaded and turns
+# a save of the same data into a no-op. Comparing the serialized data, not the assignments, also
+# keeps the "mutate a list, assign it back" idiom working. New sessions and key changes
+# (login() cycles the key) are always saved.
+
+# login() also cycles the key before adding the user to the session, which used to cost an
+# INSERT of the new row (without the user) and an UPDATE right after. cycle_key() only drops the
+# old row here; the new one is created once, with the final data, when the response saves it.
+
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    def _snapshot(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._loaded_snapshot = self._snapshot(data)
+        return data
+
+    async def aload(self):
+        data = await super().aload()
+        self._loaded_snapshot = self._snapshot(data)
+        return data
+
+    # True when saving would write back exactly what was loaded
+    def _unchanged(self, must_create):
+        if must_create or self.session_key is None or not hasattr(self, '_session_cache'):
+            return False
+        return getattr(self, '_loaded_snapshot', None) == self._snapshot(self._session_cache)
+
+    def save(self, must_create=False):
+        if self._unchanged(must_create):
+            return
+        super().save(must_create)
+        self._loaded_snapshot = self._snapshot(self._session)
+
+    def cycle_key(self):
+        data = self._session
+        key = self.session_key
+        # No key → the next save() creates the row under a new one
+        self._session_key = None
+        self._session_cache = data
+        self.modified = True
+        if key:
+            self.delete(key)
+
+    async def acycle_key(self):
+        data = await self._aget_session()
+        key = self.session_key
+        self._session_key = None
+        self._session_cache = data
+        self.modified = True
+        if key:
+            await self.adelete(key)
+
+    async def asave(self, must_create=False):
+        if self._unchanged(must_create):
+            return
+        await super().asave(must_create)
+        self._loaded_snapshot = self._snapshot(self._session)
@@ -0,0 +1,101 @@
+# code_pilot_app/signals.py
+
+# model signal receivers that keep the in-memory / cached copies of catalog, cart and favorites
+# data fresh
+# (connected in apps.CodePilotAppConfig.ready)
+
+# Work is deferred with transaction.on_commit so other workers never reload before the
+# change is visible in the database (and nothing happens at all if the transaction rolls back)
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import autocomplete
+from .faststart import faststart_stored_file
+from .cart import invalidate_cart_summary
+from .favorites import invalidate_favorite_ids
+from .images import build_stored_image_variants
+from .models import Cart, Course, Favorite, Instructor
+from .versions import bump_version
+
+
+# Catalog data changed → every cache keyed by the 'catalog' version goes stale at once
+def catalog_changed():
+    bump_version('catalog')
+
+
+# A course was created or edited → update the autocomplete index and expire catalog caches
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, **kwargs):
+    course_id, name = instance.id, instance.course_name
+    transaction.on_commit(lambda: autocomplete.course_saved(course_id, name))
+    transaction.on_commit(catalog_changed)
+
+
+# A new promo video file is about to be stored (not yet committed to the storage)
+@receiver(pre_save, sender=Course)
+def course_video_uploading(sender, instance, **kwargs):
+    video = instance.promo_video
+    instance._promo_video_uploaded = bool(video) and not video._committed
+
+
+# ... and once stored, its moov box is moved to the front so browsers can start playing at once
+@receiver(post_save, sender=Course)
+def course_video_uploaded(sender, instance, **kwargs):
+    if getattr(instance, '_promo_video_uploaded', False):
+        instance._promo_video_uploaded = False
+        name = instance.promo_video.name
+        transaction.on_commit(lambda: faststart_stored_file(name))
+
+
+# A course was deleted → drop it from the autocomplete index and expire catalog caches
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    course_id = instance.id
+    transaction.on_commit(lambda: autocomplete.course_deleted(course_id))
+    transaction.on_commit(catalog_changed)
+
+
+# A new (or removed) profile image makes the old variants wrong: show the original until the
+# new ones are built
+@receiver(pre_save, sender=Instructor)
+def instructor_image_uploading(sender, instance, **kwargs):
+    image = instance.profile_image
+    instance._profile_image_uploaded = bool(image) and not image._committed
+    if instance._profile_image_uploaded or not image:
+        instance.profile_image_variants = {}
+
+
+# ... and once the upload is stored, build the resized WebP / JPEG variants (images.py)
+@receiver(post_save, sender=Instructor)
+def instructor_image_uploaded(sender, instance, **kwargs):
+    if getattr(instance, '_profile_image_uploaded', False):
+        instance._profile_image_uploaded = False
+        name = instance.profile_image.name
+        transaction.on_commit(lambda: build_stored_image_variants(name))
+
+
+# An instructor was created, edited or deleted → expire catalog caches
+@receiver(post_save, sender=Instructor)
+@receiver(post_delete, sender=Instructor)
+def instructor_changed(sender, instance, **kwargs):
+    transaction.on_commit(catalog_changed)
+
+
+# A cart row was added or removed (also the rows deleted with their Course or User: having a
+# receiver makes Django send the signal for cascaded rows too) → rebuild that user's summary
+# (checkout empties the cart without these signals and refreshes the summary once, see orders.py)
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def cart_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_cart_summary(user_id))
+
+
+# A favorite was added or removed (cascaded deletes included) → reload that user's favorite ids
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_favorite_ids(user_id))
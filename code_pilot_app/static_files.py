@@ -0,0 +1,37 @@
+# code_pilot_app/static_files.py
+
+# WhiteNoise middleware usable by both the WSGI and the ASGI handler
+
+# whitenoise.middleware.WhiteNoiseMiddleware is sync only. Under ASGI one sync middleware makes
+# Django run the rest of the chain, async views included, through async_to_sync in a thread per
+# request, which undoes what the async AJAX views (async_views.py) are for. This subclass is
+# async capable: the lookup of a static file is a dict lookup, and only opening the file for
+# the response goes to a thread.
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # DEBUG: looks the file up on disk
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
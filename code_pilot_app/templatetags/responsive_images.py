@@ -0,0 +1,56 @@
+# code_pilot_app/templatetags/responsive_images.py
+
+# {% load responsive_images %}
+# {% instructor_image instructor sizes="(max-width: 700px) 100vw, 25vw" %}
+
+# Renders an instructor's profile image as
+#   <picture>
+#     <source type="image/webp" srcset="...-160.webp 160w, ...-320.webp 320w" sizes="...">
+#     <img src="...-320.jpg" srcset="...-160.jpg 160w, ...-320.jpg 320w" sizes="..." width=".." height="..">
+#   </picture>
+# from the derivatives built by images.py, so the browser picks the smallest file for the size
+# the image is shown at (sizes = its CSS width in each layout) and reserves its space up front.
+# Works with model instances and catalog snapshot records; before the variants exist it falls
+# back to a plain <img> of the original upload. Renders nothing for a course without an
+# instructor (None) or an instructor without an image.
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from code_pilot_app.images import VARIANT_FORMATS, variant_name
+
+
+register = template.Library()
+
+
+def _srcset(variants, extension):
+    return ', '.join(
+        f"{default_storage.url(variant_name(variants['hash'], width, extension))} {width}w"
+        for width in variants['widths']
+    )
+
+
+@register.simple_tag
+def instructor_image(instructor, sizes='100vw', alt=None, lazy=True):
+    image = instructor.profile_image if instructor is not None else None
+    if not image:
+        return ''
+    alt = instructor.name if alt is None else alt
+    loading = 'lazy' if lazy else 'eager'
+    variants = instructor.profile_image_variants
+    if not variants:
+        return format_html('<img src="{}" alt="{}" loading="{}" decoding="async">', image.url, alt, loading)
+
+    # Largest variant as src (browsers without srcset), with the original's aspect ratio
+    largest = variants['widths'][-1]
+    height = round(variants['height'] * largest / variants['width'])
+    sources = format_html(
+        '<source type="image/webp" srcset="{}" sizes="{}">', _srcset(variants, VARIANT_FORMATS[0][0]), sizes,
+    )
+    fallback = VARIANT_FORMATS[1][0]
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="{}" decoding="async"></picture>',
+        sources, default_storage.url(variant_name(variants['hash'], largest, fallback)),
+        _srcset(variants, fallback), sizes, largest, height, alt, loading,
+    )
@@ -1,3 +1,1370 @@
-from django.test import TestCase
+import os
+import sqlite3
+import struct
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, router
+from django.forms.models import model_to_dict
+from django.http import Http404, HttpResponse
+from django.db.models.query import QuerySet
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import path, resolve, reverse
+
+from . import async_views, autocomplete, cart, catalog, catalog_cache, faststart, images, urls, versions
+from .db_router import ReplicaRoutingMiddleware, read_from_primary, replica_settings
+from .caching import LRUCache
+from .context_processors import favorites_processor, global_data
+from .favorites import get_favorite_course_ids
+from .cart import EMPTY_CART, get_cart_summary, invalidate_cart_summary
+from .management.commands.sync_replica import copy_sqlite_database
+from .media import RangeNotSatisfiable, parse_range
+from .models import Cart, Checkout, ContactMessage, Course, Favorite, Instructor, Order
+from .orders import checkout_cart, clean_idempotency_key, new_idempotency_key
+from .pagination import decode_cursor, encode_cursor, keyset_paginate
+from .search import cached_suggestions, search_courses
+from .session_store import SessionStore
+from .querycount import (
+    QueryBudgetExceeded, QueryRecorder, assert_query_budget, count_session_writes, query_budget_settings,
+)
+from .query_budgets import QUERY_BUDGETS
+from .templatetags.responsive_images import instructor_image
+from .ui_state import SALT as UI_STATE_SALT, UIStateMiddleware, open_modal, pending_modal
+
+
+# ---- fixtures ----
+
+def make_instructor(number):
+    return Instructor.objects.create(
+        name=f'Instructor {number}', profession='Engineer', about='About', email=f'instructor{number}@example.com',
+        phone_no='0000000000', rating=4.5,
+    )
+
+
+def make_course(number, instructor=None, **fields):
+    values = {
+        'course_name': f'Course {number}', 'short_description': 'Short', 'long_description': 'Long',
+        'category': 'full_stack', 'learning_outcomes': 'Outcomes', 'price': Decimal('100.00'),
+        'instructor': instructor, 'duration': '10 weeks', 'students_enrolled': 10, 'language': 'English',
+        'certification': 'Yes', 'rating': 4.0, 'technologies_covered': 'Python', 'old_price': Decimal('150.00'),
+        'discount_percent': 33, 'level': 'Beginner',
+    }
+    values.update(fields)
+    return Course.objects.create(**values)
+
+
+# Forget every cached copy (caches, per-process versions, catalog snapshot, autocomplete index):
+# the database is rolled back after each test, these are not, and on_commit receivers never
+# run inside a TestCase
+def reset_caches():
+    for cache in caches.all():
+        cache.clear()
+    versions._local_versions.clear()
+    catalog._snapshot = None
+    autocomplete._index = None
+
+
+class CodePilotTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        reset_caches()
+
+
+# ---- query budgets (querycount.py, query_budgets.py) ----
+
+class QueryBudgetTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = make_instructor(1)
+        cls.courses = [make_course(number, cls.instructor) for number in range(8)]
+        cls.user = User.objects.create_user('student', password='pw')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def catalog_urls(self):
+        return [
+            reverse('index'),
+            reverse('courses'),
+            reverse('courses') + '?category=full_stack',
+            reverse('courses') + '?level=Beginner',
+            reverse('course_detail', args=[self.courses[0].id]),
+            reverse('instructor_detail', args=[self.instructor.id]),
+            reverse('instructors'),
+        ]
+
+    # Number of queries of a request on cold caches
+    def cold_query_count(self, url):
+        reset_caches()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return assert_query_budget(response).count
+
+    def test_runner_raises_on_budget_violations(self):
+        self.assertEqual(query_budget_settings()['MODE'], 'raise')
+        with mock.patch.dict(QUERY_BUDGETS, {'view_cart': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('view_cart'))
+
+    def test_catalog_pages_logged_in(self):
+        for url in self.catalog_urls():
+            with self.subTest(url=url):
+                self.cold_query_count(url)
+
+    def test_catalog_pages_anonymous(self):
+        self.client.logout()
+        for url in self.catalog_urls():
+            with self.subTest(url=url):
+                self.cold_query_count(url)
+
+    def test_cart_page_queries_do_not_grow_with_the_cart(self):
+        for course in self.courses[:2]:
+            Cart.objects.create(user=self.user, course=course)
+        small = self.cold_query_count(reverse('view_cart'))
+        for course in self.courses[2:]:
+            Cart.objects.create(user=self.user, course=course)
+        self.assertEqual(self.cold_query_count(reverse('view_cart')), small)
+
+    def test_order_history_queries_do_not_grow_with_the_orders(self):
+        def buy(courses):
+            for course in courses:
+                Cart.objects.create(user=self.user, course=course)
+            checkout_cart(self.user, 'upi')
+
+        buy(self.courses[:3])
+        small = self.cold_query_count(reverse('checkout_history'))
+        for start in range(0, 8, 2):
+            buy(self.courses[start:start + 2])
+        self.assertEqual(self.cold_query_count(reverse('checkout_history')), small)
+
+
+# ---- course search (search.py) ----
+
+class SearchTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = make_course(1, course_name='Python Full Stack', technologies_covered='Python, Django')
+        cls.data = make_course(2, course_name='Data Science', technologies_covered='Python, Pandas')
+        cls.devops = make_course(
+            3, course_name='DevOps', technologies_covered='Docker', short_description='Kubernetes in production',
+        )
+
+    def test_name_prefixes_come_first_then_ranked_index_matches(self):
+        self.assertEqual(search_courses('pyth'), [
+            (self.python.id, 'Python Full Stack'), (self.data.id, 'Data Science'),
+        ])
+
+    def test_index_matches_description_and_every_word(self):
+        self.assertEqual(search_courses('kube'), [(self.devops.id, 'DevOps')])
+        self.assertEqual(search_courses('python pandas'), [(self.data.id, 'Data Science')])
+        self.assertEqual(search_courses('python rust'), [])
+
+    def test_enough_name_prefixes_skip_the_database(self):
+        autocomplete.get_index()
+        with self.assertNumQueries(0):
+            self.assertEqual(search_courses('python', limit=1), [(self.python.id, 'Python Full Stack')])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(search_courses('  '), [])
+        self.assertEqual(search_courses('"kube*" ('), [(self.devops.id, 'DevOps')])
+
+    def test_suggestions_are_cached_per_catalog_version(self):
+        self.assertEqual(cached_suggestions('Kube')[1], 'MISS')
+        self.assertEqual(cached_suggestions('  kube ')[1], 'HIT-LOCAL')
+        versions.bump_version('catalog')
+        versions._local_versions.clear()
+        results, status = cached_suggestions('kube')
+        self.assertEqual((results, status), ([(self.devops.id, 'DevOps')], 'MISS'))
+
+    def test_search_redirect_lands_on_the_best_match(self):
+        response = self.client.get(reverse('search_course_redirect'), {'q': 'data'})
+        self.assertRedirects(response, reverse('course_detail', args=[self.data.id]), fetch_redirect_response=False)
+        response = self.client.get(reverse('search_course_redirect'), {'q': 'nothing'})
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+
+
+# ---- autocomplete index (autocomplete.py, versions.py) ----
+
+class AutocompleteTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = make_course(1, course_name='Python Full Stack')
+        cls.java = make_course(2, course_name='Java Full Stack')
+
+    def names(self, query):
+        return [name for _, name in autocomplete.suggest(query, 10)]
+
+    def test_prefix_and_later_word_matches(self):
+        self.assertEqual(self.names('pyt'), ['Python Full Stack'])
+        self.assertEqual(self.names('full st'), ['Python Full Stack', 'Java Full Stack'])
+        self.assertEqual(self.names('  '), [])
+
+    def test_own_change_is_applied_in_place(self):
+        index = autocomplete.get_index()
+        course = make_course(3, course_name='Rust Basics')
+        autocomplete.course_saved(course.id, course.course_name)
+        self.assertIs(autocomplete.get_index(), index)
+        self.assertEqual(self.names('rust'), ['Rust Basics'])
+
+    def test_change_by_another_worker_in_between_forces_a_rebuild(self):
+        autocomplete.get_index()
+        # Another worker adds a course and bumps the version before our own change lands
+        other = make_course(3, course_name='Go Basics')
+        versions.bump_atomic_version(autocomplete.VERSION_NAME)
+        ours = make_course(4, course_name='Rust Basics')
+        autocomplete.course_saved(ours.id, ours.course_name)
+        self.assertIsNone(autocomplete._index)
+        self.assertEqual(self.names('go'), [other.course_name])
+        self.assertEqual(self.names('rust'), [ours.course_name])
+
+    def test_atomic_bumps_do_not_depend_on_the_cache(self):
+        first = versions.bump_atomic_version('test')
+        # A flushed (or stale) shared cache must not hand out the same number twice
+        caches['shared'].clear()
+        self.assertEqual(versions.get_atomic_version('test'), first)
+        self.assertEqual(versions.bump_atomic_version('test'), first + 1)
+        self.assertEqual(versions.bump_atomic_version('test'), first + 2)
+
+
+# ---- LRU cache with TTL (caching.py) ----
+
+class LRUCacheTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        clock = mock.patch('code_pilot_app.caching.time.monotonic', lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # Reading 'a' makes 'b' the least recently used
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        # Setting an existing key refreshes it too
+        cache.set('a', 10)
+        cache.set('d', 4)
+        self.assertEqual((cache.get('a'), cache.get('c'), cache.get('d')), (10, None, 4))
+
+    def test_entries_expire_after_ttl(self):
+        cache = LRUCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        self.now += 59.9
+        self.assertEqual(cache.get('a'), 1)
+        # Reads do not extend the lifetime
+        self.now += 0.1
+        self.assertEqual(cache.get('a', 'gone'), 'gone')
+        self.assertEqual(len(cache), 0)
+
+    def test_cached_falsy_values_are_hits(self):
+        cache = LRUCache()
+        cache.set('empty', [])
+        cache.set('none', None)
+        self.assertEqual(cache.get('empty', 'missing'), [])
+        self.assertIsNone(cache.get('none', 'missing'))
+        self.assertEqual(cache.get('other', 'missing'), 'missing')
+        self.assertEqual(cache.stats(), {'size': 2, 'hits': 2, 'misses': 1, 'hit_rate': 2 / 3})
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+# ---- catalog lists and lazy context processors (catalog_cache.py, context_processors.py) ----
+
+@override_settings(CATALOG_SNAPSHOT_ENABLED=False)
+class CatalogCacheTests(CodePilotTestCase):
+    # Another worker changed the catalog (and this worker's copy of the version has expired)
+    def catalog_changed(self):
+        versions.bump_version('catalog')
+        versions._local_versions.clear()
+
+    def test_lists_are_cached_per_catalog_version(self):
+        first = make_course(1)
+        with self.assertNumQueries(1):
+            self.assertEqual(catalog_cache.featured_courses(), [first])
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog_cache.featured_courses(), [first])
+        second = make_course(2)
+        self.catalog_changed()
+        with self.assertNumQueries(1):
+            self.assertEqual(catalog_cache.featured_courses(), [first, second])
+
+    def test_empty_catalog_last_modified_is_cached(self):
+        with self.assertNumQueries(2):
+            self.assertIsNone(catalog_cache.last_modified())
+        with self.assertNumQueries(0):
+            self.assertIsNone(catalog_cache.last_modified())
+
+    def test_instructor_stats(self):
+        instructor = make_instructor(1)
+        make_course(1, instructor, students_enrolled=10, rating=4.0)
+        make_course(2, instructor, students_enrolled=30, rating=5.0)
+        stats = catalog_cache.instructor_stats(instructor.id)
+        self.assertEqual((stats.course_count, stats.students_enrolled, stats.average_rating), (2, 40, 4.5))
+        with self.assertNumQueries(0):
+            catalog_cache.instructor_stats(instructor.id)
+
+    def test_context_processors_are_lazy(self):
+        make_course(1)
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_user('lazy', password='pw')
+        with self.assertNumQueries(0):
+            context = {**global_data(request), **favorites_processor(request)}
+        # Each value is fetched when a template reads it, once
+        with self.assertNumQueries(1):
+            self.assertEqual(len(context['allcourses']), 1)
+            self.assertEqual(len(context['allcourses']), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(context['favorite_count'], 0)
+
+
+# ---- catalog snapshot (catalog.py) ----
+
+@override_settings(CATALOG_SNAPSHOT_ENABLED=True)
+class CatalogSnapshotTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = make_instructor(1)
+        cls.courses = [
+            make_course(number, cls.instructor if number % 2 else None, category=category, rating=rating)
+            for number, (category, rating) in enumerate(
+                [('full_stack', 4.0), ('data_science', 5.0), ('full_stack', 3.0), ('full_stack', 4.0), ('data_science', 3.0)]
+            )
+        ]
+
+    def ids(self, page):
+        return [course.id for course in page.object_list]
+
+    def test_snapshot_is_built_with_two_queries_and_indexed(self):
+        with self.assertNumQueries(2):
+            snapshot = catalog.get_snapshot()
+        self.assertEqual([course.id for course in snapshot.courses], [course.id for course in self.courses])
+        record = snapshot.courses_by_id[self.courses[1].id]
+        self.assertEqual((record.course_name, record.get_category_display()), ('Course 1', 'Data Science'))
+        self.assertIs(record.instructor, snapshot.instructors_by_id[self.instructor.id])
+        self.assertIsNone(snapshot.courses_by_id[self.courses[0].id].instructor)
+        self.assertEqual([c.id for c in snapshot.category_courses('data_science')], [self.courses[1].id, self.courses[4].id])
+        self.assertEqual(snapshot.category_courses('unknown'), ())
+        self.assertEqual(snapshot.instructor_stats[self.instructor.id], catalog.InstructorStats(2, 20, 4.5))
+        self.assertEqual(snapshot.last_modified, max(course.updated_at for course in self.courses + [self.instructor]))
+
+    def test_snapshot_is_reused_until_the_version_moves_or_it_gets_old(self):
+        snapshot = catalog.get_snapshot()
+        with self.assertNumQueries(0):
+            self.assertIs(catalog.get_snapshot(), snapshot)
+        versions.bump_version('catalog')
+        versions._local_versions.clear()
+        rebuilt = catalog.get_snapshot()
+        self.assertIsNot(rebuilt, snapshot)
+        with self.settings(CATALOG_SNAPSHOT_MAX_AGE=0):
+            self.assertIsNot(catalog.get_snapshot(), rebuilt)
+
+    # (ids, next cursor) of every page of course_page(), following the cursors
+    def all_pages(self, filters):
+        pages, cursor = [], None
+        while True:
+            page = catalog.course_page(filters, cursor, 2)
+            pages.append((self.ids(page), page.next_cursor))
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_pages_match_the_database_pages(self):
+        for filters in ({}, {'category': 'full_stack'}):
+            with self.subTest(filters=filters):
+                snapshot_pages = self.all_pages(filters)
+                with self.settings(CATALOG_SNAPSHOT_ENABLED=False):
+                    self.assertEqual(snapshot_pages, self.all_pages(filters))
+        self.assertEqual(len(self.all_pages({})), 3)
+        self.assertEqual(self.ids(catalog.instructor_course_page(self.instructor.id, None, 10)),
+                         [self.courses[1].id, self.courses[3].id])
+
+    def test_bad_or_stale_cursors(self):
+        records = catalog.get_snapshot().courses
+        self.assertEqual(self.ids(catalog._snapshot_page(records, 'garbage', 2)), [c.id for c in self.courses[:2]])
+        # A cursor past the last course (it was deleted meanwhile) → empty last page
+        page = catalog._snapshot_page(records, encode_cursor([self.courses[-1].id]), 2)
+        self.assertEqual((page.object_list, page.next_cursor), ([], None))
+
+    def test_missing_records_are_404(self):
+        with self.assertRaises(Http404):
+            catalog.get_course_or_404(0)
+        with self.assertRaises(Http404):
+            catalog.get_instructor_or_404(0)
+        self.assertEqual(catalog.get_course_or_404(self.courses[0].id).id, self.courses[0].id)
+
+
+# ---- keyset pagination (pagination.py) ----
+
+class KeysetPaginationTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = make_instructor(1)
+        # Prices repeat, so ordering by price alone is not total: ties are broken on id
+        cls.courses = [
+            make_course(
+                number, instructor, price=Decimal(['10.00', '20.00', '30.00'][number % 3]),
+                level='Beginner' if number % 2 else 'Advanced',
+            )
+            for number in range(11)
+        ]
+
+    # Every row of queryset, following the cursors page by page → (ids, number of pages)
+    def walk(self, queryset, ordering, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            page = keyset_paginate(queryset, ordering, cursor=cursor, page_size=page_size)
+            ids += [row.id for row in page]
+            pages += 1
+            if not page.has_next:
+                return ids, pages
+            cursor = page.next_cursor
+
+    def test_cursor_round_trip(self):
+        values = [Decimal('19.99'), 'Beginner', 42]
+        cursor = encode_cursor(values)
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor, 3), ['19.99', 'Beginner', 42])
+
+    def test_garbage_and_tampered_cursors_are_ignored(self):
+        for cursor in ['', None, '!!!', 'not base64 at all', encode_cursor([1, 2]), 'eyJhIjogMX0']:
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor, 1))
+        # Well-formed cursor carrying values the field cannot take → first page
+        first = keyset_paginate(Course.objects.all(), ('id',), page_size=4)
+        for cursor in [encode_cursor(['abc']), encode_cursor([None]), encode_cursor([{'id': 1}]), 'garbage']:
+            with self.subTest(cursor=cursor):
+                page = keyset_paginate(Course.objects.all(), ('id',), cursor=cursor, page_size=4)
+                self.assertEqual([row.id for row in page], [row.id for row in first])
+
+    def test_every_row_once_in_order(self):
+        ids, pages = self.walk(Course.objects.all(), ('id',), 4)
+        self.assertEqual(ids, sorted(course.id for course in self.courses))
+        self.assertEqual(pages, 3)
+
+    def test_ties_are_broken_on_id(self):
+        for ordering in [('price', 'id'), ('-price', '-id'), ('price', '-id')]:
+            with self.subTest(ordering=ordering):
+                # Page sizes that split groups of equal prices across pages
+                for page_size in (1, 2, 4):
+                    ids, _ = self.walk(Course.objects.all(), ordering, page_size)
+                    self.assertEqual(ids, list(Course.objects.order_by(*ordering).values_list('id', flat=True)))
+
+    def test_cursor_with_filters(self):
+        beginner = Course.objects.filter(level='Beginner')
+        ids, _ = self.walk(beginner, ('-price', 'id'), 2)
+        self.assertEqual(ids, list(beginner.order_by('-price', 'id').values_list('id', flat=True)))
+
+    def test_courses_page_keeps_filters_across_pages(self):
+        url = reverse('courses')
+        seen = []
+        query = 'level=Beginner'
+        with mock.patch('code_pilot_app.views.COURSES_PAGE_SIZE', 2):
+            while query:
+                response = self.client.get(f'{url}?{query}')
+                self.assertEqual(response.status_code, 200)
+                seen += [course.id for course in response.context['all_courses']]
+                query = response.context['next_query']
+                if query:
+                    self.assertIn('level=Beginner', query)
+        self.assertEqual(seen, sorted(course.id for course in self.courses if course.level == 'Beginner'))
+
+
+# ---- anonymous page cache (page_cache.py) ----
+
+class AnonymousPageCacheTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = make_instructor(1)
+        for number in range(3):
+            make_course(number, instructor, level='Beginner')
+
+    def get(self, query):
+        response = self.client.get(f"{reverse('courses')}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_entries_live_in_their_own_cache(self):
+        self.assertEqual(self.get('level=Beginner')['X-Page-Cache'], 'MISS')
+        self.assertEqual(len(caches['pages']._cache), 1)
+        self.assertEqual(len(caches['default']._cache.keys() & caches['pages']._cache.keys()), 0)
+
+    def test_unknown_params_and_their_order_do_not_make_new_entries(self):
+        self.assertEqual(self.get('level=Beginner&language=English')['X-Page-Cache'], 'MISS')
+        for query in [
+            'language=English&level=Beginner',
+            'level=Beginner&language=English&utm_source=mail&fbclid=123',
+            'level=Intermediate&level=Beginner&language=English',
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(self.get(query)['X-Page-Cache'], 'HIT')
+        self.assertEqual(len(caches['pages']._cache), 1)
+
+    def test_view_does_not_see_dropped_params(self):
+        with mock.patch('code_pilot_app.views.COURSES_PAGE_SIZE', 1):
+            response = self.get('level=Beginner&utm_source=mail')
+        self.assertIn('level=Beginner', response.context['next_query'])
+        self.assertNotIn('utm_source', response.context['next_query'])
+
+    def test_different_filters_are_different_pages(self):
+        self.get('level=Beginner')
+        self.assertEqual(self.get('level=Advanced')['X-Page-Cache'], 'MISS')
+
+    def test_overlong_values_are_not_cached(self):
+        response = self.get('after=' + 'x' * 500)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertEqual(len(caches['pages']._cache), 0)
+
+
+# ---- cart summary (cart.py) ----
+
+class CartSummaryTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.courses = [make_course(number, price=Decimal('10.00')) for number in range(3)]
+        cls.user = User.objects.create_user('shopper', password='pw')
+
+    def test_summary_follows_cart_changes(self):
+        self.assertEqual(get_cart_summary(self.user), EMPTY_CART)
+        with self.captureOnCommitCallbacks(execute=True):
+            Cart.objects.create(user=self.user, course=self.courses[0])
+        summary = get_cart_summary(self.user)
+        self.assertEqual((summary.count, summary.total), (1, Decimal('10.00')))
+        self.assertEqual(summary.course_ids, {self.courses[0].id})
+
+    def test_summary_loaded_during_a_change_is_never_served(self):
+        Cart.objects.create(user=self.user, course=self.courses[0])
+        load = cart._load_cart_summary
+
+        # The cart changes (and is invalidated) while this request still holds the old rows
+        def load_then_change(user_id):
+            summary = load(user_id)
+            Cart.objects.create(user=self.user, course=self.courses[1])
+            invalidate_cart_summary(user_id)
+            return summary
+
+        with mock.patch.object(cart, '_load_cart_summary', load_then_change):
+            self.assertEqual(get_cart_summary(self.user).count, 1)
+        self.assertEqual(get_cart_summary(self.user).count, 2)
+
+    def test_checkout_refreshes_the_summary_once(self):
+        for course in self.courses:
+            Cart.objects.create(user=self.user, course=course)
+        self.assertEqual(get_cart_summary(self.user).count, 3)
+        with mock.patch.object(cart, 'bump_version', wraps=versions.bump_version) as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                checkout_cart(self.user, 'card')
+        bump.assert_called_once_with(f'cart:{self.user.id}')
+        self.assertEqual(get_cart_summary(self.user), EMPTY_CART)
+
+
+# ---- checkout (orders.py) ----
+
+class CheckoutTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = make_instructor(1)
+        cls.courses = [
+            make_course(number, instructor, price=Decimal(price))
+            for number, price in enumerate(['10.00', '20.50', '30.25'])
+        ]
+        cls.user = User.objects.create_user('buyer', password='pw')
+
+    def fill_cart(self):
+        for course in self.courses:
+            Cart.objects.create(user=self.user, course=course)
+
+    def test_cart_becomes_one_order_and_is_emptied(self):
+        self.fill_cart()
+        result = checkout_cart(self.user, 'card', 'key-1')
+        self.assertFalse(result.duplicate)
+        order = result.order
+        self.assertEqual(order.total, Decimal('60.75'))
+        self.assertEqual(order.item_count, 3)
+        self.assertEqual(
+            sorted(Checkout.objects.filter(order=order).values_list('course_id', flat=True)),
+            sorted(course.id for course in self.courses),
+        )
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+    def test_single_course_when_the_cart_is_empty(self):
+        result = checkout_cart(self.user, 'upi', single_course=self.courses[1])
+        self.assertEqual(result.order.total, Decimal('20.50'))
+        self.assertEqual(result.order.item_count, 1)
+
+    def test_empty_cart_buys_nothing(self):
+        result = checkout_cart(self.user, 'upi', 'key-1')
+        self.assertIsNone(result.order)
+        self.assertFalse(result.duplicate)
+        self.assertFalse(Order.objects.exists())
+
+    def test_same_key_again_is_a_duplicate(self):
+        self.fill_cart()
+        checkout_cart(self.user, 'card', 'key-1')
+        # The form is submitted again after the user re-added a course
+        Cart.objects.create(user=self.user, course=self.courses[0])
+        result = checkout_cart(self.user, 'card', 'key-1')
+        self.assertTrue(result.duplicate)
+        self.assertIsNone(result.order)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        # The duplicate leaves the cart alone
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 1)
+
+    def test_different_keys_are_separate_orders(self):
+        self.fill_cart()
+        checkout_cart(self.user, 'card', 'key-1')
+        Cart.objects.create(user=self.user, course=self.courses[0])
+        self.assertIsNotNone(checkout_cart(self.user, 'card', 'key-2').order)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 2)
+
+    def test_lost_race_on_the_key_is_a_duplicate(self):
+        checkout_cart(self.user, 'card', 'key-1', single_course=self.courses[0])
+        self.fill_cart()
+        # A concurrent submission inserted its Order between our check and our insert:
+        # the check sees nothing, the unique constraint rejects the insert
+        with mock.patch.object(QuerySet, 'exists', return_value=False):
+            result = checkout_cart(self.user, 'card', 'key-1')
+        self.assertTrue(result.duplicate)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        # Rolled back: no items of the losing order, the cart is untouched
+        self.assertEqual(Checkout.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 3)
+
+    def test_integrity_error_without_a_key_is_raised(self):
+        with mock.patch.object(Order.objects, 'create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                checkout_cart(self.user, 'card', single_course=self.courses[0])
+
+    def test_idempotency_key_is_cleaned(self):
+        self.assertEqual(clean_idempotency_key(None), '')
+        self.assertEqual(clean_idempotency_key('  abc  '), 'abc')
+        self.assertEqual(len(clean_idempotency_key('x' * 100)), 64)
+        self.assertNotEqual(new_idempotency_key(), new_idempotency_key())
+
+
+# ---- conditional GET (conditional.py) ----
+
+class ConditionalResponseTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = make_course(1)
+        cls.user = User.objects.create_user('visitor', password='pw')
+
+    def setUp(self):
+        super().setUp()
+        # The first visit sets the CSRF cookie, which is part of the page ETag
+        self.course_page()
+
+    def course_page(self, **headers):
+        return self.client.get(reverse('course_detail', args=[self.course.id]), headers=headers)
+
+    # Another worker changed the catalog (and this worker's copy of the version has expired)
+    def catalog_changed(self):
+        versions.bump_version('catalog')
+        versions._local_versions.clear()
+
+    def test_anonymous_page_revalidates_with_etag_and_last_modified(self):
+        response = self.course_page()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        for headers in ({'If-None-Match': response['ETag']}, {'If-Modified-Since': response['Last-Modified']}):
+            with self.subTest(headers=headers):
+                cached = self.course_page(**headers)
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached.content, b'')
+        self.assertEqual(self.course_page(If_None_Match='"old"').status_code, 200)
+
+    def test_etag_changes_with_the_catalog(self):
+        etag = self.course_page()['ETag']
+        self.catalog_changed()
+        response = self.course_page(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_on_login(self):
+        etag = self.course_page()['ETag']
+        self.client.force_login(self.user)
+        # (login rotates the CSRF cookie, the next visit picks it up)
+        self.course_page()
+        response = self.course_page(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        # Personal page: no Last-Modified, not stored by shared caches
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.course_page(If_None_Match=response['ETag']).status_code, 304)
+
+    def test_cart_snippet_etag_changes_with_the_cart(self):
+        self.client.force_login(self.user)
+        url = reverse('load_cart_snippet')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        Cart.objects.create(user=self.user, course=self.course)
+        invalidate_cart_summary(self.user.id)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_search_suggestions_are_publicly_cacheable(self):
+        url = reverse('search_suggestions')
+        response = self.client.get(url, {'q': 'course'})
+        self.assertNotIn('private', response['Cache-Control'])
+        self.assertEqual(self.client.get(url, {'q': 'course'}, headers={'If-None-Match': response['ETag']}).status_code, 304)
+        self.catalog_changed()
+        self.assertEqual(self.client.get(url, {'q': 'course'}, headers={'If-None-Match': response['ETag']}).status_code, 200)
+
+
+# ---- uploaded media with Range support (media.py) ----
+
+class MediaTests(CodePilotTestCase):
+    DATA = bytes(range(26))
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        os.makedirs(os.path.join(media_root.name, 'videos'))
+        with open(os.path.join(media_root.name, 'videos', 'promo.mp4'), 'wb') as f:
+            f.write(self.DATA)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def get(self, path='videos/promo.mp4', **headers):
+        response = self.client.get(f'/media/{path}', headers=headers)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=2-5', 26), (2, 5))
+        self.assertEqual(parse_range('bytes=20-', 26), (20, 25))
+        self.assertEqual(parse_range('bytes=20-100', 26), (20, 25))
+        self.assertEqual(parse_range('bytes=-4', 26), (22, 25))
+        self.assertEqual(parse_range('bytes=-100', 26), (0, 25))
+        for header in ('bytes=0-1,4-5', 'bytes=5-2', 'items=0-1', 'bytes=-', 'bytes=a-b'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 26))
+        for header, size in (('bytes=26-', 26), ('bytes=-0', 26), ('bytes=-5', 0)):
+            with self.subTest(header=header, size=size), self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, size)
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.DATA)
+        self.assertEqual(response['Content-Length'], '26')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertNotIn('Content-Range', response)
+
+    def test_range_is_partial_content(self):
+        response = self.get(Range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/26')
+        self.assertEqual(response['Content-Length'], '4')
+        self.assertEqual(self.body(response), self.DATA[2:6])
+
+    def test_suffix_range(self):
+        response = self.get(Range='bytes=-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 22-25/26')
+        self.assertEqual(self.body(response), self.DATA[-4:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range='bytes=26-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */26')
+
+    def test_multiple_or_invalid_ranges_send_the_whole_file(self):
+        for header in ('bytes=0-1,4-5', 'bytes=5-2', 'items=0-1'):
+            with self.subTest(header=header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.body(response), self.DATA)
+
+    def test_if_range_with_an_old_etag_sends_the_whole_file(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(Range='bytes=2-5', If_Range=etag).status_code, 206)
+        self.assertEqual(self.get(Range='bytes=2-5', If_Range='"old"').status_code, 200)
+
+    def test_revalidation_is_not_modified(self):
+        response = self.get()
+        for headers in ({'If-None-Match': response['ETag']}, {'If-Modified-Since': response['Last-Modified']}):
+            with self.subTest(headers=headers):
+                cached = self.get(**headers)
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached['ETag'], response['ETag'])
+                self.assertEqual(cached.content, b'')
+        self.assertEqual(self.get(If_None_Match='"old"').status_code, 200)
+
+    def test_head_sends_the_headers_only(self):
+        response = self.client.head('/media/videos/promo.mp4', headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response.content, b'')
+
+    def test_paths_outside_media_root_are_not_found(self):
+        # The 404 page shows the catalog header: build it first, serve_media itself has no queries
+        catalog.get_snapshot()
+        for path in ('../manage.py', 'videos/../../manage.py', '/etc/passwd', 'videos', 'videos/missing.mp4'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+
+    def test_x_accel_redirect_mode(self):
+        with self.settings(MEDIA_SERVING={'MODE': 'x-accel-redirect'}):
+            response = self.get(Range='bytes=2-5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/videos/promo.mp4')
+        self.assertEqual(response.content, b'')
+
+
+# ---- MP4 faststart (faststart.py) ----
+
+def mp4_box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+# Chunk offset table of one track
+def mp4_offsets_box(offsets, box_type=b'stco'):
+    code = 'Q' if box_type == b'co64' else 'I'
+    return mp4_box(box_type, b'\0\0\0\0' + struct.pack(f'>I{len(offsets)}{code}', len(offsets), *offsets))
+
+
+# ftyp, mdat (the chunks), moov at the end with one track per table type
+# (its stco / co64 offsets point at the chunks)
+# chunks[trailing:] (when given) go in a second mdat after moov, as some muxers write them
+def mp4_file(chunks, table_types=(b'stco',), moov_first=False, trailing=None):
+    ftyp = mp4_box(b'ftyp', b'isom\0\0\0\0isom')
+    tracks_for = lambda offsets: b''.join(
+        mp4_box(b'trak', mp4_box(b'mdia', mp4_box(b'minf', mp4_box(b'stbl', mp4_offsets_box(offsets, box_type)))))
+        for box_type in table_types
+    )
+    moov_size = len(mp4_box(b'moov', mp4_box(b'mvhd', bytes(100)) + tracks_for([0] * len(chunks))))
+    leading = chunks if trailing is None else chunks[:trailing]
+    if moov_first:
+        data_start = len(ftyp) + moov_size + 8
+    else:
+        data_start = len(ftyp) + 8
+    offsets, position = [], data_start
+    for index, chunk in enumerate(chunks):
+        if index == len(leading):
+            # Skip the moov and the header of the second mdat
+            position += moov_size + 8
+        offsets.append(position)
+        position += len(chunk)
+    moov = mp4_box(b'moov', mp4_box(b'mvhd', bytes(100)) + tracks_for(offsets))
+    mdat = mp4_box(b'mdat', b''.join(leading))
+    if moov_first:
+        return ftyp + moov + mdat
+    if trailing is None:
+        return ftyp + mdat + moov
+    return ftyp + mdat + moov + mp4_box(b'mdat', b''.join(chunks[trailing:]))
+
+
+# [(table type, offsets)] of every chunk offset table, in file order
+def mp4_tables(data):
+    tables = []
+    position = 0
+    while position < len(data):
+        size, box_type = struct.unpack_from('>I4s', data, position)
+        payload = data[position + 8:position + size]
+        if box_type in faststart.CONTAINER_BOXES:
+            tables += mp4_tables(payload)
+        elif box_type in (b'stco', b'co64'):
+            count = struct.unpack_from('>I', payload, 4)[0]
+            code = 'Q' if box_type == b'co64' else 'I'
+            tables.append((box_type, list(struct.unpack_from(f'>{count}{code}', payload, 8))))
+        position += size
+    return tables
+
+
+def mp4_top_level(data):
+    types = []
+    position = 0
+    while position < len(data):
+        size, box_type = struct.unpack_from('>I4s', data, position)
+        types.append(box_type)
+        position += size
+    return types
+
+
+class FaststartTests(SimpleTestCase):
+    chunks = [b'frame-one', b'frame-two!!', b'3' * 40]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'promo.mp4')
+
+    def write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    # Every table's offsets point at the chunks, in order
+    def assert_offsets_point_at_chunks(self, data):
+        for box_type, offsets in mp4_tables(data):
+            with self.subTest(table=box_type):
+                self.assertEqual(
+                    [data[offset:offset + len(chunk)] for offset, chunk in zip(offsets, self.chunks)],
+                    self.chunks,
+                )
+
+    def test_moov_is_moved_and_offsets_follow_the_chunks(self):
+        original = mp4_file(self.chunks, table_types=(b'stco', b'co64'))
+        self.assert_offsets_point_at_chunks(original)
+        self.write(original)
+        self.assertTrue(faststart.needs_faststart(self.path))
+
+        self.assertEqual(faststart.make_faststart(self.path), faststart.REWRITTEN)
+        data = self.read()
+        self.assertEqual(mp4_top_level(data), [b'ftyp', b'moov', b'mdat'])
+        self.assertEqual(len(data), len(original))
+        self.assertEqual([box_type for box_type, _ in mp4_tables(data)], [b'stco', b'co64'])
+        self.assert_offsets_point_at_chunks(data)
+        self.assertFalse(faststart.needs_faststart(self.path))
+
+    def test_already_faststart_file_is_left_alone(self):
+        original = mp4_file(self.chunks, moov_first=True)
+        self.assert_offsets_point_at_chunks(original)
+        self.write(original)
+        self.assertFalse(faststart.needs_faststart(self.path))
+        self.assertEqual(faststart.make_faststart(self.path), faststart.ALREADY_FASTSTART)
+        self.assertEqual(self.read(), original)
+
+    # Offsets that no longer fit in 32 bits once moved: the stco table becomes a co64 table
+    # (a real case needs a file over 4 GB, so the shift is applied to the moov payload directly)
+    def test_overflowing_stco_is_widened_to_co64(self):
+        stbl = mp4_box(b'stbl', mp4_offsets_box([100, 0xFFFFFFF0]))
+        shift = lambda offset: offset + 0x100
+
+        with self.assertRaises(faststart._OffsetOverflow):
+            faststart._patch_boxes(stbl, shift, False)
+        widened = faststart._patch_boxes(stbl, shift, True)
+        self.assertEqual(mp4_tables(widened), [(b'co64', [0x164, 0x1000000F0])])
+        self.assertEqual(len(widened), len(stbl) + 2 * 4)
+
+    def test_widened_moov_keeps_offsets_pointing_at_the_chunks(self):
+        original = mp4_file(self.chunks)
+        self.write(original)
+        # Force the co64 retry of make_faststart() as if the first pass had overflowed
+        real_patch = faststart._patch_boxes
+
+        def overflow_unless_widened(data, adjust, widen):
+            if not widen:
+                raise faststart._OffsetOverflow
+            return real_patch(data, adjust, widen)
+
+        with mock.patch.object(faststart, '_patch_boxes', overflow_unless_widened):
+            self.assertEqual(faststart.make_faststart(self.path), faststart.REWRITTEN)
+        data = self.read()
+        self.assertEqual([box_type for box_type, _ in mp4_tables(data)], [b'co64'])
+        self.assertEqual(len(data), len(original) + len(self.chunks) * 4)
+        self.assert_offsets_point_at_chunks(data)
+
+    # Media data after moov moves only by how much moov grew (here: by the co64 widening)
+    def test_media_data_after_moov_keeps_its_offsets(self):
+        for widen in (False, True):
+            with self.subTest(widen=widen):
+                original = mp4_file(self.chunks, trailing=2)
+                self.assert_offsets_point_at_chunks(original)
+                self.write(original)
+                real_patch = faststart._patch_boxes
+
+                def overflow_unless_widened(data, adjust, widen_tables):
+                    if widen and not widen_tables:
+                        raise faststart._OffsetOverflow
+                    return real_patch(data, adjust, widen_tables)
+
+                with mock.patch.object(faststart, '_patch_boxes', overflow_unless_widened):
+                    self.assertEqual(faststart.make_faststart(self.path), faststart.REWRITTEN)
+                data = self.read()
+                self.assertEqual(mp4_top_level(data), [b'ftyp', b'moov', b'mdat', b'mdat'])
+                self.assertEqual(len(data), len(original) + (len(self.chunks) * 4 if widen else 0))
+                self.assert_offsets_point_at_chunks(data)
+
+    def test_not_an_mp4(self):
+        self.write(mp4_box(b'ftyp', b'isom') + mp4_box(b'free', b'x' * 10))
+        with self.assertRaises(faststart.FaststartError):
+            faststart.make_faststart(self.path)
+
+
+# ---- instructor images (images.py, templatetags/responsive_images.py) ----
+
+class InstructorImageTests(CodePilotTestCase):
+    def test_course_without_instructor(self):
+        course = make_course(1, None)
+        self.assertEqual(instructor_image(None), '')
+        for snapshot in (True, False):
+            with self.subTest(snapshot=snapshot), self.settings(CATALOG_SNAPSHOT_ENABLED=snapshot):
+                reset_caches()
+                response = self.client.get(reverse('course_detail', args=[course.id]))
+                self.assertEqual(response.status_code, 200)
+
+    def test_instructor_without_image(self):
+        self.assertEqual(instructor_image(make_instructor(1)), '')
+
+    def test_decompression_bomb_is_skipped(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        os.makedirs(os.path.join(media_root.name, 'instructors'))
+        buffer = BytesIO()
+        Image.new('RGB', (400, 400)).save(buffer, 'PNG')
+        with open(os.path.join(media_root.name, 'instructors', 'bomb.png'), 'wb') as f:
+            f.write(buffer.getvalue())
+
+        # 160000 pixels, more than twice the limit → DecompressionBombError (not an OSError)
+        with override_settings(MEDIA_ROOT=media_root.name), mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000):
+            with self.assertLogs('code_pilot_app.images', 'WARNING'):
+                self.assertIsNone(images.build_stored_image_variants('instructors/bomb.png'))
+
+
+# ---- async AJAX views (async_views.py) ----
+
+# The URLconf urls.py builds under ASGI (ASYNC_AJAX_VIEWS): the AJAX endpoints are async_views
+class AsyncAjaxUrls:
+    urlpatterns = [
+        path(str(pattern.pattern), getattr(async_views, pattern.name), name=pattern.name)
+        if hasattr(async_views, pattern.name)
+        else pattern
+        for pattern in urls.urlpatterns
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncAjaxUrls)
+class AsyncAjaxViewTests(CodePilotTestCase):
+    AJAX = {'X-Requested-With': 'XMLHttpRequest'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = make_course(1, course_name='Async Python')
+        cls.user = User.objects.create_user('async', password='pw')
+        cls.other = User.objects.create_user('other', password='pw')
+
+    def setUp(self):
+        super().setUp()
+        self.async_client.force_login(self.user)
+
+    # Django renders the error pages of async views in another thread, whose connection cannot
+    # read the test transaction: load everything the 404 page shows into the caches first
+    def warm_error_page(self):
+        get_cart_summary(self.user)
+        get_favorite_course_ids(self.user)
+        catalog.get_snapshot()
+
+    def test_urls_point_to_the_async_views(self):
+        self.assertIs(
+            resolve(reverse('add_to_cart', args=[1]), urlconf=AsyncAjaxUrls).func, async_views.add_to_cart,
+        )
+
+    async def test_add_to_cart(self):
+        await sync_to_async(self.warm_error_page)()
+        response = await self.async_client.post(reverse('add_to_cart', args=[0]), headers=self.AJAX)
+        self.assertEqual(response.status_code, 404)
+        # (no on_commit receiver drops the warmed summary inside a TestCase)
+        reset_caches()
+        url = reverse('add_to_cart', args=[self.course.id])
+        response = await self.async_client.post(url, headers=self.AJAX)
+        self.assertEqual(response.json(), {'status': 'success', 'added': True, 'count': 1})
+        response = await self.async_client.post(url, headers=self.AJAX)
+        self.assertEqual(response.json(), {'status': 'success', 'added': False, 'count': 1})
+        self.assertEqual(await Cart.objects.filter(user=self.user).acount(), 1)
+        # Without AJAX: back to the course page
+        response = await self.async_client.post(url)
+        self.assertRedirects(response, reverse('course_detail', args=[self.course.id]), fetch_redirect_response=False)
+
+    async def test_remove_from_cart(self):
+        item = await Cart.objects.acreate(user=self.user, course=self.course)
+        others = await Cart.objects.acreate(user=self.other, course=self.course)
+        response = await self.async_client.post(reverse('remove_from_cart', args=[item.id]), headers=self.AJAX)
+        self.assertEqual(response.json(), {'status': 'success', 'count': 0, 'total': '0'})
+        self.assertFalse(await Cart.objects.filter(id=item.id).aexists())
+        # Somebody else's cart row
+        await sync_to_async(self.warm_error_page)()
+        response = await self.async_client.post(reverse('remove_from_cart', args=[others.id]), headers=self.AJAX)
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(await Cart.objects.filter(id=others.id).aexists())
+
+    async def test_favorites(self):
+        toggle = reverse('toggle_favorite', args=[self.course.id])
+        self.assertEqual((await self.async_client.post(toggle, headers=self.AJAX)).json(), {'status': 'added'})
+        self.assertEqual((await self.async_client.post(toggle, headers=self.AJAX)).json(), {'status': 'removed'})
+        self.assertFalse(await Favorite.objects.filter(user=self.user).aexists())
+
+        await Favorite.objects.acreate(user=self.user, course=self.course)
+        remove = reverse('remove_from_favorites', args=[self.course.id])
+        self.assertEqual((await self.async_client.post(remove, headers=self.AJAX)).json(), {'status': 'success'})
+        self.assertEqual((await self.async_client.post(remove, headers=self.AJAX)).json(), {'status': 'not_found'})
+
+    async def test_logged_out_visitors_are_sent_home(self):
+        await self.async_client.alogout()
+        response = await self.async_client.post(reverse('add_to_cart', args=[self.course.id]), headers=self.AJAX)
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.assertFalse(await Cart.objects.aexists())
+
+    async def test_cart_snippet_and_revalidation(self):
+        await Cart.objects.acreate(user=self.user, course=self.course)
+        url = reverse('load_cart_snippet')
+        response = await self.async_client.get(url)
+        self.assertIn('Async Python', response.json()['html'])
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_search_suggestions(self):
+        url = reverse('search_suggestions')
+        response = await self.async_client.get(url, {'q': 'async'})
+        self.assertEqual(response.json(), [{'id': self.course.id, 'name': 'Async Python'}])
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = await self.async_client.get(url, {'q': 'Async'})
+        self.assertEqual(response['X-Cache'], 'HIT-LOCAL')
+
+
+# ---- read replica routing (db_router.py, sync_replica) ----
+
+class ReadReplicaTests(CodePilotTestCase):
+    # Second SQLite alias 'replica', added here rather than in settings so the test runner does not
+    # create a test database for it (settings.DATABASES is the dict behind connections, so the
+    # alias exists for both)
+    @classmethod
+    def setUpClass(cls):
+        cls.databases = {DEFAULT_DB_ALIAS, 'replica'}
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        settings.DATABASES['replica'] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict, 'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+        }
+        cls.addClassCleanup(cls.remove_replica)
+        with connections['replica'].schema_editor() as editor:
+            for model in (User, Instructor, Course):
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def remove_replica(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del settings.DATABASES['replica']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = make_course(1, course_name='Primary course')
+        cls.user = User.objects.create_user('reader', password='pw')
+        # The same course under another name on the replica: every read shows which database answered
+        Course.objects.using('replica').bulk_create([
+            Course(**{**model_to_dict(cls.course, exclude=['instructor']), 'course_name': 'Replica course'}),
+        ])
+
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+
+    # Run view inside ReplicaRoutingMiddleware → (response, the request's routing decisions)
+    def route(self, view, method='get', cookies=None):
+        request = getattr(self.factory, method)('/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaRoutingMiddleware(view)(request)
+        return response, request.db_routing.by_alias()
+
+    def course_name(self):
+        return Course.objects.get(id=self.course.id).course_name
+
+    def test_anonymous_and_catalog_reads_go_to_the_replica(self):
+        def view(request):
+            User.objects.count()
+            return HttpResponse(self.course_name())
+
+        response, decisions = self.route(view)
+        self.assertEqual(response.content, b'Replica course')
+        self.assertEqual(decisions, {'replica': {'anonymous': 1, 'catalog': 1}})
+
+        # With a session: the user's own rows come from the primary, the catalog still from the replica
+        response, decisions = self.route(view, cookies={settings.SESSION_COOKIE_NAME: 'x'})
+        self.assertEqual(response.content, b'Replica course')
+        self.assertEqual(decisions, {'default': {'session': 1}, 'replica': {'catalog': 1}})
+
+    def test_unsafe_methods_and_rebuilds_read_the_primary(self):
+        response, decisions = self.route(lambda request: HttpResponse(self.course_name()), method='post')
+        self.assertEqual((response.content, decisions), (b'Primary course', {'default': {'unsafe-method': 1}}))
+
+        def rebuild(request):
+            with read_from_primary():
+                return HttpResponse(self.course_name())
+
+        response, decisions = self.route(rebuild)
+        self.assertEqual((response.content, decisions), (b'Primary course', {'default': {'rebuild': 1}}))
+
+    def test_write_pins_the_visitor_to_the_primary(self):
+        def add_to_cart(request):
+            Cart.objects.create(user=self.user, course=self.course)
+            return HttpResponse(self.course_name())
+
+        response, decisions = self.route(add_to_cart, method='post')
+        # The rest of the request reads its own write ...
+        self.assertEqual(response.content, b'Primary course')
+        self.assertEqual(list(decisions), ['default'])
+        self.assertIn('write', decisions['default'])
+        # ... and the cookie keeps the next requests on the primary until the replica caught up
+        options = replica_settings()
+        cookie = response.cookies[options['STICKY_COOKIE']]
+        self.assertEqual(cookie['max-age'], options['STICKY_SECONDS'])
+        response, decisions = self.route(lambda request: HttpResponse(self.course_name()),
+                                         cookies={cookie.key: cookie.value})
+        self.assertEqual((response.content, decisions), (b'Primary course', {'default': {'pinned': 1}}))
+        # An expired or broken cookie does not pin
+        for value in ('1', 'garbage'):
+            response, _ = self.route(lambda request: HttpResponse(self.course_name()), cookies={cookie.key: value})
+            self.assertEqual(response.content, b'Replica course')
+
+    def test_write_outside_the_sticky_models_sets_no_cookie(self):
+        def contact(request):
+            ContactMessage.objects.create(name='n', email='n@example.com', message='m')
+            return HttpResponse(self.course_name())
+
+        response, _ = self.route(contact, method='post')
+        self.assertEqual(response.content, b'Primary course')
+        self.assertFalse(response.cookies)
+
+    def test_outside_a_request_everything_uses_the_primary(self):
+        self.assertEqual(self.course_name(), 'Primary course')
+        self.assertEqual(router.db_for_write(Course), DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate('replica', 'code_pilot_app'))
+
+    def test_sync_replica_copies_atomically(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source, target = os.path.join(directory.name, 'primary.sqlite3'), os.path.join(directory.name, 'replica.sqlite3')
+        with sqlite3.connect(source) as primary:
+            primary.execute('CREATE TABLE course (name TEXT)')
+            primary.execute("INSERT INTO course VALUES ('new')")
+        primary.close()
+        with sqlite3.connect(target) as replica:
+            replica.execute('CREATE TABLE course (name TEXT)')
+            replica.execute("INSERT INTO course VALUES ('old')")
+        replica.close()
+
+        with mock.patch('os.replace', wraps=os.replace) as replace:
+            copy_sqlite_database(source, target)
+        # Written next to the replica, then swapped in whole
+        temp_path, replaced = replace.call_args.args
+        self.assertEqual((os.path.dirname(temp_path), replaced), (directory.name, target))
+        self.assertEqual(sorted(os.listdir(directory.name)), ['primary.sqlite3', 'replica.sqlite3'])
+        with sqlite3.connect(target) as replica:
+            self.assertEqual(replica.execute('SELECT name FROM course').fetchall(), [('new',)])
+            self.assertEqual(replica.execute('PRAGMA journal_mode').fetchone(), ('delete',))
+        replica.close()
+
+
+# ---- session writes and UI state cookies (session_store.py, ui_state.py) ----
+
+class SessionWriteTests(CodePilotTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('member', email='member@example.com', password='pw')
+
+    # Number of INSERT / UPDATE / DELETE statements on the session table run by action()
+    def session_writes(self, action):
+        with QueryRecorder() as recorder:
+            action()
+        return count_session_writes(recorder.queries)
+
+    def test_unchanged_session_is_not_saved(self):
+        session = SessionStore()
+        session['admin_verified'] = True
+        session['courses'] = [1]
+        self.assertEqual(self.session_writes(session.save), 1)
+
+        again = SessionStore(session.session_key)
+        # Assigning the value it already has changes nothing
+        again['admin_verified'] = True
+        self.assertEqual(self.session_writes(again.save), 0)
+        # "Mutate a list, assign it back" is still a change
+        courses = again['courses']
+        courses.append(2)
+        again['courses'] = courses
+        self.assertEqual(self.session_writes(again.save), 1)
+        self.assertEqual(SessionStore(session.session_key)['courses'], [1, 2])
+
+    def test_page_views_and_failed_logins_write_no_session(self):
+        bad_login = {'identifier': 'member', 'password': 'wrong'}
+        self.assertEqual(self.session_writes(lambda: self.client.post(reverse('login'), bad_login)), 0)
+
+        # login() cycles the key and adds the user: still one INSERT, of the final data
+        self.assertEqual(self.session_writes(
+            lambda: self.client.post(reverse('login'), {'identifier': 'member', 'password': 'pw'}),
+        ), 1)
+        session = SessionStore(self.client.cookies[settings.SESSION_COOKIE_NAME].value)
+        self.assertEqual(session['_auth_user_id'], str(self.user.id))
+        self.assertIs(session['admin_verified'], True)
+        self.assertEqual(self.session_writes(lambda: self.client.get(reverse('index'))), 0)
+        self.assertEqual(self.session_writes(lambda: self.client.get(reverse('courses'))), 0)
+
+    def test_modal_cookie_is_shown_once(self):
+        response = self.client.post(reverse('login'), {'identifier': 'nobody', 'password': 'pw'})
+        cookie = response.cookies['open_modal']
+        self.assertTrue(cookie.value)
+        self.assertTrue(cookie['httponly'])
+        response = self.client.get(reverse('index'))
+        self.assertEqual(response.context['open_modal'], 'login')
+        self.assertEqual(response.cookies['open_modal']['max-age'], 0)
+        self.assertIsNone(self.client.get(reverse('index')).context['open_modal'])
+
+
+class UIStateTests(SimpleTestCase):
+    # Cookies the UIStateMiddleware sets when the view calls open_modal(request, name)
+    def modal_cookies(self, name):
+        request = RequestFactory().post('/')
+
+        def view(request):
+            open_modal(request, name)
+            return HttpResponse()
+
+        return UIStateMiddleware(view)(request).cookies
+
+    def pending(self, value):
+        request = RequestFactory().get('/')
+        request.COOKIES['open_modal'] = value
+        return pending_modal(request)
+
+    def test_signed_cookie_round_trip(self):
+        for name in ('login', 'register'):
+            with self.subTest(name=name):
+                self.assertEqual(self.pending(self.modal_cookies(name)['open_modal'].value), name)
+        self.assertIsNone(pending_modal(RequestFactory().get('/')))
+
+    def test_tampered_cookie_is_ignored(self):
+        value = self.modal_cookies('login')['open_modal'].value
+        self.assertIsNone(self.pending('register' + value[len('login'):]))
+        self.assertIsNone(self.pending(value[:-1]))
+        self.assertIsNone(self.pending('login'))
+        # Correctly signed, but not a modal the templates know
+        response = HttpResponse()
+        response.set_signed_cookie('open_modal', 'admin', salt=UI_STATE_SALT)
+        self.assertIsNone(self.pending(response.cookies['open_modal'].value))
+
+    def test_cancel_and_unknown_modals(self):
+        request = RequestFactory().get('/', HTTP_COOKIE='open_modal=x')
+
+        def view(request):
+            open_modal(request, None)
+            return HttpResponse()
+
+        self.assertEqual(UIStateMiddleware(view)(request).cookies['open_modal']['max-age'], 0)
+        with self.assertRaises(ValueError):
+            open_modal(request, 'admin')
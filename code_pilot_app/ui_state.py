@@ -0,0 +1,96 @@
+# code_pilot_app/ui_state.py
+
+# transient UI state in a signed cookie instead of the session
+
+# After a failed login / register (or a successful register) the next page reopens the login or
+# register modal. That used to be request.session['open_modal'], so every such form post, most
+# of them from anonymous visitors, created or rewrote a row of the session table. It now travels
+# in a small signed cookie (tampering is detected, nothing is stored server side):
+#   views          → open_modal(request, 'login') / open_modal(request, None)
+#   page_cache.py  → pending_modal(request), to skip the cached page while a modal is pending
+#   templates      → {{ open_modal }} (context_processors.open_modal_processor)
+# The modal opens once: UIStateMiddleware deletes the cookie from the response of the page that
+# showed it (like flash messages), and an unused one expires after MAX_AGE seconds.
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+# Defaults, overridden by settings.UI_STATE
+UI_STATE_DEFAULTS = {
+    'COOKIE': 'open_modal',
+    # seconds a modal stays pending when no page is shown in between
+    'MAX_AGE': 300,
+}
+
+MODALS = {'login', 'register'}
+SALT = 'code_pilot_app.ui_state'
+
+# request attribute names (set by the views / the context processor)
+PENDING_ATTR = '_ui_open_modal'
+SHOWN_ATTR = '_ui_modal_shown'
+
+
+def ui_state_settings():
+    return {**UI_STATE_DEFAULTS, **getattr(settings, 'UI_STATE', {})}
+
+
+# The next page opens this modal ('login' / 'register'; None cancels a pending one)
+def open_modal(request, name):
+    if name is not None and name not in MODALS:
+        raise ValueError(f"Unknown modal {name!r}")
+    setattr(request, PENDING_ATTR, name)
+
+
+# Modal the current page has to open, None when there is none (a bad signature counts as none)
+def pending_modal(request):
+    options = ui_state_settings()
+    if options['COOKIE'] not in request.COOKIES:
+        return None
+    name = request.get_signed_cookie(options['COOKIE'], default=None, salt=SALT, max_age=options['MAX_AGE'])
+    return name if name in MODALS else None
+
+
+# Same, for a page that shows it: the cookie is deleted from this response
+def take_modal(request):
+    name = pending_modal(request)
+    if name is not None:
+        setattr(request, SHOWN_ATTR, True)
+    return name
+
+
+# ---- middleware ----
+
+class UIStateMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._finish(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._finish(request, await self.get_response(request))
+
+    def _finish(self, request, response):
+        options = ui_state_settings()
+        cookie = options['COOKIE']
+        if hasattr(request, PENDING_ATTR):
+            name = getattr(request, PENDING_ATTR)
+            if name is not None:
+                response.set_signed_cookie(
+                    cookie, name, salt=SALT, max_age=options['MAX_AGE'],
+                    secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+                )
+                return response
+        elif not getattr(request, SHOWN_ATTR, False):
+            return response
+        if cookie in request.COOKIES:
+            response.delete_cookie(cookie, samesite='Lax')
+        return response
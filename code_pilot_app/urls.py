@@ -1,8 +1,12 @@
 from django.contrib import admin
-from django.urls import path
-from code_pilot_app import views
+import re
+from django.urls import path, re_path
+from code_pilot_app import async_views, media, views
 from django.conf import settings
-from django.conf.urls.static import static
+
+# AJAX endpoints: async versions under ASGI (see ASYNC_AJAX_VIEWS in settings.py)
+ajax_views = async_views if settings.ASYNC_AJAX_VIEWS else views
+
 urlpatterns = [
     # path('admin/', admin.site.urls),
     path('',views.index,name='index'),
@@ -15,17 +19,17 @@ urlpatterns = [
     path('instructor/<int:instructor_id>/', views.instructor_detail, name='instructor_detail'),
     path('instructors', views.instructors, name='instructors'),
     path('cart/', views.view_cart, name='view_cart'),
-    path('cart/add/<int:course_id>/', views.add_to_cart, name='add_to_cart'),
-    path('cart/remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
-    path("cart/load_snippet/", views.load_cart_snippet, name="load_cart_snippet"),
+    path('cart/add/<int:course_id>/', ajax_views.add_to_cart, name='add_to_cart'),
+    path('cart/remove/<int:item_id>/', ajax_views.remove_from_cart, name='remove_from_cart'),
+    path("cart/load_snippet/", ajax_views.load_cart_snippet, name="load_cart_snippet"),
     path('checkout/', views.checkout, name='checkout'),
     path('checkout-history/', views.checkout_history, name='checkout_history'),
-    path('favorite/toggle/<int:course_id>/', views.toggle_favorite, name='toggle_favorite'),
+    path('favorite/toggle/<int:course_id>/', ajax_views.toggle_favorite, name='toggle_favorite'),
     path('favorites/', views.view_favorites, name='view_favorites'),
-    path('favorites/remove/<int:course_id>/', views.remove_from_favorites, name='remove_from_favorites'),
+    path('favorites/remove/<int:course_id>/', ajax_views.remove_from_favorites, name='remove_from_favorites'),
     path('about_us/',views.about_us,name='about_us'),
     path('contact_us/',views.contact_us,name='contact_us'),
-    path('search_suggestions/', views.search_suggestions, name='search_suggestions'),
+    path('search_suggestions/', ajax_views.search_suggestions, name='search_suggestions'),
     path('search_course/', views.search_course_redirect, name='search_course_redirect'),
     path('courses/', views.courses, name='courses'),
     path('subscribe/', views.subscribe_email, name='subscribe_email'),
@@ -33,6 +37,11 @@ urlpatterns = [
     path('payment-failed/', views.payment_failed, name='payment_failed'),
 ]   
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Uploaded media (course videos, instructor photos) with HTTP Range support, in every
+# environment (see code_pilot_app/media.py); replaces static() which only worked in DEBUG
+urlpatterns += [
+    re_path(r'^' + re.escape(settings.MEDIA_URL.lstrip('/')) + r'(?P<path>.+)$', media.serve_media, name='serve_media'),
+]
+
+# if settings.DEBUG:
     # urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,153 @@
+# code_pilot_app/versions.py
+
+# version stamps kept in the cache shared by all processes
+
+# Every gunicorn worker keeps its own in-memory copies of catalog data. When a process changes
+# the data (a worker, the admin, a management command) it bumps a version number in the shared
+# cache (settings.SHARED_CACHE_ALIAS, see CACHES); the other workers compare that number with
+# the one their copy was built from and reload when it moved on. The per-process 'default'
+# cache would not do: a bump there is never seen by any other process.
+
+# Version names in use:
+#   'autocomplete' → the in-process course name index (autocomplete.py)
+#   'catalog'      → anything derived from Course / Instructor data (search suggestions,
+#                    catalog_cache.py lists, ...)
+#   'cart:<user id>' → one user's cart (cart.py), part of the ETags of pages showing the cart
+
+# cache.incr() is only atomic on memcached/redis: on the file cache two processes bumping at the
+# same time can both read N and both write N + 1. That is fine for names that only need to "move
+# on", but not for 'autocomplete', whose workers patch their index in place when the bump they
+# made is exactly one past the version it was built from. Those names go through
+# get_atomic_version() / bump_atomic_version(), which count in a VersionCounter row (the row lock
+# orders the bumps) and copy the number to the shared cache for the hot path.
+
+# aget_version() / abump_version() are the same through the async cache API, for the async
+# views (async_views.py)
+
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import transaction
+from django.db.models import F
+
+from .models import VersionCounter
+
+
+# Prefix of all version keys in the cache
+VERSION_KEY_PREFIX = 'code_pilot:version:'
+# How long (seconds) get_local_version() trusts its per-worker copy of a version
+LOCAL_VERSION_MAX_AGE = 1.0
+
+# Per-worker copies of shared versions: name → (version, fetched at)
+_local_versions = {}
+
+
+# The cache every process sees (version stamps, and the per-user caches of cart.py / favorites.py)
+def shared_cache():
+    return caches[getattr(settings, 'SHARED_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+
+def _version_key(name):
+    return f'{VERSION_KEY_PREFIX}{name}'
+
+
+# Current version number for the given name
+def get_version(name):
+    cache = shared_cache()
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock (in ms) so a flushed cache never hands out an old version again
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+# Version for the hot path: re-read from the shared cache at most every LOCAL_VERSION_MAX_AGE seconds
+def get_local_version(name):
+    now = time.monotonic()
+    entry = _local_versions.get(name)
+    if entry is None or now - entry[1] >= LOCAL_VERSION_MAX_AGE:
+        entry = (get_version(name), now)
+        _local_versions[name] = entry
+    return entry[0]
+
+
+# Move the version on (atomic on memcached/redis; elsewhere concurrent bumps may merge into one,
+# which still moves it) and return the new number
+def bump_version(name):
+    cache = shared_cache()
+    key = _version_key(name)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # Key missing (first bump or evicted) → create it
+        get_version(name)
+        version = cache.incr(key)
+    # This worker sees its own change straight away (only names read through get_local_version()
+    # are kept, so per-user versions do not pile up in every worker)
+    if name in _local_versions:
+        _local_versions[name] = (version, time.monotonic())
+    return version
+
+
+# Current number of a VersionCounter-backed version (shared cache first, the row on a miss)
+def get_atomic_version(name):
+    cache = shared_cache()
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Never bumped → the clock, like get_version() (the first bump starts past it)
+        version = VersionCounter.objects.filter(name=name).values_list('value', flat=True).first()
+        if version is None:
+            version = int(time.time() * 1000)
+        # add(): a bump that landed in between has already stored a newer number
+        cache.add(key, version, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+# Move a VersionCounter-backed version on by exactly one and return the new number
+# (no other process can be handed the same number)
+def bump_atomic_version(name):
+    cache = shared_cache()
+    key = _version_key(name)
+    counters = VersionCounter.objects.filter(name=name)
+    with transaction.atomic():
+        if not counters.update(value=F('value') + 1):
+            # First bump: one past the number the workers have seen (the clock if there is none)
+            start = (cache.get(key) or int(time.time() * 1000)) + 1
+            _, created = VersionCounter.objects.get_or_create(name=name, defaults={'value': start})
+            if not created:
+                # Another process created the row first → bump it after all
+                counters.update(value=F('value') + 1)
+        version = counters.values_list('value', flat=True).get()
+        # Still holding the row lock: cache writes land in the same order as the bumps
+        cache.set(key, version, timeout=None)
+    if name in _local_versions:
+        _local_versions[name] = (version, time.monotonic())
+    return version
+
+
+async def aget_version(name):
+    cache = shared_cache()
+    key = _version_key(name)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+async def abump_version(name):
+    cache = shared_cache()
+    key = _version_key(name)
+    try:
+        version = await cache.aincr(key)
+    except ValueError:
+        await aget_version(name)
+        version = await cache.aincr(key)
+    if name in _local_versions:
+        _local_versions[name] = (version, time.monotonic())
+    return version
@@ -20,8 +20,8 @@ from django.contrib import messages
 # update_session_auth_hash → keeps user logged in after password update.
 from django.contrib.auth import update_session_auth_hash
 
-# Import all models used in this file (Course, Cart, Checkout, Favorite, etc.)
-from .models import Course, Instructor, Cart, Checkout, Favorite, ContactMessage, Subscriber
+# Import all models used in this file (Course, Cart, Favorite, etc.)
+from .models import Course, Instructor, Cart, Favorite, ContactMessage, Subscriber
 
 # JsonResponse → used when returning JSON data (usually for AJAX requests).
 from django.http import JsonResponse
@@ -32,10 +32,41 @@ from django.template.loader import render_to_string
 # Q object → allows OR/AND complex queries in Django filters (used in search).
 from django.db.models import Q
 
+# Cart summary service → (count, total, course_ids) from one cached query (see cart.py).
+from .cart import get_cart_items, get_cart_summary
+
+# Checkout service → atomic bulk checkout with idempotency keys (see orders.py).
+from .orders import checkout_cart, clean_idempotency_key, new_idempotency_key, order_history_page, order_total
+
+# catalog → course / instructor lookups served from the per-worker catalog snapshot (see catalog.py).
+# catalog_cache → versioned cache of catalog lists and instructor aggregates (see catalog_cache.py).
+from . import catalog, catalog_cache
+
+# anonymous_page_cache → shared full-page cache of the catalog pages for logged-out visitors (see page_cache.py).
+from .page_cache import anonymous_page_cache
+
+# open_modal → the login / register modal the next page reopens, in a signed cookie (see ui_state.py).
+from .ui_state import open_modal
+
+# conditional_response → ETag / Last-Modified validators and 304 answers (see conditional.py).
+from .conditional import (
+    conditional_response, catalog_page_etag, catalog_page_last_modified, cart_snippet_etag,
+    catalog_etag, catalog_last_modified,
+)
+
+# search_courses → ranked full-text search over the course catalog (see search.py).
+# cached_suggestions → the same search behind the LRU + TTL suggestion cache.
+from .search import search_courses, cached_suggestions
+
 # A secret key for verifying admin users.
 # Hardcoded here, but in real applications you should use environment variables.
 ADMIN_SECRET_KEY = 'superadmin123'
 
+# Number of course cards shown per page on the courses page.
+COURSES_PAGE_SIZE = 12
+# Number of course cards shown per page on an instructor page.
+INSTRUCTOR_COURSES_PAGE_SIZE = 8
+
 
 # This decorator checks if the user is logged in before allowing access to a view.
 # If not authenticated:
@@ -82,23 +113,23 @@ def register(request):
             messages.error(request, "All fields are required.")
             return redirect('index')
 
-        # request.session → stores temporary data for the user (like modal state)
+        # open_modal → the next page reopens that modal (a signed cookie, not a session write)
         # If passwords do not match
         if password != confirm_password:
             messages.error(request, "Passwords do not match.")
-            request.session['open_modal'] = 'register'  # reopen register modal
+            open_modal(request, 'register')  # reopen register modal
             return redirect('index')
 
         # Check if username already exists
         if User.objects.filter(username=username).exists():
             messages.error(request, "Username already exists.")
-            request.session['open_modal'] = 'register'
+            open_modal(request, 'register')
             return redirect('index')
 
         # Check if email already exists
         if User.objects.filter(email=email).exists():
             messages.error(request, "Email already registered.")
-            request.session['open_modal'] = 'register'
+            open_modal(request, 'register')
             return redirect('index')
 
         # Create the new user
@@ -106,7 +137,7 @@ def register(request):
 
         # Success message and open login modal
         messages.success(request, "Registration successful. Please log in.")
-        request.session['open_modal'] = 'login'
+        open_modal(request, 'login')
         return redirect('index')
 
     # If request is GET → show index page
@@ -154,17 +185,17 @@ def login(request):
                 # Normal user → login completely
                 else:
                     request.session['admin_verified'] = True
-                    request.session['open_modal'] = None
+                    open_modal(request, None)
                     return redirect('index')
 
             else:
                 # Wrong password
                 messages.error(request, "Incorrect password.")
-                request.session['open_modal'] = 'login'
+                open_modal(request, 'login')
         else:
             # No user found with username/email
             messages.error(request, "User not found.")
-            request.session['open_modal'] = 'login'
+            open_modal(request, 'login')
 
         return redirect('index')
 
@@ -282,29 +313,39 @@ def profile(request):
 
 
 # Home page view to show courses and instructors
+@anonymous_page_cache
 def index(request): #we also use this [{% for course in courses|slice:":4" %} in templates for show only 4 courses]
-    # Fetch first 4 courses from database
-    courses = Course.objects.all()[:4]  # fetch all courses 
-    # Fetch first 4 instructors from database
-    instructors = Instructor.objects.all()[:4]  # fetch all instructors
-    # Render index.html and pass courses and instructors
-    return render(request, 'index.html', {'courses': courses, 'instructors': instructors})
+    # The first 4 courses and instructors come from the global_data context processor
+    # (lazy and served from the versioned catalog cache, see catalog_cache.py)
+    return render(request, 'index.html')
 
 
 # Show details of a single course
+@conditional_response(catalog_page_etag, catalog_page_last_modified)
+@anonymous_page_cache
 def course_detail(request, course_id):
-    # Get the course object by ID or return 404 if not found
-    course = get_object_or_404(Course, id=course_id)
+    # Get the course by ID (snapshot record or model) or return 404 if not found
+    course = catalog.get_course_or_404(course_id)
     # Render course detail page and pass the course object
     return render(request, 'course_detail.html', {'course': course})
 
 
 # Show details of a single instructor
+@conditional_response(catalog_page_etag, catalog_page_last_modified)
+@anonymous_page_cache
 def instructor_detail(request, instructor_id):
-    # Get the instructor object by ID or return 404 if not found
-    instructor = get_object_or_404(Instructor, id=instructor_id)
-    # Render instructor detail page and pass the instructor object
-    return render(request, 'instructor_detail.html', {'instructor': instructor})
+    # Get the instructor by ID (snapshot record or model) or return 404 if not found
+    instructor = catalog.get_instructor_or_404(instructor_id)
+    # One page of this instructor's courses only (?after=... cursor), not the whole catalog
+    page = catalog.instructor_course_page(instructor.id, request.GET.get('after'), INSTRUCTOR_COURSES_PAGE_SIZE)
+    # Render instructor detail page with its courses and cached aggregates
+    return render(request, 'instructor_detail.html', {
+        'instructor': instructor,
+        'instructor_courses': page.object_list,
+        'instructor_stats': catalog_cache.instructor_stats(instructor.id),
+        'next_cursor': page.next_cursor,
+        'is_first_page': 'after' not in request.GET,
+    })
 
 
 # Add a course to the user's cart
@@ -313,13 +354,14 @@ def add_to_cart(request, course_id):
     # Get the course object by ID
     course = get_object_or_404(Course, id=course_id)
     # Get existing cart item or create a new one
-    cart_item, created = Cart.objects.get_or_create(user=request.user, course=course)
     # created=True → new item added, created=False → item already in cart
+    # (a new row drops the cached cart summary, see signals.py)
+    cart_item, created = Cart.objects.get_or_create(user=request.user, course=course)
 
     # Handle AJAX request for updating cart without page reload
     if request.headers.get('x-requested-with') == 'XMLHttpRequest': 
         # Count how many items are in user's cart
-        count = Cart.objects.filter(user=request.user).count() 
+        count = get_cart_summary(request.user).count
         # Return JSON response with cart status and count
         return JsonResponse({'status': 'success', 'added': created, 'count': count})
 
@@ -330,10 +372,10 @@ def add_to_cart(request, course_id):
 # View the user's cart page
 @login_required_redirect
 def view_cart(request):
-    # Get all cart items for the logged-in user
-    cart_items = Cart.objects.filter(user=request.user)
-    # Calculate total price by summing the price of each course in the cart
-    total = sum(item.course.price for item in cart_items)
+    # Get all cart items for the logged-in user (courses loaded in the same query)
+    cart_items = get_cart_items(request.user)
+    # Total price of the cart from the cart summary
+    total = get_cart_summary(request.user).total
     # Render cart.html template and pass cart items and total price
     return render(request, 'cart.html', {'cart_items': cart_items, 'total': total})
 
@@ -345,14 +387,12 @@ def remove_from_cart(request, item_id):
     if request.method == "POST" and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         # Get the specific cart item for the user or return 404 if not found
         item = get_object_or_404(Cart, id=item_id, user=request.user)
-        # Delete the cart item
+        # Delete the cart item (drops the cached cart summary, see signals.py)
         item.delete()
-        # Count remaining items in cart
-        count = Cart.objects.filter(user=request.user).count()
-        # Calculate new total price after deletion
-        total = sum(i.course.price for i in Cart.objects.filter(user=request.user))
+        # Remaining item count and new total price, from one query
+        summary = get_cart_summary(request.user)
         # Return JSON response with updated cart count and total
-        return JsonResponse({'status': 'success', 'count': count,'total': total})
+        return JsonResponse({'status': 'success', 'count': summary.count,'total': summary.total})
     
     # Redirect back to previous page if not an AJAX POST request
     return redirect(request.META.get('HTTP_REFERER', 'view_cart'))
@@ -361,14 +401,14 @@ def remove_from_cart(request, item_id):
 # Checkout page for purchasing courses
 @login_required_redirect
 def checkout(request):
-    # Get all cart items for the logged-in user
-    cart_items = Cart.objects.filter(user=request.user)
+    # Get all cart items for the logged-in user (courses loaded in the same query)
+    cart_items = get_cart_items(request.user)
     # Check if a single course ID is provided in query parameters
     course_id = request.GET.get('course_id')
     single_course = None
 
-    # If cart is empty but course_id is provided, get that single course
-    if not cart_items and course_id:
+    # If cart is empty (cached cart summary, no query) but course_id is provided, get that single course
+    if course_id and not get_cart_summary(request.user).count:
         single_course = get_object_or_404(Course, id=course_id)
 
     # Handle form submission for checkout
@@ -381,50 +421,48 @@ def checkout(request):
             messages.error(request, "Please select a payment method.")
             return redirect('checkout')
 
-        # If user has multiple items in cart
-        if cart_items:
-            # Create checkout entry for each cart item
-            for item in cart_items:
-                Checkout.objects.create(
-                    user=request.user,
-                    course=item.course,
-                    price=item.course.price,
-                    payment_method=payment_method
-                )
-            # Remove all items from cart after checkout
-            cart_items.delete()
-        # If single course was selected directly
-        elif single_course:
-            Checkout.objects.create(
-                user=request.user,
-                course=single_course,
-                price=single_course.price,
-                payment_method=payment_method
-            )
+        # Key of this checkout form (a resubmitted form carries the same key)
+        idempotency_key = clean_idempotency_key(request.POST.get('idempotency_key'))
+
+        # Buy the cart (or the single course) in one transaction with bulk inserts
+        result = checkout_cart(request.user, payment_method, idempotency_key, single_course=single_course)
+
+        # Same form submitted twice → the first submission already placed the order
+        if result.duplicate:
+            messages.info(request, "This order has already been placed.")
+            return redirect('checkout_history')
 
         # Show success message after checkout
         messages.success(request, "Checkout successful!")
         # Redirect to checkout history page
         return redirect('checkout_history')
 
-    # Calculate total price: sum of cart or single course
-    total = sum(item.course.price for item in cart_items) if cart_items else (single_course.price if single_course else 0)
+    # Total price from the same rows and current prices checkout_cart charges (cart or single course)
+    cart_items = list(cart_items)
+    courses = [item.course for item in cart_items] or ([single_course] if single_course else [])
+    total = order_total(courses)
 
     # Render checkout page and pass cart/single course info and total
+    # idempotency_key → hidden form field, so a double-submitted form buys only once
     return render(request, 'checkout.html', {
         'cart_items': cart_items,
         'single_course': single_course,
-        'total': total
+        'total': total,
+        'idempotency_key': new_idempotency_key(),
     })
 
 
 # View user's checkout/purchase history
 @login_required_redirect
 def checkout_history(request):
-    # Get all checkout entries for logged-in user, newest first
-    checkout_items = Checkout.objects.filter(user=request.user).order_by('-created_at')
-    # Render checkout history template and pass checkout items
-    return render(request, 'checkout_history.html', {'checkout_items': checkout_items})
+    # One page of the user's orders, newest first, each with its purchased courses
+    page = order_history_page(request.user, cursor=request.GET.get('after'))
+    # Render checkout history template and pass the orders of this page
+    return render(request, 'checkout_history.html', {
+        'orders': page.object_list,
+        'next_cursor': page.next_cursor,
+        'is_first_page': 'after' not in request.GET,
+    })
 
 
 # Add or remove a course from user's favorites
@@ -438,6 +476,7 @@ def toggle_favorite(request, course_id):
         fav, created = Favorite.objects.get_or_create(user=request.user, course=course)
 
         # If favorite already exists, remove it
+        # (the cached favorite ids of this user are dropped either way, see signals.py)
         if not created:
             fav.delete()
             return JsonResponse({'status': 'removed'})
@@ -448,8 +487,8 @@ def toggle_favorite(request, course_id):
 # View all favorite courses of the user
 @login_required_redirect
 def view_favorites(request):
-    # Get all favorite entries for logged-in user
-    favorites = Favorite.objects.filter(user=request.user)
+    # Get all favorite entries for logged-in user (courses loaded in the same query)
+    favorites = Favorite.objects.filter(user=request.user).select_related('course').order_by('id')
     # Render favorites page and pass favorite courses
     return render(request, 'favorites.html', {'favorites': favorites})
 
@@ -462,7 +501,7 @@ def remove_from_favorites(request, course_id):
         # Get favorite entry if exists
         fav = Favorite.objects.filter(user=request.user, course_id=course_id).first()
         if fav:
-            # Delete favorite entry
+            # Delete favorite entry (forgets the cached favorite ids, see signals.py)
             fav.delete()
             return JsonResponse({'status': 'success'})
         # If favorite not found
@@ -472,6 +511,7 @@ def remove_from_favorites(request, course_id):
 
 
 # About Us page
+@anonymous_page_cache
 def about_us(request):
     # Simply render the about_us.html template
     return render(request,'about_us.html')
@@ -511,51 +551,47 @@ def contact_us(request):
 
 # Load cart snippet dynamically for AJAX (used in header/cart icon)
 @login_required_redirect
+@conditional_response(cart_snippet_etag)
 def load_cart_snippet(request):
-    # Get all cart items for logged-in user
-    cart_items = Cart.objects.filter(user=request.user)
-    # Calculate total price of items in cart
-    total = sum(item.course.price for item in cart_items)
     # Render HTML snippet for cart (partials/cart_snippet.html)
-    html = render_to_string("partials/cart_snippet.html", {
-        "cart_items": cart_items,  # Pass cart items to template
-        "cart_total": total,       # Pass total price to template
-    }, request=request)
+    # cart items and total come from cart_total_processor (cart summary + one joined query)
+    html = render_to_string("partials/cart_snippet.html", request=request)
 
     # Return HTML as JSON (used in AJAX to update cart icon dynamically)
     return JsonResponse({'html': html})
 
 
 # Suggest course names while user types in search bar
+@conditional_response(catalog_etag, catalog_last_modified, private=False)
 def search_suggestions(request):
     # Get query parameter 'q' from GET request
     query = request.GET.get('q', '')
-    if query:
-        # Find courses where course_name contains query (case-insensitive)
-        courses = Course.objects.filter(course_name__icontains=query)
-        # Prepare a list of dictionaries with course id and name
-        data = [{'id': c.id, 'name': c.course_name} for c in courses]
-        # Return JSON response for frontend autocomplete
-        return JsonResponse(data, safe=False)
-    # Return empty list if no query
-    return JsonResponse([], safe=False)
+    # Ranked top matches (best first), served from the suggestion cache when possible
+    results, cache_status = cached_suggestions(query)
+    # Prepare a list of dictionaries with course id and name for frontend autocomplete
+    data = [{'id': course_id, 'name': name} for course_id, name in results]
+    # Return JSON response (empty list if no query / no match)
+    response = JsonResponse(data, safe=False)
+    # Report whether the cache answered (HIT-LOCAL / HIT-SHARED / MISS) to measure the hit rate
+    response['X-Cache'] = cache_status
+    return response
 
 
 # Redirect user to course detail page after search
 def search_course_redirect(request):
     # Get query parameter 'q' from GET request
     query = request.GET.get('q', '')
-    if query:
-        # Find first course that matches the search query
-        course = Course.objects.filter(course_name__icontains=query).first()
-        if course:
-            # Redirect to the detail page of that course
-            return redirect('course_detail', course_id=course.id)
+    # Same engine as the suggestions → the redirect lands on the first suggestion
+    results = search_courses(query, limit=1)
+    if results:
+        # Redirect to the detail page of the best match
+        return redirect('course_detail', course_id=results[0][0])
     # Redirect to index page if no match found
     return redirect('index')
 
 
 # Show all instructors page
+@anonymous_page_cache
 def instructors(request):
     # Fetch all instructors from database
     all_instructors = Instructor.objects.all()
@@ -563,12 +599,45 @@ def instructors(request):
     return render(request,'instructors.html',{"all_instructors":all_instructors})
 
 
-# Show all courses page
+# Query parameters the courses page can be filtered by (each one is a Course field)
+COURSE_FILTER_FIELDS = ('category', 'subcategory', 'level', 'language')
+
+
+# Show all courses page (filtered on the server and paginated with a keyset cursor)
+@anonymous_page_cache
 def courses(request):
-    # Fetch all courses from database
-    all_courses = Course.objects.all()
-    # Render courses page and pass all courses
-    return render(request,'courses.html',{"all_courses":all_courses})
+    # Collect the filters present in the query string, e.g. ?category=full_stack&level=Beginner
+    filters = {}
+    for field in COURSE_FILTER_FIELDS:
+        value = request.GET.get(field, '').strip()
+        if value:
+            filters[field] = value
+
+    # One page of courses after the cursor (?after=...), from the catalog snapshot or the
+    # composite indexes on Course (see catalog.course_page)
+    page = catalog.course_page(filters, request.GET.get('after'), COURSES_PAGE_SIZE)
+
+    # Query string for the "next page" link (keeps the current filters)
+    next_query = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['after'] = page.next_cursor
+        next_query = params.urlencode()
+
+    # Query string for the "first page" link (same filters, no cursor)
+    first_params = request.GET.copy()
+    first_params.pop('after', None)
+
+    # Render courses page and pass one page of courses
+    return render(request, 'courses.html', {
+        "all_courses": page.object_list,
+        "page": page,
+        "next_query": next_query,
+        "first_query": first_params.urlencode(),
+        "is_first_page": 'after' not in request.GET,
+        "category_choices": Course.CATEGORY_CHOICES,
+        "selected_category": filters.get('category', 'all'),
+    })
 
 
 # Subscribe user email to newsletter or mailing list
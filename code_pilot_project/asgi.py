@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_pilot_project.settings')
+# Served by an ASGI server (uvicorn code_pilot_project.asgi:application): route the AJAX
+# endpoints to their async views (settings.ASYNC_AJAX_VIEWS, code_pilot_app/async_views.py)
+os.environ.setdefault('CODE_PILOT_ASYNC_AJAX_VIEWS', '1')
 
 application = get_asgi_application()
@@ -40,17 +40,28 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # runserver serves static files through WhiteNoise too, like production
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'code_pilot_app',  # Your custom app
 ]
 
 MIDDLEWARE = [
+    # records the SQL of every request: N+1 detection and per-view query budgets (code_pilot_app/query_budgets.py)
+    'code_pilot_app.querycount.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # static files (hashed names, precompressed .gz / .br, immutable caching) before any other work
+    # (WhiteNoise, made async capable for ASGI: code_pilot_app/static_files.py)
+    'code_pilot_app.static_files.StaticFilesMiddleware',
+    # read replica routing state of the request, before the session / user are read (code_pilot_app/db_router.py)
+    'code_pilot_app.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    # login / register modal to reopen, in a signed cookie (code_pilot_app/ui_state.py)
+    'code_pilot_app.ui_state.UIStateMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -70,7 +81,11 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'code_pilot_app.context_processors.cart_total_processor', # created a seprate file for globally show the cart total inside code_pilot_app name context_processors.py and also add in setting.py
                 # define globally all the courses and instruvtors details
-                'code_pilot_app.context_processors.global_data'
+                'code_pilot_app.context_processors.global_data',
+                # favorite course ids of the user (heart icons on course cards)
+                'code_pilot_app.context_processors.favorites_processor',
+                # login / register modal the page reopens (code_pilot_app/ui_state.py)
+                'code_pilot_app.context_processors.open_modal_processor'
             ],
         },
     },
@@ -82,13 +97,104 @@ WSGI_APPLICATION = 'code_pilot_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuned for several gunicorn workers writing at once (PRAGMAs run on every new connection)
+#   journal_mode=WAL     readers and the writer stop blocking each other (persistent, in the file)
+#   synchronous=NORMAL   fsync at WAL checkpoints only: a power cut can lose the last commits,
+#                        never corrupt the database
+#   mmap_size            read pages through a memory map instead of read() calls (256 MiB)
+#   cache_size           page cache per connection (negative = KiB: 64 MiB)
+#   busy_timeout         wait up to 20 s for the write lock instead of failing with "database is locked"
+# transaction_mode IMMEDIATE: atomic() takes the write lock at BEGIN. With the default DEFERRED
+# a transaction that reads first (get_or_create, select_for_update) and then writes fails at
+# once with "database is locked" when another worker writes, whatever busy_timeout says.
+# "manage.py benchmark_sqlite_writes" compares this with Django's defaults.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 20000,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ''.join(f'PRAGMA {name}={value};' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Read replica (code_pilot_app/db_router.py): catalog reads and anonymous traffic go to the
+# DATABASE_REPLICA['ALIAS'] database when it is configured. Locally, CODE_PILOT_REPLICA=1 uses a
+# second SQLite file as the replica, refreshed from db.sqlite3 by
+#   python manage.py sync_replica --interval 2
+if os.environ.get('CODE_PILOT_REPLICA') == '1':
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        # tests read the primary test database through this alias
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['code_pilot_app.db_router.ReplicaRouter']
+# STICKY_SECONDS → how long a visitor reads from the primary after changing their cart, orders
+# or favorites (longer than the replica lag); HEADER → X-DB-Routing header on every response
+DATABASE_REPLICA = {
+    'ALIAS': 'replica',
+    'STICKY_SECONDS': 10,
+    'HEADER': False,
+}
+
+
+# Caches
+#   'default'  → per worker process: version-keyed copies of catalog data (catalog_cache.py
+#                lists, template fragments), whose keys change with the shared versions
+#   'shared'   → seen by every worker and every management command: version stamps
+#                (code_pilot_app/versions.py), cart summaries, favorite ids. A change made in
+#                one process (a worker, the admin, seed_catalog) reaches all the others.
+#   'sessions' → shared too, or a session logged out in one worker would stay valid in the others
+#   'pages'    → per worker process: anonymous full pages (code_pilot_app/page_cache.py), kept
+#                apart so their number can never evict the 'default' entries
+# A directory works on one host; use Redis or Memcached for 'shared' and 'sessions'
+# (django.core.cache.backends.redis.RedisCache) when the site runs on several.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'session_cache',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'anonymous-pages',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+# Alias of the cache shared by all processes (code_pilot_app/versions.py)
+SHARED_CACHE_ALIAS = 'shared'
+
+# Sessions and flash messages: write only when something changed
+#   sessions → cached_db read from the 'sessions' cache, rows rewritten only when their data
+#              changed (code_pilot_app/session_store.py); they hold the login state only
+#   messages → a signed cookie, never the session
+#   modals   → the login / register modal to reopen is a signed cookie too (code_pilot_app/ui_state.py)
+# "manage.py benchmark_routes" reports the session writes per request.
+SESSION_ENGINE = 'code_pilot_app.session_store'
+SESSION_CACHE_ALIAS = 'sessions'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+UI_STATE = {
+    'MAX_AGE': 300,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,11 +239,84 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 # for static folder 
+# STATIC_ROOT is build output (not in git): run "manage.py collectstatic" on every deploy
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR,'staticfiles')
 STATICFILES_DIRS = [os.path.join(BASE_DIR,'static')]
 
+# collectstatic writes every file under a content-hashed name (style.3f2a9c1b.css) plus gzip and
+# brotli copies; WhiteNoise serves the hashed names with "Cache-Control: max-age=315360000,
+# immutable" and picks the .br / .gz copy the browser accepts. Templates must use {% static %}
+# (it maps names to the hashed ones; with DEBUG on it returns the plain names).
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media' 
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media' 
+
+# How /media/ files are sent (code_pilot_app/media.py): 'direct' streams them from Django with
+# byte-range support; 'x-accel-redirect' hands them to nginx through an internal location:
+#   location /protected-media/ { internal; alias /path/to/media/; }
+MEDIA_SERVING = {
+    'MODE': 'direct',
+    'X_ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 60 * 60 * 24,
+}
+
+
+# Search suggestion response cache (code_pilot_app/search.py)
+# MAXSIZE → entries kept per worker (least recently used are evicted)
+# TTL → seconds an entry stays valid
+# SHARED_CACHE → alias from CACHES for an extra cross-worker layer (None = per-process only)
+SEARCH_SUGGESTION_CACHE = {
+    'MAXSIZE': 2048,
+    'TTL': 60,
+    'SHARED_CACHE': None,
+}
+
+
+# Render the catalog pages (index, courses, course_detail, instructor_detail) from an
+# in-memory snapshot loaded once per worker (code_pilot_app/catalog.py)
+# Turn off for catalogs too large to keep in every worker's memory
+CATALOG_SNAPSHOT_ENABLED = True
+# Rebuilt when the 'catalog' version moves on, and at the latest after this many seconds
+# (changes that bypass the model signals: queryset.update(), raw SQL, other applications)
+CATALOG_SNAPSHOT_MAX_AGE = 300
+
+
+# Full-page cache of the catalog pages for logged-out visitors (code_pilot_app/page_cache.py)
+# TTL → seconds a page is fresh; STALE_TTL → seconds an expired page (or one from an older
+# catalog version) is still served while a single request renders the new one
+# QUERY_PARAMS → the only query parameters that make a different page (others are dropped)
+ANONYMOUS_PAGE_CACHE = {
+    'ENABLED': True,
+    'TTL': 60,
+    'STALE_TTL': 600,
+    'CACHE': 'pages',
+    'QUERY_PARAMS': ('category', 'subcategory', 'level', 'language', 'after'),
+}
+
+
+# Query budgets (code_pilot_app/querycount.py): 'raise' | 'log' | 'off'
+# In production a SAMPLE_RATE fraction of the requests is recorded and logged;
+# the test runner below switches to 'raise' so a new N+1 fails the suite
+QUERY_BUDGET = {
+    'MODE': 'log',
+    'SAMPLE_RATE': 0.05,
+}
+TEST_RUNNER = 'code_pilot_app.querycount.QueryBudgetTestRunner'
+
+
+# Serve the AJAX endpoints (cart, favorites, cart snippet, search suggestions) with their async
+# versions (code_pilot_app/async_views.py). code_pilot_project/asgi.py turns this on, so it is
+# on under an ASGI server (uvicorn / daphne / gunicorn -k uvicorn.workers.UvicornWorker) and off
+# under WSGI, where async views would only add an event loop per request.
+ASYNC_AJAX_VIEWS = os.environ.get('CODE_PILOT_ASYNC_AJAX_VIEWS') == '1'
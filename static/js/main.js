@@ -425,61 +425,10 @@ document.querySelectorAll(".toggle-password").forEach((icon) => {
   });
 });
 
-// This auto triggers filtering when arriving via URL (like /courses/?category=full_stack)
-document.addEventListener("DOMContentLoaded", function () {
-  const params = new URLSearchParams(window.location.search);
-  const categoryFromURL = params.get("category");
-
-  // Highlight category and filter courses on page load
-  if (categoryFromURL) {
-    const categoryElement = document.querySelector(
-      `.filter-category-text p[data-category="${categoryFromURL}"]`
-    );
-    if (categoryElement) {
-      filterCourses(categoryElement, true); // true = don't push URL again
-    }
-  } else {
-    // Default to all
-    const allCategory = document.querySelector(
-      '.filter-category-text p[data-category="all"]'
-    );
-    if (allCategory) {
-      filterCourses(allCategory, true);
-    }
-  }
-});
-
+// Category tabs on the courses page → the server filters the courses (views.courses)
 function redirectToCourses(category) {
-  window.location.href = `/courses/?category=${category}`;
-}
-
-function filterCourses(element, skipPush = false) {
-  // Set active class
-  document
-    .querySelectorAll(".filter-category-text p, .div-grid")
-    .forEach((p) => p.classList.remove("active"));
-  element.classList.add("active");
-
-  const selectedCategory = element.getAttribute("data-category");
-
-  // Update the URL if needed
-  if (!skipPush) {
-    const newURL =
-      selectedCategory === "all"
-        ? window.location.pathname
-        : `${window.location.pathname}?category=${selectedCategory}`;
-    window.history.pushState({}, "", newURL);
-  }
-
-  // Show/hide courses
-  document.querySelectorAll(".courses-maindiv").forEach((card) => {
-    const courseCategory = card.getAttribute("data-category");
-    if (selectedCategory === "all" || courseCategory === selectedCategory) {
-      card.style.display = "block";
-    } else {
-      card.style.display = "none";
-    }
-  });
+  window.location.href =
+    category === "all" ? "/courses/" : `/courses/?category=${category}`;
 }
 
 // ṣhow mesaage if user is try add to fav if user is not login